@@ -4,6 +4,11 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from src.app.external.postgres.migrations import (
+    apply_timeouts,
+    default_lock_timeout,
+    default_statement_timeout,
+)
 from src.app.external.postgres.models import Base
 
 # this is the Alembic Config object, which provides
@@ -64,7 +69,16 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
 
+    x_args = context.get_x_argument(as_dictionary=True)
     with connectable.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            apply_timeouts(
+                connection,
+                lock_timeout=x_args.get("lock_timeout", default_lock_timeout),
+                statement_timeout=x_args.get(
+                    "statement_timeout", default_statement_timeout,
+                ),
+            )
         context.configure(
             connection=connection, target_metadata=target_metadata
         )
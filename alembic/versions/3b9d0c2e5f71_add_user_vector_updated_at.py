@@ -0,0 +1,45 @@
+"""add User.vector_updated_at
+
+Revision ID: 3b9d0c2e5f71
+Revises: e1369f771946
+Create Date: 2026-10-19 10:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.app.external.postgres.migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d0c2e5f71'
+down_revision: Union[str, None] = 'e1369f771946'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # nullable column without default is a catalog-only change,
+    # vectors written before it are picked up by a full index refresh
+    op.add_column(
+        'users',
+        sa.Column(
+            'vector_updated_at', sa.DateTime(timezone=True), nullable=True,
+        ),
+    )
+    create_index_concurrently(
+        'ix_users_vector_updated_at',
+        'users',
+        ['vector_updated_at'],
+        where='vector_updated_at IS NOT NULL',
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently('ix_users_vector_updated_at', 'users')
+    op.drop_column('users', 'vector_updated_at')
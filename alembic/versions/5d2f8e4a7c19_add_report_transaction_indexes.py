@@ -0,0 +1,45 @@
+"""add report_transaction indexes
+
+Revision ID: 5d2f8e4a7c19
+Revises: 7a41c6d2e8b3
+Create Date: 2026-10-19 14:12:40.618230
+
+"""
+from typing import Sequence, Union
+
+from src.app.external.postgres.migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8e4a7c19'
+down_revision: Union[str, None] = '7a41c6d2e8b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # reports are read by id_report, and without an index on
+    # id_transaction every deleted transaction scans the whole table
+    # for the foreign key check
+    create_index_concurrently(
+        'ix_report_transaction_id_report',
+        'report_transaction',
+        ['id_report', 'id_transaction'],
+    )
+    create_index_concurrently(
+        'ix_report_transaction_id_transaction',
+        'report_transaction',
+        ['id_transaction'],
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently(
+        'ix_report_transaction_id_transaction', 'report_transaction',
+    )
+    drop_index_concurrently(
+        'ix_report_transaction_id_report', 'report_transaction',
+    )
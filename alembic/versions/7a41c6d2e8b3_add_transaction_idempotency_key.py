@@ -0,0 +1,46 @@
+"""add Transaction.idempotency_key
+
+Revision ID: 7a41c6d2e8b3
+Revises: 3b9d0c2e5f71
+Create Date: 2026-10-19 10:31:05.274913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.app.external.postgres.migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a41c6d2e8b3'
+down_revision: Union[str, None] = '3b9d0c2e5f71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # transactions written before the column have no key
+    # and are not covered by the uniqueness check
+    op.add_column(
+        'transactions',
+        sa.Column('idempotency_key', sa.String(length=100), nullable=True),
+    )
+    create_index_concurrently(
+        'ix_transactions_id_user_idempotency_key',
+        'transactions',
+        ['id_user', 'idempotency_key'],
+        unique=True,
+        where='idempotency_key IS NOT NULL',
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently(
+        'ix_transactions_id_user_idempotency_key', 'transactions',
+    )
+    op.drop_column('transactions', 'idempotency_key')
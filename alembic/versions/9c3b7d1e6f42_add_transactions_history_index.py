@@ -0,0 +1,37 @@
+"""add transactions history index
+
+Revision ID: 9c3b7d1e6f42
+Revises: 5d2f8e4a7c19
+Create Date: 2026-10-19 15:03:27.904115
+
+"""
+from typing import Sequence, Union
+
+from src.app.external.postgres.migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3b7d1e6f42'
+down_revision: Union[str, None] = '5d2f8e4a7c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # serves keyset pages of a user's history and report windows,
+    # deleted transactions are never read and stay out of the index
+    create_index_concurrently(
+        'ix_transactions_id_user_created_at_id',
+        'transactions',
+        ['id_user', 'created_at', 'id'],
+        where='is_deleted = false',
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently(
+        'ix_transactions_id_user_created_at_id', 'transactions',
+    )
@@ -0,0 +1,107 @@
+"""add transaction_rollups
+
+Revision ID: e4a8c2f6b5d3
+Revises: 9c3b7d1e6f42
+Create Date: 2026-10-19 17:41:05.362817
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a8c2f6b5d3'
+down_revision: Union[str, None] = '9c3b7d1e6f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users_batch_size = 1000
+max_user_id = 2 ** 31 - 1
+last_user_sql = """
+SELECT max(id) FROM (
+    SELECT id FROM users WHERE id > :after_id ORDER BY id LIMIT :batch_size
+) AS batch
+"""
+backfill_sql = (
+    # locked in id order like batch ingest, so no rollup increment is lost
+    """
+    SELECT id FROM users
+    WHERE id > :after_id AND id <= :last_id
+    ORDER BY id
+    FOR NO KEY UPDATE
+    """,
+    # makes a batch repeatable after a failed upgrade
+    """
+    DELETE FROM transaction_rollups
+    WHERE id_user > :after_id AND id_user <= :last_id
+    """,
+    """
+    INSERT INTO transaction_rollups (
+        id_user, day, transactions, deposits, withdrawals
+    )
+    SELECT
+        id_user,
+        created_at::date,
+        count(*),
+        coalesce(sum(amount) FILTER (WHERE transaction_type), 0),
+        coalesce(sum(amount) FILTER (WHERE NOT transaction_type), 0)
+    FROM transactions
+    WHERE is_deleted = false AND id_user > :after_id AND id_user <= :last_id
+    GROUP BY id_user, created_at::date
+    """,
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'transaction_rollups',
+        sa.Column('id_user', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('transactions', sa.BigInteger(), nullable=False),
+        sa.Column('deposits', sa.BigInteger(), nullable=False),
+        sa.Column('withdrawals', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['id_user'], ['users.id']),
+        sa.PrimaryKeyConstraint('id_user', 'day'),
+    )
+    # the table is created empty and filled per range of users in
+    # short transactions after the DDL transaction commits; batches
+    # ingested by the previous release into already filled ranges are
+    # picked up by `python -m app.external.postgres.rollups --repair`
+    if context.is_offline_mode():
+        for statement in backfill_sql:
+            op.execute(sa.text(statement).bindparams(
+                after_id=0, last_id=max_user_id,
+            ))
+        return
+    after_id = 0
+    with op.get_context().autocommit_block():
+        while after_id is not None:
+            last_id = op.get_bind().scalar(
+                sa.text(last_user_sql),
+                {'after_id': after_id, 'batch_size': users_batch_size},
+            )
+            if last_id is not None:
+                _backfill(op.get_bind(), after_id, last_id)
+            after_id = last_id
+
+
+def downgrade() -> None:
+    op.drop_table('transaction_rollups')
+
+
+def _backfill(bind: sa.Connection, after_id: int, last_id: int) -> None:
+    # the connection is in autocommit mode, so the batch opens
+    # its own transaction to hold the user locks until the insert
+    bind.exec_driver_sql('BEGIN')
+    try:
+        for statement in backfill_sql:
+            bind.execute(
+                sa.text(statement),
+                {'after_id': after_id, 'last_id': last_id},
+            )
+    except Exception:
+        bind.exec_driver_sql('ROLLBACK')
+        raise
+    bind.exec_driver_sql('COMMIT')
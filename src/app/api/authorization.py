@@ -0,0 +1,63 @@
+import hmac
+import logging
+from typing import Annotated
+
+from fastapi import Header, Request
+
+from app.core.errors import AuthorizationError, NotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+async def require_user(
+    username: str, authorization: Annotated[str, Header()], request: Request,
+) -> None:
+    """
+    Проверяет, что токен запроса выдан пользователю из пути запроса.
+
+    Зависимость хэндлеров с данными одного пользователя.
+
+    :param username: Имя пользователя из пути запроса.
+    :type username: str
+    :param authorization: Токен авторизации пользователя.
+    :type authorization: str
+    :param request: Объект запроса.
+    :type request: Request
+    :raises AuthorizationError: Если токен не найден, истек
+        или выдан другому пользователю.
+    """
+    try:
+        await request.app.service.check_token(authorization, username)
+    except NotFoundError as not_found_err:
+        logger.info(f'token not found for {username}')
+        raise AuthorizationError(detail='token not found') from not_found_err
+
+
+async def require_service(
+    request: Request, x_ingest_key: Annotated[str | None, Header()] = None,
+) -> None:
+    """
+    Проверяет ключ сервиса, которому разрешена запись транзакций.
+
+    Зависимость хэндлеров, доступных только внутренним сервисам.
+    Токены пользователей не принимаются, иначе пользователь мог бы
+    записать пополнение баланса себе или другому пользователю.
+    Без ключа INGEST_KEY в файле секретов доступ закрыт для всех.
+
+    :param request: Объект запроса.
+    :type request: Request
+    :param x_ingest_key: Ключ сервиса из заголовка X-Ingest-Key.
+    :type x_ingest_key: str | None
+    :raises AuthorizationError: Если ключ не передан, не совпадает
+        или не задан в конфигурации.
+    """
+    config = request.app.service.encoder.config
+    if not _is_same_key(x_ingest_key, config.ingest_key):
+        logger.info('invalid ingest key for protected endpoint')
+        raise AuthorizationError(detail='invalid ingest key')
+
+
+def _is_same_key(key: str | None, expected_key: str | None) -> bool:
+    if not key or not expected_key:
+        return False
+    return hmac.compare_digest(key.encode(), expected_key.encode())
@@ -1,6 +1,6 @@
 import asyncio
+import io
 import logging
-from copy import deepcopy
 from typing import Annotated
 
 from fastapi import (
@@ -16,13 +16,23 @@ from fastapi import (
 from opentracing import global_tracer
 from pydantic import ValidationError
 
-from app.core.errors import AuthorizationError, NotFoundError, ServerError
+from app.api.reports.handlers import reports_router
+from app.api.transactions.handlers import transactions_router
+from app.core.config.config import get_settings
+from app.core.errors import (
+    AuthorizationError,
+    NotFoundError,
+    PayloadTooLargeError,
+    ServerError,
+)
 from app.core.models import Token, UserCredentials, validation_rules
 from app.metrics.tracing import Tag
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+router.include_router(transactions_router)
+router.include_router(reports_router)
 
 
 @router.post('/login')
@@ -165,7 +175,8 @@ async def verify(
     Верифицирует пользователя.
 
     Загружает фотографию пользователя и передает путь к файлу
-    через сообщение kafka.
+    через сообщение kafka. Размер файла проверяется до запуска
+    фоновой задачи, чтобы клиент получил ошибку в ответе.
 
     :param username: Имя пользователя.
     :type username: str
@@ -177,11 +188,42 @@ async def verify(
     :type request: Request
     :return: Сообщение о успехе операции
     :rtype: dict[str, str]
+    :raises PayloadTooLargeError: При превышении размера изображения.
     """
+    max_upload_size = get_settings().kafka.max_upload_size
     with global_tracer().start_active_span('verify') as scope:
         scope.span.set_tag(Tag.username, username)
+        if image.size is not None and image.size > max_upload_size:
+            scope.span.set_tag(Tag.error, 'image is too large')
+            raise PayloadTooLargeError(
+                detail=f'image is larger than {max_upload_size}',
+            )
         service = request.app.service
         background_tasks.add_task(
-            service.verify, username=username, image=deepcopy(image),
+            service.verify, username=username, image=detach_upload(image),
         )
         return {'message': 'ok'}
+
+
+def detach_upload(image: UploadFile) -> UploadFile:
+    """
+    Передает файл загрузки фоновой задаче без копирования.
+
+    FastAPI закрывает файлы формы до запуска фоновых задач.
+    Новый UploadFile забирает открытый временный файл, а исходный
+    получает пустой файл, который и будет закрыт вместе с формой.
+    Закрыть файл должен получатель.
+
+    :param image: Загружаемый пользователем файл.
+    :type image: UploadFile
+    :return: Загружаемый файл, принадлежащий фоновой задаче.
+    :rtype: UploadFile
+    """
+    detached = UploadFile(
+        file=image.file,
+        size=image.size,
+        filename=image.filename,
+        headers=image.headers,
+    )
+    image.file = io.BytesIO()
+    return detached
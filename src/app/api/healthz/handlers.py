@@ -2,14 +2,13 @@ import logging
 
 from fastapi import APIRouter, Request
 
-from app.core.errors import ServerError
-
 logger = logging.getLogger(__name__)
 
 healthz_router = APIRouter(prefix='/healthz', tags=['healthz'])
 
 up_message = {'message': 'service is up'}
 ready_message = {'message': 'service is ready'}
+degraded_message = {'message': 'service is ready, kafka is unavailable'}
 
 
 @healthz_router.get('/up')
@@ -28,14 +27,17 @@ async def ready_check(request: Request) -> dict[str, str]:
     """
     Healthcheck для зависимостей приложения.
 
+    Недоступность kafka не делает сервис неготовым: /login
+    и /check_token от нее не зависят, а /verify копит сообщения
+    в локальном журнале до подключения к kafka.
+
     :param request: Запрос пользователя.
     :type request: Request
-    :return: Сообщение о успехе.
+    :return: Сообщение о готовности.
     :rtype: dict[str, str]
-    :raises ServerError: Сервис недоступен.
     """
     service = request.app.service
     if await service.producer.check_kafka():
         return ready_message
     logger.warning('Kafka недоступна')
-    raise ServerError(detail='Kafka недоступна')
+    return degraded_message
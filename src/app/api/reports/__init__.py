@@ -0,0 +1 @@
+"""Пакет для api отчетов по транзакциям."""
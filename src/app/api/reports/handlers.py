@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from opentracing import global_tracer
+
+from app.api.authorization import require_user
+from app.core.errors import NotFoundError, ServerError
+from app.core.models import BalanceSummary, NaiveUTCDatetime
+from app.external.postgres.reports import ReportWriter
+from app.external.postgres.rollups import BalanceReader
+from app.external.report_formats import ReportFormat
+from app.metrics.tracing import Tag
+
+logger = logging.getLogger(__name__)
+
+reports_router = APIRouter(prefix='/reports', tags=['reports'])
+
+
+@lru_cache
+def get_report_writer() -> ReportWriter:
+    """
+    Создает общий для всех запросов объект построения отчетов.
+
+    :return: Объект построения отчетов.
+    :rtype: ReportWriter
+    """
+    return ReportWriter()
+
+
+@lru_cache
+def get_balance_reader() -> BalanceReader:
+    """
+    Создает общий для всех запросов объект чтения итогов.
+
+    :return: Объект чтения итогов транзакций.
+    :rtype: BalanceReader
+    """
+    return BalanceReader()
+
+
+@reports_router.post('/{username}', dependencies=[Depends(require_user)])
+async def create_report(
+    username: str,
+    start_date: NaiveUTCDatetime,
+    end_date: NaiveUTCDatetime,
+    writer: Annotated[ReportWriter, Depends(get_report_writer)],
+    report_format: ReportFormat = ReportFormat.csv,
+) -> StreamingResponse:
+    """
+    Хэндлер построения отчета по транзакциям пользователя.
+
+    Создает отчет за период [start_date, end_date] и отдает
+    транзакции периода потоком в формате CSV или NDJSON.
+    Каждый запрос записывает новый отчет, поэтому хэндлер
+    принимает POST, который клиенты и кэши не повторяют сами.
+    Время с часовым поясом переводится в UTC.
+    Доступен только с токеном этого пользователя.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param start_date: Начало периода включительно.
+    :type start_date: datetime
+    :param end_date: Конец периода включительно.
+    :type end_date: datetime
+    :param writer: Объект построения отчетов.
+    :type writer: ReportWriter
+    :param report_format: Формат отчета.
+    :type report_format: ReportFormat
+    :return: Потоковый ответ с отчетом.
+    :rtype: StreamingResponse
+    :raises HTTPException: При неверном периоде или ошибке построения.
+    """
+    with global_tracer().start_active_span('report') as scope:
+        scope.span.set_tag(Tag.username, username)
+        if start_date > end_date:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='start_date is after end_date',
+            )
+        try:
+            chunks = await asyncio.to_thread(
+                writer.open, username, start_date, end_date, report_format,
+            )
+        except NotFoundError as not_found_err:
+            logger.info(f'{username} not found')
+            scope.span.set_tag(Tag.warning, 'user not found')
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'{username} not found',
+            ) from not_found_err
+        except ServerError as err:
+            logger.error('server error in /reports')
+            scope.span.set_tag(Tag.error, 'unexpected error on report')
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            ) from err
+        return StreamingResponse(chunks, media_type=report_format.media_type)
+
+
+@reports_router.get(
+    '/{username}/summary', dependencies=[Depends(require_user)],
+)
+async def read_summary(
+    username: str,
+    end_date: NaiveUTCDatetime,
+    reader: Annotated[BalanceReader, Depends(get_balance_reader)],
+    start_date: NaiveUTCDatetime | None = None,
+) -> BalanceSummary:
+    """
+    Хэндлер итогов транзакций пользователя за период.
+
+    Время с часовым поясом переводится в UTC.
+    Доступен только с токеном этого пользователя.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param end_date: Конец периода включительно.
+    :type end_date: datetime
+    :param reader: Объект чтения итогов транзакций.
+    :type reader: BalanceReader
+    :param start_date: Начало периода включительно, без него итоги
+        считаются с первой транзакции.
+    :type start_date: datetime | None
+    :return: Количество транзакций, суммы пополнений и списаний.
+    :rtype: BalanceSummary
+    :raises HTTPException: При неверном периоде или ошибке чтения.
+    """
+    with global_tracer().start_active_span('summary') as scope:
+        scope.span.set_tag(Tag.username, username)
+        if start_date is not None and start_date > end_date:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='start_date is after end_date',
+            )
+        try:
+            return await reader.summarize(username, start_date, end_date)
+        except NotFoundError as not_found_err:
+            scope.span.set_tag(Tag.warning, 'user not found')
+            raise HTTPException(
+                status_code=not_found_err.status_code,
+                detail=not_found_err.detail,
+            ) from not_found_err
+        except ServerError as err:
+            logger.error('server error in /reports summary')
+            scope.span.set_tag(Tag.error, 'unexpected error on summary')
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            ) from err
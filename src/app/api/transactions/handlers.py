@@ -0,0 +1,136 @@
+import logging
+from functools import lru_cache
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from opentracing import global_tracer
+
+from app.api.authorization import require_service, require_user
+from app.core.errors import NotFoundError, ServerError
+from app.core.models import (
+    IngestResult,
+    TransactionBatch,
+    TransactionHistory,
+    validation_rules,
+)
+from app.external.postgres.history import HistoryReader
+from app.external.postgres.transactions import TransactionWriter
+from app.metrics.tracing import Tag
+
+logger = logging.getLogger(__name__)
+
+transactions_router = APIRouter(prefix='/transactions', tags=['transactions'])
+
+default_history_limit = 50
+HistoryLimit = Annotated[
+    int, Query(ge=1, le=validation_rules.history_page_max_len),
+]
+
+
+@lru_cache
+def get_transaction_writer() -> TransactionWriter:
+    """
+    Создает общий для всех запросов объект записи транзакций.
+
+    :return: Объект записи транзакций.
+    :rtype: TransactionWriter
+    """
+    return TransactionWriter()
+
+
+@lru_cache
+def get_history_reader() -> HistoryReader:
+    """
+    Создает общий для всех запросов объект чтения истории.
+
+    :return: Объект чтения истории транзакций.
+    :rtype: HistoryReader
+    """
+    return HistoryReader()
+
+
+@transactions_router.post(
+    '/batch', dependencies=[Depends(require_service)],
+)
+async def ingest_transactions(
+    batch: TransactionBatch,
+    writer: Annotated[TransactionWriter, Depends(get_transaction_writer)],
+) -> IngestResult:
+    """
+    Хэндлер записи пачки транзакций.
+
+    Доступен только внутренним сервисам с ключом X-Ingest-Key,
+    токены пользователей не принимаются.
+    Записывает транзакции и обновляет балансы пользователей.
+    Транзакции с уже записанным ключом идемпотентности пропускаются,
+    поэтому пачку можно безопасно отправить повторно.
+
+    :param batch: Пачка транзакций.
+    :type batch: TransactionBatch
+    :param writer: Объект записи транзакций.
+    :type writer: TransactionWriter
+    :return: Количество записанных, повторных и отклоненных транзакций.
+    :rtype: IngestResult
+    :raises HTTPException: При ошибке записи транзакций.
+    """
+    with global_tracer().start_active_span('transactions') as scope:
+        try:
+            return await writer.ingest(batch.transactions)
+        except ServerError as err:
+            logger.error('server error in /transactions/batch')
+            scope.span.set_tag(Tag.error, 'unexpected error on transactions')
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            ) from err
+
+
+@transactions_router.get('/{username}', dependencies=[Depends(require_user)])
+async def read_history(
+    username: str,
+    reader: Annotated[HistoryReader, Depends(get_history_reader)],
+    limit: HistoryLimit = default_history_limit,
+    cursor: str | None = None,
+) -> TransactionHistory:
+    """
+    Хэндлер истории транзакций пользователя.
+
+    Возвращает страницу транзакций от новых к старым. Следующая
+    страница запрашивается с курсором next_cursor из ответа.
+    Доступен только с токеном этого пользователя.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param reader: Объект чтения истории транзакций.
+    :type reader: HistoryReader
+    :param limit: Количество транзакций на странице.
+    :type limit: int
+    :param cursor: Курсор предыдущей страницы.
+    :type cursor: str | None
+    :return: Страница истории транзакций.
+    :rtype: TransactionHistory
+    :raises HTTPException: При неверном курсоре или ошибке чтения.
+    """
+    with global_tracer().start_active_span('history') as scope:
+        scope.span.set_tag(Tag.username, username)
+        try:
+            return await reader.read(username, limit, cursor)
+        except ValueError as cursor_err:
+            logger.info(f'invalid history cursor {cursor}')
+            scope.span.set_tag(Tag.warning, 'invalid cursor')
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail='invalid cursor',
+            ) from cursor_err
+        except NotFoundError as not_found_err:
+            logger.info(f'{username} not found')
+            scope.span.set_tag(Tag.warning, 'user not found')
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f'{username} not found',
+            ) from not_found_err
+        except ServerError as err:
+            logger.error('server error in /transactions history')
+            scope.span.set_tag(Tag.error, 'unexpected error on history')
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            ) from err
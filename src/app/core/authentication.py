@@ -136,6 +136,27 @@ class Hash:
         """
         return self._pwd_context.verify(string, hashed_str)
 
+    def is_hash(self, hashed_str: str) -> bool:
+        """
+        Метод проверки формата хэша.
+
+        Проверяет, что строка - хэш алгоритма сервиса, который
+        можно передать в validate.
+
+        :param hashed_str: строка для проверки
+        :type hashed_str: str
+        :return: является ли строка хэшем алгоритма сервиса
+        :rtype: bool
+        """
+        scheme = self._pwd_context.identify(hashed_str, required=False)
+        if scheme is None:
+            return False
+        try:
+            self._pwd_context.handler(scheme).from_string(hashed_str)
+        except ValueError:
+            return False
+        return True
+
 
 class JWTEncoder:
     """Алгоритм шифрования JWT токена."""
@@ -324,17 +345,24 @@ class AuthService:
         return token
 
     async def check_token(
-        self, authorization: Annotated[str, Header()],
+        self,
+        authorization: Annotated[str, Header()],
+        username: str | None = None,
     ) -> dict[str, str]:
         """
         Валидирует токен пользователя.
 
+        С именем пользователя также проверяет, что токен выдан ему.
+
         :param authorization: Заголовок авторизации
         :type authorization: Annotated[str, Header()
+        :param username: Владелец данных, к которым нужен доступ
+        :type username: str | None
         :return: Сообщение об успехе.
         :rtype: dict[str, str]
         :raises NotFoundError: Токен не найден
         :raises AuthorizationError: Срок действия токена вышел
+            или токен выдан другому пользователю
         """
         token_value_decoded = self.encoder.decode(authorization)
         try:
@@ -354,6 +382,11 @@ class AuthService:
             raise AuthorizationError(
                 detail=f'token is expired for user {token.subject}',
             )
+        if username is not None and token.subject != username:
+            logger.info(f'token of {token.subject} used for {username}')
+            raise AuthorizationError(
+                detail=f'token is not issued to {username}',
+            )
         return {'message': 'ok'}
 
     async def verify(
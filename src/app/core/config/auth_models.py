@@ -16,6 +16,7 @@ class AuthConfigAccessData:
     Attributes:
         algorithm_key: str - название переменной алгоритма.
         secret_key_key : str - название переменной секретного ключа.
+        ingest_key_key : str - название переменной ключа записи транзакций.
         jwt_secrets_path : str - путь к файлу секретов.
     """
 
@@ -23,6 +24,7 @@ class AuthConfigAccessData:
         """Метод инициализации."""
         self.algorithm_key: str = 'TOKEN_ALGORITHM'
         self.secret_key_key: str = 'SECRET_KEY'
+        self.ingest_key_key: str = 'INGEST_KEY'
         self.jwt_secrets_path: str | None = os.environ.get('SECRETS_PATH')
         self._validate_access_data()
 
@@ -70,6 +72,10 @@ class AuthConfig:
         # set after validation
         self.algorithm: str = algorithm_value  # type: ignore
         self.secret_key: str = secret_key_value  # type: ignore
+        # without the key batch ingest of transactions is disabled
+        self.ingest_key: str | None = jwt_config.get(
+            access_data.ingest_key_key,
+        )
 
     def _validate_config_values(
         self, algorithm_value, secret_key_value,
@@ -1,6 +1,6 @@
 import logging
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
 import yaml
 from pydantic import Field, PostgresDsn
@@ -18,8 +18,38 @@ class KafkaSettings(BaseSettings):
     port: int
     file_encoding: str = 'utf-8'
     file_compression_quality: int = 1
+    compress_images: bool = True
     storage_path: str
     topics: str
+    upload_chunk_size: int = 65536
+    max_upload_size: int = 10485760
+    upload_writers: int = 4
+    linger_ms: int = 5
+    batch_size: int = 16384
+    max_in_flight: int = 1000
+    acks: Literal[0, 1, 'all'] = 1
+    connect_backoff: float = 0.5
+    connect_backoff_max: float = 30
+    compression: Literal['none', 'gzip', 'snappy', 'lz4', 'zstd'] = 'gzip'
+    serializer: Literal['json', 'orjson', 'msgpack'] = 'json'
+    partitioner: Literal['murmur2', 'crc32'] = 'murmur2'
+    outbox_fsync: Literal['always', 'interval', 'never'] = 'always'
+    outbox_fsync_interval: float = 1
+    outbox_segment_size: int = 16777216
+    outbox_batch_size: int = 500
+    outbox_drain_interval: float = 1
+    inline_image_threshold: int = 65536
+    normalize_images: bool = False
+    normalize_max_dimension: int = 1024
+    normalize_quality: int = 85
+    normalize_max_pixels: int = 40000000
+    normalize_workers: int = 2
+    image_sweep_interval: float = 60
+    image_temp_retention: float = 3600
+    results_topic: str = 'faces-results'
+    consumer_group: str = 'auth-service-vectors'
+    consumer_batch_size: int = 500
+    consumer_flush_interval: float = 1
 
     @property
     def instance(self) -> str:
@@ -36,11 +66,22 @@ class PostgresSettings(BaseSettings):
     """Конфигурация postgres."""
 
     pg_dns: PostgresDsn = Field(
-        'postgresql+psycopg2://myuser:mysecretpassword@db:5432/mydatabase',
+        PostgresDsn(
+            'postgresql+psycopg2://myuser:mysecretpassword@db:5432/mydatabase',
+        ),
         validate_default=False,
     )
     pool_size: int = 10
     max_overflow: int = 20
+    replica_dns: list[PostgresDsn] = []
+    replica_health_check_interval: float = 5
+    replica_connect_timeout: int = 2
+    read_your_writes_window: float = 2
+    shard_dns: list[PostgresDsn] = []
+    reshard_batch_size: int = 1000
+    import_batch_size: int = 100000
+    report_page_size: int = 10000
+    slow_query_threshold: float = 0.5
 
 
 class MetricsSettings(BaseSettings):
@@ -63,6 +104,19 @@ class TracingSettings(BaseSettings):
     validation: bool = True
 
 
+class SimilaritySettings(BaseSettings):
+    """Конфигурация индекса эмбеддингов пользователей."""
+
+    snapshot_path: str = '/var/www/face_verification/index/users.idx'
+    refresh_batch_size: int = 10000
+    refresh_overlap: float = 60
+    ivf_path: str = '/var/www/face_verification/index/users.ivf'
+    ivf_lists: int = 1024
+    ivf_nprobe: int = 16
+    ivf_train_size: int = 100000
+    ivf_iterations: int = 10
+
+
 class RedisSettings(BaseSettings):
     """Конфигурация redis."""
 
@@ -80,6 +134,7 @@ class Settings(BaseSettings):
     metrics: MetricsSettings
     tracing: TracingSettings
     redis: RedisSettings
+    similarity: SimilaritySettings = Field(default_factory=SimilaritySettings)
 
     @classmethod
     def from_yaml(cls, config_path: str) -> Self:
@@ -101,3 +101,23 @@ class UnprocessableError(HTTPException):
         """
         self.status_code = status_code
         self.detail = detail
+
+
+class PayloadTooLargeError(HTTPException):
+    """Исключение возникающее при превышении размера загружаемого файла."""
+
+    def __init__(
+        self,
+        status_code: int = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail: str = 'Размер файла превышает допустимый',
+    ):
+        """
+        Метод инициализации PayloadTooLargeError.
+
+        :param status_code: Код ответа
+        :type status_code: int
+        :param detail: Сообщение
+        :type detail: str
+        """
+        self.status_code = status_code
+        self.detail = detail
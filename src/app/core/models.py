@@ -1,9 +1,9 @@
 import logging
-from collections import namedtuple
-from datetime import datetime, timedelta
-from typing import Any
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Any
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +13,10 @@ ValidationRules = namedtuple(
         'username_max_len',
         'password_max_len',
         'password_min_len',
+        'idempotency_key_max_len',
+        'transactions_batch_max_len',
+        'history_page_max_len',
+        'transaction_amount_max',
     ],
 )
 
@@ -20,9 +24,33 @@ validation_rules = ValidationRules(
     username_max_len=50,  # noqa: WPS 432 to avoid magic numbers
     password_max_len=100,
     password_min_len=8,
+    idempotency_key_max_len=100,
+    transactions_batch_max_len=1000,
+    history_page_max_len=1000,
+    transaction_amount_max=2 ** 31 - 1,  # noqa: WPS432 postgres integer
 )
 
 
+def naive_utc(moment: datetime) -> datetime:
+    """
+    Переводит время с часовым поясом в UTC без часового пояса.
+
+    В базе данных время хранится в timestamp без часового пояса,
+    время без часового пояса считается временем UTC.
+
+    :param moment: Время.
+    :type moment: datetime
+    :return: Время UTC без часового пояса.
+    :rtype: datetime
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+NaiveUTCDatetime = Annotated[datetime, AfterValidator(naive_utc)]
+
+
 class User(BaseModel):
     """Данные о пользователе."""
 
@@ -108,3 +136,94 @@ class UserCredentials(BaseModel):
         max_length=validation_rules.password_max_len,
         min_length=validation_rules.password_min_len,
     )
+
+
+class Transaction(BaseModel):
+    """Транзакция пользователя."""
+
+    username: str = Field(
+        title='Имя пользователя',
+        max_length=validation_rules.username_max_len,
+    )
+    idempotency_key: str = Field(
+        title='Ключ идемпотентности клиента',
+        min_length=1,
+        max_length=validation_rules.idempotency_key_max_len,
+    )
+    transaction_type: bool = Field(
+        title='Пополнение (true) или списание (false)',
+    )
+    amount: int = Field(
+        title='Сумма', gt=0, le=validation_rules.transaction_amount_max,
+    )
+    created_at: NaiveUTCDatetime | None = Field(
+        default=None, title='Время транзакции, по умолчанию время записи',
+    )
+
+
+def limit_user_totals(transactions: list[Transaction]) -> list[Transaction]:
+    """
+    Проверяет сумму транзакций каждого пользователя в пачке.
+
+    Изменение баланса пачкой не должно выходить за integer баланса
+    в базе данных, иначе запись всей пачки завершится ошибкой.
+
+    :param transactions: Транзакции пачки.
+    :type transactions: list[Transaction]
+    :return: Транзакции пачки без изменений.
+    :rtype: list[Transaction]
+    :raises ValueError: Если сумма транзакций пользователя больше
+        transaction_amount_max.
+    """
+    totals: Counter[str] = Counter()
+    for transaction in transactions:
+        totals[transaction.username] += transaction.amount
+    if max(totals.values()) > validation_rules.transaction_amount_max:
+        raise ValueError('user total in a batch exceeds balance limit')
+    return transactions
+
+
+class TransactionBatch(BaseModel):
+    """Пачка транзакций."""
+
+    transactions: Annotated[
+        list[Transaction], AfterValidator(limit_user_totals),
+    ] = Field(
+        min_length=1,
+        max_length=validation_rules.transactions_batch_max_len,
+    )
+
+
+class IngestResult(BaseModel):
+    """Результат записи пачки транзакций."""
+
+    accepted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+
+
+class TransactionRecord(BaseModel):
+    """Записанная транзакция пользователя."""
+
+    transaction_id: int
+    transaction_type: bool
+    amount: int
+    created_at: datetime
+
+
+class TransactionHistory(BaseModel):
+    """Страница истории транзакций пользователя."""
+
+    transactions: list[TransactionRecord]
+    next_cursor: str | None = Field(
+        default=None, title='Курсор следующей страницы, если она есть',
+    )
+
+
+class BalanceSummary(BaseModel):
+    """Итоги транзакций пользователя за период."""
+
+    transactions: int
+    deposits: int
+    withdrawals: int
+    balance_change: int
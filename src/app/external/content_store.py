@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+from contextlib import suppress
+from dataclasses import replace
+from pathlib import Path
+from time import time
+from uuid import uuid4
+
+from fastapi import UploadFile
+
+from app.external.images import ImageStorage, StoredImage
+from app.metrics.images import get_image_metrics
+
+logger = logging.getLogger(__name__)
+
+temp_directory = 'tmp'
+ack_suffix = '.ack'
+ref_separator = '-'
+fanout_width = 2
+
+
+def get_object_path(root: Path, digest: str, content_encoding: str) -> Path:
+    """
+    Возвращает путь к изображению по его хешу.
+
+    Файлы распределяются по двум уровням поддиректорий из первых
+    символов хеша, поэтому в одной директории остается немного файлов.
+
+    :param root: Корневая директория хранилища.
+    :type root: Path
+    :param digest: sha256 изображения.
+    :type digest: str
+    :param content_encoding: Сжатие файла: br или identity.
+    :type content_encoding: str
+    :return: Путь к файлу изображения.
+    :rtype: Path
+    """
+    first_level = digest[:fanout_width]
+    second_level = digest[fanout_width:fanout_width * 2]
+    return root / first_level / second_level / f'{digest}.{content_encoding}'
+
+
+def acknowledge_image(file_path: str) -> None:
+    """
+    Отмечает что изображение из сообщения обработано.
+
+    Вызывается потребителем сообщения, файл удаляет ImageSweeper.
+
+    :param file_path: Путь к файлу изображения из сообщения kafka.
+    :type file_path: str
+    """
+    Path(f'{file_path}{ack_suffix}').touch()
+
+
+class ContentAddressedStorage:
+    """
+    Хранилище изображений, адресуемых по содержимому.
+
+    Изображение записывается во временный файл, затем атомарно
+    связывается жесткой ссылкой с файлом, имя которого это sha256
+    изображения. Одинаковые изображения хранятся один раз. Каждое
+    сообщение получает собственную жесткую ссылку на файл, поэтому
+    файл удаляется только после подтверждения всех сообщений.
+    """
+
+    def __init__(self, root: Path, image_storage: ImageStorage) -> None:
+        """
+        Метод инициализации.
+
+        :param root: Корневая директория хранилища.
+        :type root: Path
+        :param image_storage: Запись изображений в файлы.
+        :type image_storage: ImageStorage
+        """
+        self.root = root
+        self.image_storage = image_storage
+        (self.root / temp_directory).mkdir(parents=True, exist_ok=True)
+
+    async def save(self, image: UploadFile) -> StoredImage:
+        """
+        Сохраняет изображение.
+
+        :param image: Изображение пользователя.
+        :type image: UploadFile
+        :return: Сохраненное изображение со ссылкой на файл для сообщения.
+        :rtype: StoredImage
+        """
+        temp_path = self.root / temp_directory / uuid4().hex
+        stored = await self.image_storage.save(str(temp_path), image)
+        ref_path = await asyncio.to_thread(self._link, temp_path, stored)
+        return replace(stored, file_path=str(ref_path))
+
+    def shutdown(self) -> None:
+        """Останавливает потоки записи на диск."""
+        self.image_storage.shutdown()
+
+    def _link(self, temp_path: Path, stored: StoredImage) -> Path:
+        object_path = get_object_path(
+            self.root, stored.digest, stored.content_encoding,
+        )
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        ref_path = object_path.with_name(
+            f'{object_path.name}{ref_separator}{uuid4().hex}',
+        )
+        while not ref_path.exists():
+            try:
+                os.link(temp_path, object_path)
+            except FileExistsError:
+                get_image_metrics().inc_deduplicated(stored.content_encoding)
+            with suppress(FileNotFoundError):  # removed by sweeper, retry
+                os.link(object_path, ref_path)
+        temp_path.unlink()
+        return ref_path
+
+
+class ImageSweeper:
+    """
+    Фоновое удаление изображений обработанных сообщений.
+
+    Удаляет ссылки с отметкой о подтверждении, а затем файл
+    изображения, на который не осталось ссылок. Также удаляет
+    временные файлы, оставшиеся после сбоя.
+    """
+
+    def __init__(self, root: Path, temp_retention: float) -> None:
+        """
+        Метод инициализации.
+
+        :param root: Корневая директория хранилища.
+        :type root: Path
+        :param temp_retention: Возраст временного файла для удаления, сек.
+        :type temp_retention: float
+        """
+        self.root = root
+        self.temp_retention = temp_retention
+
+    async def run(self, interval: float) -> None:
+        """
+        Удаляет изображения до отмены задачи.
+
+        :param interval: Пауза между проходами по хранилищу в секундах.
+        :type interval: float
+        """
+        while True:
+            try:
+                await self.sweep()
+            except Exception as exc:
+                logger.warning(f'image sweep failed, will retry: {exc}')
+            await asyncio.sleep(interval)
+
+    async def sweep(self) -> int:
+        """
+        Удаляет изображения обработанных сообщений.
+
+        :return: Количество удаленных файлов изображений.
+        :rtype: int
+        """
+        return await asyncio.to_thread(self._sweep)
+
+    def _sweep(self) -> int:
+        removed = sum(
+            _remove_acknowledged(marker)
+            for marker in self.root.glob(f'*/*/*{ack_suffix}')
+        )
+        expired = time() - self.temp_retention
+        for temp_path in (self.root / temp_directory).iterdir():
+            if temp_path.stat().st_mtime < expired:
+                temp_path.unlink(missing_ok=True)
+        logger.info(f'image sweep removed {removed} images')
+        return removed
+
+
+def _remove_acknowledged(marker: Path) -> bool:
+    ref_path = marker.with_name(marker.name.removesuffix(ack_suffix))
+    object_path = ref_path.with_name(
+        ref_path.name.rsplit(ref_separator, 1)[0],
+    )
+    ref_path.unlink(missing_ok=True)
+    marker.unlink()
+    with suppress(FileNotFoundError):
+        if object_path.stat().st_nlink == 1:
+            object_path.unlink()
+            return True
+    return False
@@ -0,0 +1,126 @@
+import io
+from typing import Sequence
+
+import numpy as np
+from PIL import Image, ImageOps
+
+embedding_side = 16
+embedding_dimension = embedding_side * embedding_side
+vector_dtype = np.dtype('<f4')
+
+
+def compute_placeholder_embedding(image_bytes: bytes) -> np.ndarray:
+    """
+    Вычисляет заглушку эмбеддинга по миниатюре изображения.
+
+    Это не эмбеддинг лица: модель верификации работает вне сервиса
+    и передает свой эмбеддинг в сообщении. Заглушка заполняет
+    users.vector для сообщений без эмбеддинга, и близость заглушек
+    говорит только о похожести миниатюр, а не о личности пользователя.
+
+    Изображение декодируется в оттенках серого, обрезается до квадрата
+    и уменьшается до embedding_side пикселей по стороне. Яркости
+    пикселей центрируются и нормируются, поэтому косинусная близость
+    заглушек не зависит от яркости и контраста снимка.
+
+    :param image_bytes: Изображение пользователя.
+    :type image_bytes: bytes
+    :return: Заглушка эмбеддинга float32 длины embedding_dimension.
+    :rtype: np.ndarray
+    """
+    size = (embedding_side, embedding_side)
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft('L', size)
+        thumbnail = ImageOps.fit(image.convert('L'), size)
+    pixels = np.asarray(thumbnail, dtype=vector_dtype).ravel()
+    return normalize_embedding(pixels - pixels.mean())
+
+
+def read_embedding(embedding: Sequence[float]) -> np.ndarray:
+    """
+    Проверяет и нормирует эмбеддинг из сообщения kafka.
+
+    :param embedding: Эмбеддинг модели верификации, вычисленный
+        вне сервиса.
+    :type embedding: Sequence[float]
+    :return: Эмбеддинг float32 длины embedding_dimension.
+    :rtype: np.ndarray
+    :raises ValueError: Если длина эмбеддинга неверна или есть не числа.
+    """
+    vector = np.asarray(embedding, dtype=vector_dtype)
+    if vector.shape != (embedding_dimension,):
+        raise ValueError(f'embedding shape {vector.shape} is not supported')
+    if not np.isfinite(vector).all():
+        raise ValueError('embedding is not finite')
+    return normalize_embedding(vector)
+
+
+def normalize_embedding(embedding: np.ndarray) -> np.ndarray:
+    """
+    Приводит эмбеддинг или строки матрицы эмбеддингов к единичной длине.
+
+    Нулевой эмбеддинг однотонного изображения остается нулевым.
+
+    :param embedding: Эмбеддинг или матрица эмбеддингов по строкам.
+    :type embedding: np.ndarray
+    :return: Эмбеддинги единичной длины.
+    :rtype: np.ndarray
+    """
+    norm = np.linalg.norm(embedding, axis=-1, keepdims=True)
+    normalized = np.zeros(embedding.shape, dtype=vector_dtype)
+    np.divide(embedding, norm, out=normalized, where=norm > 0)
+    return normalized
+
+
+def top_k(
+    scores: np.ndarray, labels: np.ndarray, limit: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Выбирает limit наибольших оценок в каждой строке.
+
+    Выбор делается за линейное время, сортируются только limit оценок.
+
+    :param scores: Оценки, строка на каждый запрос.
+    :type scores: np.ndarray
+    :param labels: Метки оценок той же формы или одна строка меток.
+    :type labels: np.ndarray
+    :param limit: Количество оценок.
+    :type limit: int
+    :return: Оценки и их метки по убыванию оценок, не больше limit в строке.
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    labels = np.broadcast_to(labels, scores.shape)
+    if scores.shape[1] > limit:
+        partitioned = np.argpartition(scores, -limit, axis=1)
+        top = partitioned[:, -limit:]
+        scores = np.take_along_axis(scores, top, axis=1)
+        labels = np.take_along_axis(labels, top, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return (
+        np.take_along_axis(scores, order, axis=1),
+        np.take_along_axis(labels, order, axis=1),
+    )
+
+
+def pack_embedding(embedding: np.ndarray) -> bytes:
+    """
+    Возвращает эмбеддинг в формате колонки users.vector.
+
+    :param embedding: Эмбеддинг.
+    :type embedding: np.ndarray
+    :return: Эмбеддинг float32 little-endian.
+    :rtype: bytes
+    """
+    return np.ascontiguousarray(embedding, dtype=vector_dtype).tobytes()
+
+
+def unpack_embedding(vector: bytes) -> np.ndarray:
+    """
+    Возвращает эмбеддинг из колонки users.vector без копирования.
+
+    :param vector: Значение колонки users.vector.
+    :type vector: bytes
+    :return: Эмбеддинг float32.
+    :rtype: np.ndarray
+    """
+    return np.frombuffer(vector, dtype=vector_dtype)
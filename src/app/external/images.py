@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import thread_time
+from typing import Any, BinaryIO, Callable, TypeVar
+
+import brotli
+from fastapi import UploadFile
+
+from app.core.errors import PayloadTooLargeError
+from app.metrics.images import get_image_metrics
+
+logger = logging.getLogger(__name__)
+
+ReturnType = TypeVar('ReturnType')
+
+brotli_encoding = 'br'
+identity_encoding = 'identity'
+compressed_signatures = (
+    b'\xff\xd8\xff',  # JPEG
+    b'\x89PNG\r\n\x1a\n',  # PNG
+)
+
+
+def is_compressed_format(head: bytes) -> bool:
+    """
+    Проверяет по сигнатуре что изображение уже сжато.
+
+    :param head: Первые байты изображения.
+    :type head: bytes
+    :return: True для JPEG и PNG, False в противном случае.
+    :rtype: bool
+    """
+    return head.startswith(compressed_signatures)
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    """Сохраненное изображение."""
+
+    file_path: str
+    digest: str
+    size: int
+    stored_size: int
+    content_encoding: str
+    cpu_time: float
+
+
+class ImageEncoder:
+    """
+    Запись изображения в файл со сжатием brotli.
+
+    Решение о сжатии принимается по первому фрагменту: JPEG и PNG
+    уже сжаты и записываются как есть. Сжатие выполняется потоково,
+    в памяти находится только состояние компрессора. Попутно
+    считается sha256 загруженного изображения.
+    """
+
+    def __init__(self, image_file: BinaryIO, quality: int | None) -> None:
+        """
+        Метод инициализации.
+
+        :param image_file: Файл изображения.
+        :type image_file: BinaryIO
+        :param quality: Качество сжатия brotli, None без сжатия.
+        :type quality: int | None
+        """
+        self.image_file = image_file
+        self.quality = quality
+        self.size = 0
+        self.stored_size = 0
+        self.cpu_time: float = 0
+        self._digest = hashlib.sha256()
+        self._compressor: brotli.Compressor | None = None
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Сжимает и записывает фрагмент изображения.
+
+        :param chunk: Фрагмент изображения.
+        :type chunk: bytes
+        """
+        if not self.size and self.quality is not None:
+            if not is_compressed_format(chunk):
+                self._compressor = brotli.Compressor(quality=self.quality)
+        self.size += len(chunk)
+        self._digest.update(chunk)
+        if self._compressor is None:
+            self._store(chunk)
+            return
+        self._store(self._compress(self._compressor.process, chunk))
+
+    def finish(self) -> StoredImage:
+        """
+        Дописывает конец сжатого потока.
+
+        :return: Сохраненное изображение.
+        :rtype: StoredImage
+        """
+        encoding = identity_encoding
+        if self._compressor is not None:
+            self._store(self._compress(self._compressor.finish))
+            encoding = brotli_encoding
+        return StoredImage(
+            file_path=self.image_file.name,
+            digest=self._digest.hexdigest(),
+            size=self.size,
+            stored_size=self.stored_size,
+            content_encoding=encoding,
+            cpu_time=self.cpu_time,
+        )
+
+    def _compress(self, function: Callable[..., bytes], *args: Any) -> bytes:
+        started = thread_time()
+        compressed = function(*args)
+        self.cpu_time += thread_time() - started
+        return compressed
+
+    def _store(self, chunk: bytes) -> None:
+        self.image_file.write(chunk)
+        self.stored_size += len(chunk)
+
+
+class ImageStorage:
+    """
+    Файловое хранилище изображений пользователей.
+
+    Изображение копируется из UploadFile фрагментами фиксированного
+    размера. Сжатие и запись на диск выполняются в ограниченном пуле
+    потоков, поэтому не блокируют event loop, а в памяти каждой
+    загрузки находится не больше одного фрагмента.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int,
+        max_upload_size: int,
+        max_writers: int,
+        compression_quality: int | None = None,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param chunk_size: Размер фрагмента в байтах.
+        :type chunk_size: int
+        :param max_upload_size: Максимальный размер изображения в байтах.
+        :type max_upload_size: int
+        :param max_writers: Количество потоков записи на диск.
+        :type max_writers: int
+        :param compression_quality: Качество сжатия brotli, None без сжатия.
+        :type compression_quality: int | None
+        """
+        self.chunk_size = chunk_size
+        self.max_upload_size = max_upload_size
+        self.compression_quality = compression_quality
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_writers, thread_name_prefix='image-writer',
+        )
+
+    async def save(self, file_path: str, image: UploadFile) -> StoredImage:
+        """
+        Сохраняет изображение в файл.
+
+        Частично записанный файл удаляется при любой ошибке.
+
+        :param file_path: Путь к файлу.
+        :type file_path: str
+        :param image: Изображение пользователя.
+        :type image: UploadFile
+        :return: Сохраненное изображение.
+        :rtype: StoredImage
+        :raises PayloadTooLargeError: При превышении размера изображения.
+        """
+        stored = await self._write(file_path, image)
+        if stored.size > self.max_upload_size:
+            await self._run(os.remove, file_path)
+            raise PayloadTooLargeError(
+                detail=f'image is larger than {self.max_upload_size}',
+            )
+        get_image_metrics().observe_image(
+            stored.content_encoding,
+            stored.size,
+            stored.stored_size,
+            stored.cpu_time,
+        )
+        return stored
+
+    def shutdown(self) -> None:
+        """Останавливает потоки записи на диск."""
+        self.executor.shutdown(wait=True)
+
+    async def _write(self, file_path: str, image: UploadFile) -> StoredImage:
+        image_file = await self._run(_open_for_write, file_path)
+        try:
+            return await self._copy(image, image_file)
+        except BaseException:  # noqa: WPS424 remove partial file on cancel too
+            await self._run(os.remove, file_path)
+            raise
+        finally:
+            await self._run(image_file.close)
+
+    async def _copy(
+        self, image: UploadFile, image_file: BinaryIO,
+    ) -> StoredImage:
+        encoder = ImageEncoder(image_file, self.compression_quality)
+        chunk = await image.read(self.chunk_size)
+        while chunk and encoder.size <= self.max_upload_size:
+            await self._run(encoder.write, chunk)
+            chunk = await image.read(self.chunk_size)
+        return await self._run(encoder.finish)
+
+    async def _run(
+        self, function: Callable[..., ReturnType], *args: Any,
+    ) -> ReturnType:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+
+def _open_for_write(file_path: str) -> BinaryIO:
+    return open(file_path, 'wb')  # noqa: WPS515 closed by the caller
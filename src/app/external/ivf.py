@@ -0,0 +1,327 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Any, Self
+
+import numpy as np
+
+from app.core.config.config import get_settings
+from app.external.embeddings import normalize_embedding, top_k, vector_dtype
+from app.external.similarity import Match, read_snapshot, search_chunk_rows
+from app.external.snapshots import (
+    create_snapshot,
+    get_aligned_size,
+    read_header,
+    read_names,
+    write_header,
+    write_names,
+    write_padding,
+)
+
+logger = logging.getLogger(__name__)
+
+ivf_magic = b'USRIVF01'
+offset_dtype = np.dtype('<i8')
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Находит ближайший центроид для каждого эмбеддинга.
+
+    :param vectors: Эмбеддинги единичной длины по строкам.
+    :type vectors: np.ndarray
+    :param centroids: Центроиды единичной длины по строкам.
+    :type centroids: np.ndarray
+    :return: Номер центроида для каждой строки.
+    :rtype: np.ndarray
+    """
+    lists = [
+        np.argmax(vectors[start:start + search_chunk_rows] @ centroids.T, 1)
+        for start in range(0, len(vectors), search_chunk_rows)
+    ]
+    return np.concatenate([np.empty(0, dtype=np.int64), *lists])
+
+
+def train_centroids(
+    vectors: np.ndarray,
+    lists_count: int,
+    iterations: int,
+    sample_size: int,
+    seed: int | None = None,
+) -> np.ndarray:
+    """
+    Обучает центроиды инвертированных списков сферическим k-means.
+
+    Обучение идет на случайной выборке эмбеддингов. Опустевший
+    список получает случайный эмбеддинг выборки в качестве центроида.
+
+    :param vectors: Эмбеддинги единичной длины по строкам.
+    :type vectors: np.ndarray
+    :param lists_count: Количество инвертированных списков.
+    :type lists_count: int
+    :param iterations: Количество итераций k-means.
+    :type iterations: int
+    :param sample_size: Максимальный размер выборки.
+    :type sample_size: int
+    :param seed: Начальное значение генератора случайных чисел.
+    :type seed: int | None
+    :return: Центроиды единичной длины по строкам.
+    :rtype: np.ndarray
+    :raises ValueError: Если эмбеддингов меньше, чем списков.
+    """
+    if len(vectors) < lists_count:
+        raise ValueError(f'not enough vectors for {lists_count} lists')
+    rng = np.random.default_rng(seed)
+    sample_rows = rng.choice(
+        len(vectors), min(sample_size, len(vectors)), replace=False,
+    )
+    sample = np.asarray(vectors[np.sort(sample_rows)], dtype=vector_dtype)
+    centroids = sample[rng.choice(len(sample), lists_count, replace=False)]
+    for _ in range(iterations):
+        labels = assign_lists(sample, centroids)
+        centroids = _update_centroids(sample, labels, lists_count, rng)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Приближенный индекс эмбеддингов с инвертированными списками (IVF).
+
+    Каждый эмбеддинг относится к ближайшему центроиду, эмбеддинги
+    одного списка лежат в матрице подряд. Поиск сравнивает запрос
+    с центроидами и перебирает только nprobe ближайших списков, поэтому
+    nprobe задает баланс между полнотой и временем ответа. Индекс
+    не изменяется после построения и отображается из снимка в память.
+
+    Attributes:
+        centroids: np.ndarray - центроиды списков по строкам.
+        offsets: np.ndarray - начало каждого списка в матрице и ее размер.
+        vectors: np.ndarray - эмбеддинги, упорядоченные по спискам.
+        usernames: list[str] - имена пользователей строк матрицы.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        vectors: np.ndarray,
+        usernames: list[str],
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param centroids: Центроиды списков по строкам.
+        :type centroids: np.ndarray
+        :param offsets: Начало каждого списка в матрице и ее размер.
+        :type offsets: np.ndarray
+        :param vectors: Эмбеддинги, упорядоченные по спискам.
+        :type vectors: np.ndarray
+        :param usernames: Имена пользователей строк матрицы.
+        :type usernames: list[str]
+        """
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.usernames = usernames
+
+    @classmethod
+    def build(
+        cls, centroids: np.ndarray, vectors: np.ndarray, usernames: list[str],
+    ) -> Self:
+        """
+        Распределяет эмбеддинги по спискам обученных центроидов.
+
+        :param centroids: Центроиды единичной длины по строкам.
+        :type centroids: np.ndarray
+        :param vectors: Эмбеддинги единичной длины по строкам.
+        :type vectors: np.ndarray
+        :param usernames: Имена пользователей строк.
+        :type usernames: list[str]
+        :return: Индекс.
+        :rtype: Self
+        """
+        labels = assign_lists(vectors, centroids)
+        order = np.argsort(labels, kind='stable')
+        sizes = np.bincount(labels, minlength=len(centroids))
+        return cls(
+            np.asarray(centroids, dtype=vector_dtype),
+            np.concatenate(([0], np.cumsum(sizes))).astype(offset_dtype),
+            np.asarray(vectors[order], dtype=vector_dtype),
+            [usernames[row] for row in order],
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """
+        Загружает индекс из снимка, отображая матрицы в память.
+
+        :param path: Путь к снимку.
+        :type path: Path
+        :return: Индекс.
+        :rtype: Self
+        """
+        with open(path, 'rb') as snapshot:
+            header = read_header(snapshot, ivf_magic)
+            arrays = _map_arrays(path, header)
+            snapshot.seek(header['data_offset'] + sum(
+                get_aligned_size(array.nbytes) for array in arrays
+            ))
+            usernames = read_names(snapshot)
+        return cls(arrays[0], arrays[1], arrays[2], usernames)
+
+    def save(self, path: Path) -> None:
+        """
+        Сохраняет снимок индекса.
+
+        Матрицы выравниваются в файле, чтобы отображаться в память.
+        Снимок заменяется атомарно.
+
+        :param path: Путь к снимку.
+        :type path: Path
+        """
+        with create_snapshot(path) as snapshot:
+            write_header(snapshot, ivf_magic, {
+                'dimension': self.centroids.shape[1],
+                'lists': len(self.centroids),
+                'count': len(self.vectors),
+            })
+            for array in (self.centroids, self.offsets, self.vectors):
+                snapshot.write(np.ascontiguousarray(array).data)
+                write_padding(snapshot)
+            write_names(snapshot, self.usernames)
+        logger.info(f'ivf index snapshot saved to {path}')
+
+    def search(
+        self, queries: np.ndarray, limit: int, nprobe: int,
+    ) -> list[list[Match]]:
+        """
+        Ищет limit близких пользователей в nprobe ближайших списках.
+
+        Каждый список перебирается одним умножением матриц для всех
+        запросов пачки, которые его выбрали, а лучшие кандидаты
+        из каждого списка объединяются один раз в конце.
+
+        :param queries: Эмбеддинги запросов по строкам или один эмбеддинг.
+        :type queries: np.ndarray
+        :param limit: Количество пользователей в ответе.
+        :type limit: int
+        :param nprobe: Количество просматриваемых списков.
+        :type nprobe: int
+        :return: Имена пользователей и косинусная близость по убыванию.
+        :rtype: list[list[Match]]
+        """
+        queries = normalize_embedding(np.atleast_2d(queries))
+        probes = top_k(
+            queries @ self.centroids.T, np.arange(len(self.centroids)), nprobe,
+        )[1]
+        top_scores, top_rows = top_k(
+            *self._scan_lists(queries, probes, limit), limit,
+        )
+        return [
+            _get_matches(self.usernames, *top)
+            for top in zip(top_scores, top_rows)
+        ]
+
+    def _scan_lists(
+        self, queries: np.ndarray, probes: np.ndarray, limit: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        found = (
+            np.full((probes.size, limit), -np.inf, dtype=vector_dtype),
+            np.full((probes.size, limit), -1, dtype=offset_dtype),
+        )
+        probe_queries = np.repeat(queries, probes.shape[1], axis=0)
+        order = np.argsort(probes, axis=None, kind='stable')
+        boundaries = np.flatnonzero(np.diff(probes.flat[order])) + 1
+        for positions in np.split(order, boundaries):
+            self._scan_list(probe_queries, probes, positions, found)
+        return (
+            found[0].reshape(len(queries), -1),
+            found[1].reshape(len(queries), -1),
+        )
+
+    def _scan_list(
+        self,
+        probe_queries: np.ndarray,
+        probes: np.ndarray,
+        positions: np.ndarray,
+        found: tuple[np.ndarray, np.ndarray],
+    ) -> None:
+        list_index = probes.flat[positions[:1]]
+        bounds = self.offsets[np.append(list_index, list_index + 1)]
+        scores, rows = top_k(
+            probe_queries[positions] @ self.vectors[slice(*bounds)].T,
+            np.arange(*bounds),
+            found[0].shape[1],
+        )
+        columns = np.arange(scores.shape[1])
+        found[0][positions[:, None], columns] = scores
+        found[1][positions[:, None], columns] = rows
+
+
+def main() -> None:
+    """Строит снимок IVF индекса из снимка точного индекса."""
+    parser = argparse.ArgumentParser(description='Построение IVF индекса.')
+    parser.add_argument('--snapshot', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+    settings = get_settings().similarity
+    vectors, usernames = read_snapshot(
+        Path(args.snapshot or settings.snapshot_path),
+    )[:2]
+    IVFIndex.build(
+        train_centroids(
+            vectors,
+            lists_count=settings.ivf_lists,
+            iterations=settings.ivf_iterations,
+            sample_size=settings.ivf_train_size,
+        ),
+        vectors,
+        usernames,
+    ).save(Path(args.output or settings.ivf_path))
+
+
+def _update_centroids(
+    sample: np.ndarray,
+    labels: np.ndarray,
+    lists_count: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    order = np.argsort(labels, kind='stable')
+    sizes = np.bincount(labels, minlength=lists_count)
+    is_filled = sizes > 0
+    centroids = sample[rng.choice(len(sample), lists_count, replace=False)]
+    centroids[is_filled] = normalize_embedding(np.add.reduceat(
+        sample[order], (np.cumsum(sizes) - sizes)[is_filled],
+    ))
+    return centroids
+
+
+def _map_arrays(path: Path, header: dict[str, Any]) -> list[np.ndarray]:
+    sections = (
+        ((header['lists'], header['dimension']), vector_dtype),
+        ((header['lists'] + 1,), offset_dtype),
+        ((header['count'], header['dimension']), vector_dtype),
+    )
+    arrays: list[np.ndarray] = []
+    offset = header['data_offset']
+    for shape, dtype in sections:
+        arrays.append(np.memmap(
+            path, dtype=dtype, mode='r', offset=offset, shape=shape,
+        ))
+        offset += get_aligned_size(arrays[-1].nbytes)
+    return arrays
+
+
+def _get_matches(
+    usernames: list[str], scores: np.ndarray, rows: np.ndarray,
+) -> list[Match]:
+    return [
+        (usernames[row], float(score))
+        for score, row in zip(scores, rows)
+        if row >= 0
+    ]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
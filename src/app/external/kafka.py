@@ -1,62 +1,96 @@
 import asyncio
-import json
 import logging
-from datetime import datetime
+import random
+from contextlib import suppress
 from pathlib import Path
 
 from aiokafka import AIOKafkaProducer
 from fastapi import UploadFile
 
 from app.core.config.config import get_settings
+from app.core.errors import PayloadTooLargeError
+from app.external.outbox import Outbox, OutboxDrainer
+from app.external.partitioning import get_partitioner
+from app.external.payloads import PayloadBuilder, get_payload_headers
+from app.external.publisher import Publisher
+from app.external.serialization import get_compression_type, get_serializer
+from app.metrics.kafka import get_kafka_metrics
 
 logger = logging.getLogger(__name__)
 
 
-class KafkaProducer:  # noqa: WPS214 for now 8 methods, will extract in future
+class KafkaProducer:
     """Очередь сообщений kafka."""
 
     def __init__(self) -> None:
         """Метод инициализации."""
+        settings = get_settings().kafka
+        self.serializer = get_serializer(settings.serializer)
         self.producer = AIOKafkaProducer(
-            bootstrap_servers=get_settings().kafka.instance,
-            value_serializer=self.serializer,
-            compression_type='gzip',
+            bootstrap_servers=settings.instance,
+            value_serializer=self.serializer.dumps,
+            compression_type=get_compression_type(settings.compression),
+            partitioner=get_partitioner(settings.partitioner),
+            linger_ms=settings.linger_ms,
+            max_batch_size=settings.batch_size,
+            acks=settings.acks,
+        )
+        self.publisher = Publisher(
+            self.producer,
+            settings.topics,
+            settings.max_in_flight,
+            headers=self.serializer.headers,
         )
         self._init_storage_path()
+        self.outbox = Outbox(
+            Path(settings.storage_path) / 'outbox',
+            segment_size=settings.outbox_segment_size,
+            fsync=settings.outbox_fsync,
+        )
+        self.drainer = OutboxDrainer(
+            self.outbox,
+            self.publisher,
+            batch_size=settings.outbox_batch_size,
+            get_headers=get_payload_headers,
+        )
+        self._tasks: list[asyncio.Task[None]] = []
+        self._is_connected = False
+        self.payload_builder = PayloadBuilder()
 
     async def upload_image(self, username: str, image: UploadFile) -> None:
         """
         Функция для отправки изображения в kafka.
 
-        Сохраняет изображение в файловую систему.
-        Передает путь к файлу в сообщение kafka.
+        Если включена нормализация, изображение сначала уменьшается
+        и перекодируется в JPEG в пуле процессов.
+        Изображение не больше inline_image_threshold передается внутри
+        сообщения в сжатом виде. Большее изображение сохраняется
+        в файловую систему фрагментами, а сообщение содержит путь к файлу.
+        Файл загрузки закрывается. Сообщение записывается в локальный
+        журнал, откуда его отправляет в kafka фоновый drainer. Пока
+        kafka недоступна, сообщения копятся в журнале.
 
         :param username: Имя пользователя.
         :type username: str
         :param image: Изображение пользователя.
         :type image: UploadFile
         """
-        file_path = self._get_unique_file_path(username)
-        message = {
-            'username': username,
-            'file_path': file_path,
-        }
-        file_contents = await image.read()
         try:
-            with open(file_path, 'wb') as image_file:
-                image_file.write(file_contents)
-                logger.info(f'{file_path} saved successfully')
+            message = await self.payload_builder.build(username, image)
+        except PayloadTooLargeError as size_err:
+            logger.warning(f'image of {username} not saved, {size_err.detail}')
+            return
         except Exception as file_err:
-            logger.error(f'{file_path} not saved, {file_err.args}')
+            logger.error(f'image of {username} not saved, {file_err.args}')
             return
+        finally:
+            await image.close()
         try:
-            await self.producer.send_and_wait(
-                get_settings().kafka.topics, message,
-            )
-        except Exception as kafka_err:
-            logger.error(f'{message} not sent, {kafka_err.args}')
+            await self.outbox.append(message)
+        except Exception as outbox_err:
+            logger.error(f'message of {username} not saved, {outbox_err.args}')
             return
-        logger.info(f'{message} sent successfully')
+        logger.info(f'message of {username} saved to outbox')
 
     async def check_kafka(self) -> bool:
         """
@@ -68,6 +102,8 @@ class KafkaProducer:  # noqa: WPS214 for now 8 methods, will extract in future
         :return: True если kafka доступна, False в противном случае.
         :rtype: bool
         """
+        if not self._is_connected:
+            return False
         try:
             await self.producer.client.fetch_all_metadata()
         except Exception as exc:
@@ -76,31 +112,66 @@ class KafkaProducer:  # noqa: WPS214 for now 8 methods, will extract in future
             return True
         return False
 
-    def serializer(self, value: dict[str, str]) -> bytes:  # noqa: WPS110, E501 should be by docs
+    async def start(self) -> None:
         """
-        Сериализирует сообщение перед отправкой в kafka.
+        Запускает подключение к kafka и фоновые задачи.
 
-        :param value: Строковое представление сообщения.
-        :type value: dict[str, str]
-        :return: Сериализированное сообщение.
-        :rtype: bytes
+        Не ждет подключения к kafka, поэтому сервис запускается
+        и обслуживает запросы без брокера.
         """
-        return json.dumps(value).encode()
+        settings = get_settings().kafka
+        self._tasks = [
+            asyncio.create_task(
+                self._run_drainer(settings.outbox_drain_interval),
+            ),
+            asyncio.create_task(
+                self.payload_builder.sweeper.run(settings.image_sweep_interval),
+            ),
+            asyncio.create_task(
+                self.outbox.run_sync(settings.outbox_fsync_interval),
+            ),
+        ]
 
-    async def start(self) -> None:
-        """Запускает producer."""
-        while True:
+    async def stop(self) -> None:
+        """
+        Останавливает producer.
+
+        Перед остановкой пытается отправить сообщения из журнала,
+        неотправленные сообщения остаются в журнале до следующего запуска.
+        """
+        for task in self._tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if self._is_connected:
+            try:
+                await self.drainer.drain()
+            except Exception as exc:
+                logger.warning(f'outbox is not drained on stop: {exc}')
+        await self.producer.stop()
+        await self.outbox.close()
+        self.payload_builder.shutdown()
+
+    async def _run_drainer(self, interval: float) -> None:
+        settings = get_settings().kafka
+        metrics = get_kafka_metrics()
+        metrics.observe_connected(settings.topics, is_connected=False)
+        backoff = settings.connect_backoff
+        while not self._is_connected:
             try:
                 await self.producer.start()
             except Exception as exc:
-                logger.warning('Waiting for Kafka to start:', exc_info=exc)
-                await asyncio.sleep(10)
+                delay = backoff * random.uniform(0.5, 1)  # noqa: S311
+                logger.warning(
+                    f'kafka is not available, retry in {delay:.1f}s: {exc}',
+                )
+                await asyncio.sleep(delay)
+                backoff = min(backoff * 2, settings.connect_backoff_max)
             else:
-                break
-
-    async def stop(self) -> None:
-        """Останавливает producer."""
-        await self.producer.stop()
+                self._is_connected = True
+        metrics.observe_connected(settings.topics, is_connected=True)
+        logger.info('kafka producer is connected')
+        await self.drainer.run(interval)
 
     def _init_storage_path(self) -> None:
         path = Path(get_settings().kafka.storage_path)
@@ -108,10 +179,3 @@ class KafkaProducer:  # noqa: WPS214 for now 8 methods, will extract in future
             path.mkdir(parents=True, exist_ok=True)
         except FileExistsError:
             raise OSError(f'{path} is already exists and not a directory')
-
-    def _get_unique_file_path(self, username) -> str:
-        """Создает уникальный путь к файлу пользователя."""
-        file_upload_timestamp = datetime.now().isoformat()
-        filename = f'{username}-{file_upload_timestamp}'
-        file_storage_path = get_settings().kafka.storage_path
-        return f'{file_storage_path}/{filename}'
@@ -0,0 +1,141 @@
+import asyncio
+import io
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from PIL import Image, ImageOps
+
+from app.core.errors import PayloadTooLargeError
+
+logger = logging.getLogger(__name__)
+
+normalized_format = 'JPEG'
+normalized_mode = 'RGB'
+temp_prefix = 'normalize-'
+
+
+def normalize_image(
+    image_path: str, max_dimension: int, quality: int, max_pixels: int,
+) -> bytes:
+    """
+    Уменьшает изображение и перекодирует его в JPEG.
+
+    Размер изображения проверяется по заголовку до декодирования,
+    при превышении max_pixels выбрасывается DecompressionBombError.
+    JPEG декодируется сразу в уменьшенном масштабе, а поворот
+    и уменьшение выполняются на месте, поэтому в памяти не находится
+    изображение полного разрешения и его копии. Файл читается
+    по мере декодирования.
+
+    :param image_path: Путь к файлу изображения пользователя.
+    :type image_path: str
+    :param max_dimension: Максимальная ширина и высота в пикселях.
+    :type max_dimension: int
+    :param quality: Качество JPEG от 1 до 95.
+    :type quality: int
+    :param max_pixels: Максимальное количество пикселей изображения.
+    :type max_pixels: int
+    :return: Изображение в JPEG.
+    :rtype: bytes
+    """
+    output = io.BytesIO()
+    with Image.open(image_path) as image:
+        _check_pixels(image, max_pixels)
+        image.draft(normalized_mode, (max_dimension, max_dimension))
+        ImageOps.exif_transpose(image, in_place=True)
+        image.thumbnail((max_dimension, max_dimension))
+        image.convert(normalized_mode).save(
+            output, normalized_format, quality=quality,
+        )
+    return output.getvalue()
+
+
+def _copy_to_file(image_file: BinaryIO) -> str:
+    temp_file = NamedTemporaryFile(prefix=temp_prefix, delete=False)
+    with temp_file:
+        shutil.copyfileobj(image_file, temp_file)
+    return temp_file.name
+
+
+def _check_pixels(image: Image.Image, max_pixels: int) -> None:
+    width, height = image.size
+    if width * height > max_pixels:
+        raise Image.DecompressionBombError(
+            f'image is {width}x{height}, limit is {max_pixels} pixels',
+        )
+
+
+class ImageNormalizer:
+    """
+    Нормализация изображений пользователей перед сохранением.
+
+    Декодирование, уменьшение и кодирование нагружают CPU,
+    поэтому выполняются в пуле процессов и не блокируют event loop
+    и другие запросы. Процессы запускаются через spawn, так как
+    fork многопоточного процесса небезопасен. Загрузка передается
+    процессу через временный файл, в который копируется фрагментами,
+    поэтому не читается в память целиком.
+    """
+
+    def __init__(
+        self, max_dimension: int, quality: int, max_pixels: int, workers: int,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param max_dimension: Максимальная ширина и высота в пикселях.
+        :type max_dimension: int
+        :param quality: Качество JPEG от 1 до 95.
+        :type quality: int
+        :param max_pixels: Максимальное количество пикселей изображения.
+        :type max_pixels: int
+        :param workers: Количество процессов нормализации.
+        :type workers: int
+        """
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.max_pixels = max_pixels
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context('spawn'),
+        )
+
+    async def normalize(self, image: UploadFile) -> UploadFile:
+        """
+        Нормализует изображение пользователя.
+
+        :param image: Изображение пользователя.
+        :type image: UploadFile
+        :return: Изображение в JPEG не больше max_dimension.
+        :rtype: UploadFile
+        :raises PayloadTooLargeError: Если пикселей больше max_pixels.
+        """
+        loop = asyncio.get_running_loop()
+        image_path = await asyncio.to_thread(_copy_to_file, image.file)
+        try:
+            normalized = await loop.run_in_executor(
+                self.executor,
+                normalize_image,
+                image_path,
+                self.max_dimension,
+                self.quality,
+                self.max_pixels,
+            )
+        except Image.DecompressionBombError as pixels_err:
+            raise PayloadTooLargeError(detail=str(pixels_err)) from pixels_err
+        finally:
+            await asyncio.to_thread(os.remove, image_path)
+        return UploadFile(
+            io.BytesIO(normalized),
+            size=len(normalized),
+            filename=image.filename,
+        )
+
+    def shutdown(self) -> None:
+        """Останавливает процессы нормализации."""
+        self.executor.shutdown(wait=True)
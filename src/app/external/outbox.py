@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterator, TypeVar
+
+from app.external.publisher import Publisher
+from app.external.serialization import Headers
+
+logger = logging.getLogger(__name__)
+
+Message = dict[str, Any]
+Record = tuple[int, Message]
+ReturnType = TypeVar('ReturnType')
+
+record_header = struct.Struct('>II')
+segment_prefix = 'segment-'
+segment_suffix = '.log'
+checkpoint_suffix = '.checkpoint'
+temporary_suffix = '.tmp'
+fsync_always = 'always'
+fsync_interval = 'interval'
+key_field = 'username'
+
+
+class Outbox:  # noqa: WPS214 public api and its writer thread parts
+    """
+    Локальный журнал сообщений для kafka.
+
+    Сообщения дописываются в конец файла сегмента в одном потоке,
+    поэтому порядок записи совпадает с порядком вызовов append.
+    Запись в файле: длина, crc32 и сообщение в JSON. Недописанная
+    запись в конце сегмента после сбоя пропускается при чтении.
+
+    Политика fsync: always после каждой записи, interval в фоновой
+    задаче run_sync независимо от доступности kafka, never полагается
+    на операционную систему.
+    """
+
+    def __init__(self, path: Path, segment_size: int, fsync: str) -> None:
+        """
+        Метод инициализации.
+
+        :param path: Директория сегментов.
+        :type path: Path
+        :param segment_size: Размер сегмента, после которого начинается новый.
+        :type segment_size: int
+        :param fsync: Политика fsync: always, interval или never.
+        :type fsync: str
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._active: BinaryIO | None = None
+        self._sequence = len(self._list_segments()) and _get_sequence(
+            self._list_segments()[-1],
+        )
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='outbox-writer',
+        )
+
+    async def append(self, message: Message) -> None:
+        """
+        Дописывает сообщение в журнал.
+
+        :param message: Сообщение.
+        :type message: Message
+        """
+        await self._run(self._append, message)
+
+    async def seal(self) -> list[Path]:
+        """
+        Закрывает текущий сегмент и возвращает закрытые сегменты.
+
+        :return: Закрытые сегменты от старых к новым.
+        :rtype: list[Path]
+        """
+        return await self._run(self._seal)
+
+    async def sync(self) -> None:
+        """Выполняет fsync текущего сегмента при политике interval."""
+        if self.fsync == fsync_interval:
+            await self._run(self._sync)
+
+    async def run_sync(self, interval: float) -> None:
+        """
+        Выполняет fsync текущего сегмента до отмены задачи.
+
+        :param interval: Период fsync в секундах.
+        :type interval: float
+        """
+        while self.fsync == fsync_interval:
+            await asyncio.sleep(interval)
+            await self.sync()
+
+    async def close(self) -> None:
+        """Закрывает текущий сегмент и поток записи."""
+        await self._run(self._roll)
+        self._writer.shutdown(wait=True)
+
+    def _append(self, message: Message) -> None:
+        if self._active is None:
+            self._sequence += 1
+            self._active = open(  # noqa: WPS515 closed on roll
+                self._get_segment(self._sequence), 'ab',
+            )
+        payload = json.dumps(message).encode()
+        self._active.write(
+            record_header.pack(len(payload), zlib.crc32(payload)) + payload,
+        )
+        self._active.flush()
+        if self.fsync == fsync_always:
+            os.fsync(self._active.fileno())
+        if self._active.tell() >= self.segment_size:
+            self._roll()
+
+    def _roll(self) -> None:
+        if self._active is None:
+            return
+        os.fsync(self._active.fileno())
+        self._active.close()
+        self._active = None
+
+    def _seal(self) -> list[Path]:
+        self._roll()
+        return self._list_segments()
+
+    def _sync(self) -> None:
+        if self._active is not None:
+            os.fsync(self._active.fileno())
+
+    def _get_segment(self, sequence: int) -> Path:
+        return self.path / f'{segment_prefix}{sequence:020d}{segment_suffix}'
+
+    def _list_segments(self) -> list[Path]:
+        active = None if self._active is None else Path(self._active.name)
+        return sorted(
+            segment
+            for segment in self.path.glob(f'{segment_prefix}*{segment_suffix}')
+            if segment != active
+        )
+
+    async def _run(
+        self, function: Callable[..., ReturnType], *args: Any,
+    ) -> ReturnType:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, function, *args)
+
+
+class OutboxDrainer:
+    """
+    Фоновая отправка сообщений из журнала в kafka.
+
+    Сегменты отправляются от старых к новым пачками. Пачка
+    отправляется только после подтверждения предыдущей. Ключ сообщения
+    это имя пользователя, поэтому все сообщения пользователя попадают
+    в одну партицию в порядке записи. Доставка at-least-once.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        publisher: Publisher,
+        batch_size: int,
+        get_headers: Callable[[Message], Headers] | None = None,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param outbox: Журнал сообщений.
+        :type outbox: Outbox
+        :param publisher: Публикация сообщений в kafka.
+        :type publisher: Publisher
+        :param batch_size: Максимальный размер пачки.
+        :type batch_size: int
+        :param get_headers: Функция, возвращающая заголовки сообщения.
+        :type get_headers: Callable[[Message], Headers] | None
+        """
+        self.outbox = outbox
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.get_headers = get_headers or (lambda message: [])
+
+    async def run(self, interval: float) -> None:
+        """
+        Отправляет сообщения из журнала до отмены задачи.
+
+        :param interval: Пауза между проходами по журналу в секундах.
+        :type interval: float
+        """
+        while True:
+            try:
+                await self.drain()
+            except Exception as exc:
+                logger.warning(f'outbox drain failed, will retry: {exc}')
+            await asyncio.sleep(interval)
+
+    async def drain(self) -> int:
+        """
+        Отправляет все сообщения из журнала.
+
+        :return: Количество отправленных сообщений.
+        :rtype: int
+        """
+        segments = await self.outbox.seal()
+        return sum([
+            await self._drain_segment(segment) for segment in segments
+        ])
+
+    async def _drain_segment(self, segment: Path) -> int:
+        records = await asyncio.to_thread(read_segment, segment)
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            await self._publish([message for _, message in batch])
+            last_offset, _ = batch[-1]
+            commit_segment(segment, last_offset)
+        commit_segment(segment, None)
+        return len(records)
+
+    async def _publish(self, messages: list[Message]) -> None:
+        deliveries = [
+            await self.publisher.publish(
+                message, self.get_headers(message), key=_get_key(message),
+            )
+            for message in messages
+        ]
+        await asyncio.gather(*deliveries)
+
+
+def read_segment(segment: Path) -> list[Record]:
+    """
+    Читает неотправленные сообщения сегмента.
+
+    Если чекпоинт поврежден, сегмент читается с начала,
+    то есть сообщения будут отправлены повторно.
+
+    :param segment: Путь к сегменту.
+    :type segment: Path
+    :return: Смещения после каждой записи и сообщения.
+    :rtype: list[Record]
+    """
+    checkpoint = segment.with_suffix(checkpoint_suffix)
+    try:
+        start = int(checkpoint.read_text()) if checkpoint.exists() else 0
+    except ValueError:
+        logger.warning(f'outbox {checkpoint} is unreadable, resending segment')
+        start = 0
+    with open(segment, 'rb') as segment_file:
+        segment_file.seek(start)
+        return list(_read_records(segment_file))
+
+
+def commit_segment(segment: Path, offset: int | None) -> None:
+    """
+    Запоминает смещение отправленных сообщений сегмента.
+
+    Чекпоинт записывается во временный файл, который после fsync
+    атомарно заменяет прежний, поэтому сбой не оставляет пустой
+    или недописанный чекпоинт. Полностью отправленный сегмент
+    удаляется вместе с чекпоинтом.
+
+    :param segment: Путь к сегменту.
+    :type segment: Path
+    :param offset: Смещение после последней отправленной записи,
+        None если отправлен весь сегмент.
+    :type offset: int | None
+    """
+    checkpoint = segment.with_suffix(checkpoint_suffix)
+    if offset is not None:
+        temporary = checkpoint.with_name(f'{checkpoint.name}{temporary_suffix}')
+        with open(temporary, 'w') as checkpoint_file:
+            checkpoint_file.write(str(offset))
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary, checkpoint)
+        return
+    segment.unlink()
+    checkpoint.unlink(missing_ok=True)
+
+
+def _get_sequence(segment: Path) -> int:
+    return int(segment.stem.removeprefix(segment_prefix))
+
+
+def _read_records(segment_file: BinaryIO) -> Iterator[Record]:
+    while True:
+        header = segment_file.read(record_header.size)
+        if len(header) < record_header.size:
+            return
+        length, checksum = record_header.unpack(header)
+        payload = segment_file.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            logger.warning(f'outbox {segment_file.name} has a torn record')
+            return
+        yield segment_file.tell(), json.loads(payload)
+
+
+def _get_key(message: Message) -> bytes | None:
+    key = message.get(key_field)
+    return key.encode() if key else None
@@ -0,0 +1,54 @@
+import random
+import zlib
+from typing import Callable, Optional
+
+from aiokafka.partitioner import DefaultPartitioner
+
+Partitions = list[int]
+Partitioner = Callable[[Optional[bytes], Partitions, Partitions], int]
+
+
+def crc32_partitioner(
+    key: bytes | None, all_partitions: Partitions, available: Partitions,
+) -> int:
+    """
+    Выбирает партицию по crc32 ключа.
+
+    Совпадает с партиционером consistent_random librdkafka, поэтому
+    сообщения одного пользователя попадают в ту же партицию, что и
+    у producer на librdkafka. Сообщение без ключа попадает в случайную
+    доступную партицию.
+
+    :param key: Ключ сообщения.
+    :type key: bytes | None
+    :param all_partitions: Все партиции топика по возрастанию.
+    :type all_partitions: Partitions
+    :param available: Доступные партиции.
+    :type available: Partitions
+    :return: Номер партиции.
+    :rtype: int
+    """
+    if key is None:
+        return random.choice(available or all_partitions)  # noqa: S311
+    return all_partitions[zlib.crc32(key) % len(all_partitions)]
+
+
+partitioners: dict[str, Partitioner] = {
+    'murmur2': DefaultPartitioner(),
+    'crc32': crc32_partitioner,
+}
+
+
+def get_partitioner(name: str) -> Partitioner:
+    """
+    Возвращает партиционер по имени из настроек.
+
+    murmur2 совпадает с партиционером Java клиента kafka,
+    crc32 с партиционером librdkafka.
+
+    :param name: Имя партиционера: murmur2 или crc32.
+    :type name: str
+    :return: Партиционер для AIOKafkaProducer.
+    :rtype: Partitioner
+    """
+    return partitioners[name]
@@ -0,0 +1,205 @@
+import asyncio
+import base64
+import logging
+from enum import StrEnum
+from pathlib import Path
+from typing import Any
+
+import brotli
+from fastapi import UploadFile
+
+from app.core.config.config import get_settings
+from app.core.errors import PayloadTooLargeError
+from app.external.content_store import ContentAddressedStorage, ImageSweeper
+from app.external.images import (
+    ImageStorage,
+    brotli_encoding,
+    identity_encoding,
+    is_compressed_format,
+)
+from app.external.normalization import ImageNormalizer
+from app.external.serialization import Headers
+
+logger = logging.getLogger(__name__)
+
+payload_mode_header = 'payload-mode'
+
+
+class PayloadMode(StrEnum):
+    """Способ передачи изображения в сообщении kafka."""
+
+    inline = 'inline'
+    path = 'path'
+
+
+class PayloadKey(StrEnum):
+    """Ключи сообщения kafka."""
+
+    username = 'username'
+    file_path = 'file_path'
+    image = 'image'
+    content_encoding = 'content_encoding'
+    embedding = 'embedding'
+    is_verified = 'is_verified'
+
+
+def build_path_message(
+    username: str, file_path: str, content_encoding: str = identity_encoding,
+) -> dict[str, str]:
+    """
+    Создает сообщение со ссылкой на файл изображения.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param file_path: Путь к файлу изображения.
+    :type file_path: str
+    :param content_encoding: Сжатие файла: br или identity.
+    :type content_encoding: str
+    :return: Сообщение kafka.
+    :rtype: dict[str, str]
+    """
+    return {
+        PayloadKey.username: username,
+        PayloadKey.file_path: file_path,
+        PayloadKey.content_encoding: content_encoding,
+    }
+
+
+def build_inline_message(
+    username: str, image: bytes, quality: int,
+) -> dict[str, str]:
+    """
+    Создает сообщение с изображением внутри.
+
+    Изображение сжимается brotli и кодируется в base64.
+    JPEG и PNG уже сжаты и передаются без сжатия.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param image: Изображение пользователя.
+    :type image: bytes
+    :param quality: Качество сжатия brotli от 0 до 11.
+    :type quality: int
+    :return: Сообщение kafka.
+    :rtype: dict[str, str]
+    """
+    encoding = identity_encoding
+    if not is_compressed_format(image):
+        image = brotli.compress(image, quality=quality)
+        encoding = brotli_encoding
+    return {
+        PayloadKey.username: username,
+        PayloadKey.image: base64.b64encode(image).decode(),
+        PayloadKey.content_encoding: encoding,
+    }
+
+
+def get_payload_headers(message: dict[str, Any]) -> Headers:
+    """
+    Возвращает заголовок со способом передачи изображения.
+
+    :param message: Сообщение kafka.
+    :type message: dict[str, Any]
+    :return: Заголовки сообщения.
+    :rtype: Headers
+    """
+    mode = PayloadMode.path
+    if PayloadKey.image in message:
+        mode = PayloadMode.inline
+    return [(payload_mode_header, mode.encode())]
+
+
+def read_inline_image(message: dict[str, Any]) -> bytes:
+    """
+    Возвращает изображение из сообщения с изображением внутри.
+
+    :param message: Сообщение kafka.
+    :type message: dict[str, Any]
+    :return: Изображение пользователя.
+    :rtype: bytes
+    """
+    image = base64.b64decode(message[PayloadKey.image])
+    if message.get(PayloadKey.content_encoding) == brotli_encoding:
+        image = brotli.decompress(image)
+    return image
+
+
+class PayloadBuilder:
+    """
+    Подготовка изображения пользователя к отправке в kafka.
+
+    Если включена нормализация, изображение сначала уменьшается
+    и перекодируется в JPEG в пуле процессов. Изображение
+    не больше inline_image_threshold передается внутри сообщения,
+    большее сохраняется в хранилище, адресуемое по содержимому.
+    """
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        settings = get_settings().kafka
+        images_path = Path(settings.storage_path) / 'images'
+        self.image_store = ContentAddressedStorage(
+            images_path,
+            ImageStorage(
+                chunk_size=settings.upload_chunk_size,
+                max_upload_size=settings.max_upload_size,
+                max_writers=settings.upload_writers,
+                compression_quality=(
+                    settings.file_compression_quality
+                    if settings.compress_images else None
+                ),
+            ),
+        )
+        self.sweeper = ImageSweeper(
+            images_path, temp_retention=settings.image_temp_retention,
+        )
+        self.normalizer: ImageNormalizer | None = None
+        if settings.normalize_images:
+            self.normalizer = ImageNormalizer(
+                max_dimension=settings.normalize_max_dimension,
+                quality=settings.normalize_quality,
+                max_pixels=settings.normalize_max_pixels,
+                workers=settings.normalize_workers,
+            )
+
+    async def build(self, username: str, image: UploadFile) -> dict[str, str]:
+        """
+        Создает сообщение kafka с изображением пользователя.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param image: Изображение пользователя.
+        :type image: UploadFile
+        :return: Сообщение kafka.
+        :rtype: dict[str, str]
+        """
+        settings = get_settings().kafka
+        if self.normalizer is not None:
+            self._check_upload_size(image)
+            image = await self.normalizer.normalize(image)
+        threshold = settings.inline_image_threshold
+        if image.size is not None and image.size <= threshold:
+            return await asyncio.to_thread(
+                build_inline_message,
+                username,
+                await image.read(),
+                settings.file_compression_quality,
+            )
+        stored = await self.image_store.save(image)
+        logger.info(f'{stored.file_path} saved successfully')
+        return build_path_message(
+            username, stored.file_path, stored.content_encoding,
+        )
+
+    def shutdown(self) -> None:
+        """Останавливает потоки записи и процессы нормализации."""
+        self.image_store.shutdown()
+        if self.normalizer is not None:
+            self.normalizer.shutdown()
+
+    def _check_upload_size(self, image: UploadFile) -> None:
+        max_upload_size = get_settings().kafka.max_upload_size
+        if image.size is None or image.size > max_upload_size:
+            raise PayloadTooLargeError(
+                detail=f'image is larger than {max_upload_size}',
+            )
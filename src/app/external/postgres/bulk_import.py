@@ -0,0 +1,257 @@
+import argparse
+import csv
+import io
+import json
+import logging
+from contextlib import ExitStack, closing
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Iterator, TextIO
+
+from sqlalchemy import Engine
+
+from app.core.authentication import Hash
+from app.core.config.config import get_settings
+from app.external.postgres.models import hash_max_len, username_max_len
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+
+logger = logging.getLogger(__name__)
+
+Credentials = tuple[str, str]
+
+service_hash = Hash()
+
+create_staging_sql = """
+CREATE TEMP TABLE IF NOT EXISTS users_import (
+    username text NOT NULL,
+    hashed_password text NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+copy_sql = """
+COPY users_import (username, hashed_password) FROM STDIN WITH (FORMAT csv)
+"""
+merge_sql = """
+INSERT INTO users (username, hashed_password, balance, is_verified, is_deleted)
+SELECT DISTINCT ON (username) username, hashed_password, 0, false, false
+FROM users_import
+ORDER BY username
+ON CONFLICT (username) DO NOTHING
+"""
+
+
+@dataclass
+class ImportProgress:
+    """Прогресс импорта пользователей."""
+
+    read: int = 0
+    inserted: int = 0
+    rejected: int = 0
+
+    @property
+    def skipped(self) -> int:
+        """
+        Количество пропущенных дубликатов.
+
+        :return: Количество прочитанных, но не записанных пользователей.
+        :rtype: int
+        """
+        return self.read - self.inserted
+
+    def log(self) -> None:
+        """Записывает прогресс импорта в лог."""
+        counters = (
+            f'read {self.read}, inserted {self.inserted}, ' +
+            f'skipped {self.skipped}, rejected {self.rejected}'
+        )
+        logger.info(f'import progress: {counters}')
+
+
+def read_credentials(
+    stream: TextIO, file_format: str, progress: ImportProgress,
+) -> Iterator[Credentials]:
+    """
+    Читает данные пользователей из потока построчно.
+
+    Поддерживает CSV с заголовком username,hashed_password и NDJSON
+    с объектами {"username": ..., "hashed_password": ...}.
+    Некорректные строки, включая строки с ошибкой JSON, значения не
+    объекты, поля не строки и пароли не в виде хэша алгоритма сервиса,
+    пропускаются и учитываются в progress.rejected.
+
+    :param stream: Поток с данными пользователей.
+    :type stream: TextIO
+    :param file_format: Формат данных, csv или ndjson.
+    :type file_format: str
+    :param progress: Прогресс импорта.
+    :type progress: ImportProgress
+    :yield: Имя пользователя и хэш пароля.
+    :ytype: Credentials
+    """
+    if file_format == 'csv':
+        records: Iterator[dict[str, str] | str] = csv.DictReader(stream)
+    else:
+        records = (line for line in stream if line.strip())
+    for record in records:
+        credentials = _get_credentials(record)
+        if credentials is None:
+            progress.rejected += 1
+        else:
+            yield credentials
+
+
+class CopyStream(io.RawIOBase):
+    """
+    Файлоподобный объект для команды COPY.
+
+    Лениво кодирует пары из итератора в строки CSV,
+    поэтому в памяти находится только текущий фрагмент данных.
+    """
+
+    def __init__(self, rows: Iterator[Credentials]) -> None:
+        """
+        Метод инициализации.
+
+        :param rows: Итератор пар имя пользователя и хэш пароля.
+        :type rows: Iterator[Credentials]
+        """
+        self.rows = rows
+        self.count = 0
+        self._buffer = b''
+
+    def readable(self) -> bool:
+        """
+        Сообщает что поток доступен для чтения.
+
+        :return: True.
+        :rtype: bool
+        """
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Читает очередной фрагмент данных.
+
+        :param size: Максимальный размер фрагмента.
+        :type size: int
+        :return: Фрагмент данных в формате CSV.
+        :rtype: bytes
+        """
+        while size < 0 or len(self._buffer) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.count += 1
+            self._buffer += self._encode(row)
+        if size < 0:
+            size = len(self._buffer)
+        chunk = self._buffer[:size]
+        self._buffer = self._buffer[len(chunk):]
+        return chunk
+
+    def _encode(self, row: Credentials) -> bytes:
+        quoted = ('"{0}"'.format(field.replace('"', '""')) for field in row)
+        return '{0}\n'.format(','.join(quoted)).encode()
+
+
+def import_users(
+    engines: list[Engine],
+    rows: Iterator[Credentials],
+    progress: ImportProgress,
+    batch_size: int,
+    on_progress: Callable[[ImportProgress], None] | None = None,
+) -> ImportProgress:
+    """
+    Загружает пользователей в таблицу users командой COPY.
+
+    Каждая пачка делится по шардам по имени пользователя, часть
+    пачки копируется во временную таблицу users_import своего шарда,
+    затем переносится в users без дубликатов имен пользователей.
+    Временная таблица очищается при фиксации каждой пачки.
+
+    :param engines: Шарды базы данных.
+    :type engines: list[Engine]
+    :param rows: Итератор пар имя пользователя и хэш пароля.
+    :type rows: Iterator[Credentials]
+    :param progress: Прогресс импорта.
+    :type progress: ImportProgress
+    :param batch_size: Количество пользователей в пачке.
+    :type batch_size: int
+    :param on_progress: Функция, вызываемая после каждой пачки.
+    :type on_progress: Callable[[ImportProgress], None] | None
+    :return: Прогресс импорта.
+    :rtype: ImportProgress
+    """
+    with ExitStack() as stack:
+        connections = [
+            stack.enter_context(closing(engine.raw_connection()))
+            for engine in engines
+        ]
+        for connection in connections:
+            connection.cursor().execute(create_staging_sql)
+        while _import_batch(connections, islice(rows, batch_size), progress):
+            if on_progress is not None:
+                on_progress(progress)
+    return progress
+
+
+def main() -> None:
+    """Запускает импорт пользователей из командной строки."""
+    parser = argparse.ArgumentParser(description='Импорт пользователей.')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+    batch_size = args.batch_size or get_settings().postgres.import_batch_size
+    progress = ImportProgress()
+    with open(args.path, newline='') as source:
+        import_users(
+            engines=get_shard_pools(),
+            rows=read_credentials(source, args.format, progress),
+            progress=progress,
+            batch_size=batch_size,
+            on_progress=ImportProgress.log,
+        )
+    progress.log()
+
+
+def _get_credentials(record: dict[str, Any] | str) -> Credentials | None:
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError:
+            return None
+    if not isinstance(record, dict):
+        return None
+    credentials = (
+        record.get('username') or '', record.get('hashed_password') or '',
+    )
+    is_valid = all(
+        isinstance(field, str) and 0 < len(field) <= max_len
+        for field, max_len in zip(credentials, (username_max_len, hash_max_len))
+    ) and service_hash.is_hash(credentials[1])
+    return credentials if is_valid else None
+
+
+def _import_batch(
+    connections: list[Any],
+    rows: Iterator[Credentials],
+    progress: ImportProgress,
+) -> bool:
+    shards: list[list[Credentials]] = [[] for _ in connections]
+    for credentials in rows:
+        shards[get_shard_index(credentials[0], len(shards))].append(credentials)
+    if not any(shards):
+        return False
+    for connection, shard_rows in zip(connections, shards):
+        cursor = connection.cursor()
+        cursor.copy_expert(copy_sql, CopyStream(iter(shard_rows)))
+        cursor.execute(merge_sql)
+        connection.commit()
+        progress.read += len(shard_rows)
+        progress.inserted += cursor.rowcount
+    return True
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
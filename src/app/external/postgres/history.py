@@ -0,0 +1,157 @@
+import asyncio
+import base64
+import logging
+from datetime import datetime
+
+from sqlalchemy import Engine, text
+
+from app.core import models as srv
+from app.core.errors import NotFoundError, RepositoryError
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+
+logger = logging.getLogger(__name__)
+
+user_id_sql = text(
+    'SELECT id FROM users WHERE username = :username AND NOT is_deleted',
+)
+select_history_sql = """
+SELECT id, transaction_type, amount, created_at
+FROM transactions
+WHERE id_user = :id_user AND is_deleted = false
+"""
+keyset_filter = 'AND (created_at, id) < (:before_date, :before_id)'
+history_order = 'ORDER BY created_at DESC, id DESC LIMIT :limit'
+cursor_separator = '|'
+
+
+def encode_cursor(created_at: datetime, transaction_id: int) -> str:
+    """
+    Кодирует позицию последней транзакции страницы в курсор.
+
+    :param created_at: Время транзакции.
+    :type created_at: datetime
+    :param transaction_id: Идентификатор транзакции.
+    :type transaction_id: int
+    :return: Непрозрачный курсор для адресной строки.
+    :rtype: str
+    """
+    position = f'{created_at.isoformat()}{cursor_separator}{transaction_id}'
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Декодирует курсор в позицию транзакции.
+
+    :param cursor: Курсор, полученный от encode_cursor.
+    :type cursor: str
+    :return: Время и идентификатор транзакции.
+    :rtype: tuple[datetime, int]
+    :raises ValueError: Если курсор поврежден.
+    """
+    position = base64.urlsafe_b64decode(cursor.encode()).decode()
+    if cursor_separator not in position:
+        raise ValueError(f'invalid cursor {cursor}')
+    created_at, _, transaction_id = position.partition(cursor_separator)
+    return datetime.fromisoformat(created_at), int(transaction_id)
+
+
+class HistoryReader:
+    """
+    Чтение истории транзакций пользователя страницами.
+
+    Страницы идут от новых транзакций к старым, следующая страница
+    начинается после последней транзакции предыдущей по ключу
+    (created_at, id). Запрос любой страницы читает только ее строки
+    из индекса (id_user, created_at, id), поэтому не замедляется
+    с глубиной истории, в отличие от OFFSET.
+    """
+
+    def __init__(self, engines: list[Engine] | None = None) -> None:
+        """
+        Метод инициализации.
+
+        :param engines: Шарды или основная база данных, по умолчанию
+            шарды из настроек, а если они не заданы - основная база данных.
+        :type engines: list[Engine] | None
+        """
+        self.engines = engines or get_shard_pools()
+
+    async def read(
+        self, username: str, limit: int, cursor: str | None = None,
+    ) -> srv.TransactionHistory:
+        """
+        Читает страницу истории, не блокируя цикл событий.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param limit: Количество транзакций на странице.
+        :type limit: int
+        :param cursor: Курсор предыдущей страницы.
+        :type cursor: str | None
+        :return: Страница истории.
+        :rtype: srv.TransactionHistory
+        """
+        return await asyncio.to_thread(self.read_page, username, limit, cursor)
+
+    def read_page(
+        self, username: str, limit: int, cursor: str | None = None,
+    ) -> srv.TransactionHistory:
+        """
+        Читает страницу истории транзакций пользователя.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param limit: Количество транзакций на странице.
+        :type limit: int
+        :param cursor: Курсор предыдущей страницы, без него первая страница.
+        :type cursor: str | None
+        :return: Страница истории.
+        :rtype: srv.TransactionHistory
+        :raises NotFoundError: Если пользователь не найден.
+        :raises RepositoryError: При ошибке чтения.
+        """
+        before = None if cursor is None else decode_cursor(cursor)
+        engine = self.engines[get_shard_index(username, len(self.engines))]
+        try:
+            records = _read_records(engine, username, limit + 1, before)
+        except Exception as err:
+            logger.error("repository error can't read history")
+            raise RepositoryError(detail="can't read history") from err
+        if records is None:
+            logger.info(f'{username} not found')
+            raise NotFoundError(detail=f'{username} not found')
+        if len(records) <= limit:
+            return srv.TransactionHistory(transactions=records)
+        last = records[limit - 1]
+        return srv.TransactionHistory(
+            transactions=records[:limit],
+            next_cursor=encode_cursor(last.created_at, last.transaction_id),
+        )
+
+
+def _read_records(
+    engine: Engine,
+    username: str,
+    limit: int,
+    before: tuple[datetime, int] | None,
+) -> list[srv.TransactionRecord] | None:
+    with engine.connect() as connection:
+        user_id = connection.scalar(user_id_sql, {'username': username})
+        if user_id is None:
+            return None
+        query = {'id_user': user_id, 'limit': limit}
+        sql = f'{select_history_sql}{history_order}'
+        if before is not None:
+            query.update(before_date=before[0], before_id=before[1])
+            sql = f'{select_history_sql}{keyset_filter}\n{history_order}'
+        rows = connection.execute(text(sql), query).all()
+    return [
+        srv.TransactionRecord(
+            transaction_id=row.id,
+            transaction_type=row.transaction_type,
+            amount=row.amount,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
@@ -0,0 +1,204 @@
+import logging
+import re
+from contextlib import closing
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import URL, ExecutionContext
+from sqlalchemy.pool import PoolProxiedConnection, QueuePool
+
+from app.metrics.postgres import get_pool_metrics
+
+logger = logging.getLogger(__name__)
+
+statement_name_option = 'statement_name'
+unnamed_statement = 'other'
+default_pool_name = 'default'
+plan_not_available = 'not available'
+explain_prefixes = {  # noqa: WPS407 read only
+    'postgresql': 'EXPLAIN',
+    'sqlite': 'EXPLAIN QUERY PLAN',
+}
+statement_pattern = re.compile(
+    r'^\s*(?:(update)|(select|insert|delete)\b.*?\b(?:from|into))\s+"?(\w+)',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    Пул соединений, измеряющий ожидание свободного соединения.
+
+    Имя пула в метриках совпадает с logging_name пула,
+    который сохраняется при пересоздании пула.
+    """
+
+    def connect(self) -> PoolProxiedConnection:
+        """
+        Выдает соединение из пула.
+
+        :return: Соединение с базой данных.
+        :rtype: PoolProxiedConnection
+        """
+        started = perf_counter()
+        connection = super().connect()
+        get_pool_metrics().observe_checkout_wait(
+            self.logging_name or default_pool_name, perf_counter() - started,
+        )
+        return connection
+
+
+def get_pool_name(url: URL) -> str:
+    """
+    Возвращает имя пула соединений для метрик и логов.
+
+    :param url: Адрес базы данных.
+    :type url: URL
+    :return: Хост и имя базы данных без учетных данных.
+    :rtype: str
+    """
+    host = url.host or url.drivername
+    return f'{host}/{url.database}'
+
+
+def get_statement_name(statement: str, context: ExecutionContext) -> str:
+    """
+    Возвращает имя запроса для лэйбла метрик.
+
+    Используется опция выполнения statement_name, если она задана,
+    иначе имя составляется из типа запроса и таблицы.
+    Сырой SQL в лэйблы не попадает.
+
+    :param statement: Текст запроса.
+    :type statement: str
+    :param context: Контекст выполнения запроса.
+    :type context: ExecutionContext
+    :return: Имя запроса.
+    :rtype: str
+    """
+    statement_name: str | None = context.execution_options.get(
+        statement_name_option,
+    )
+    if statement_name:
+        return statement_name
+    match = statement_pattern.match(statement)
+    if match is None:
+        return unnamed_statement
+    update, operation, table_name = match.groups()
+    operation = (update or operation).lower()
+    return f'{operation}_{table_name.lower()}'
+
+
+class QueryObserver:
+    """Наблюдатель запросов engine."""
+
+    def __init__(
+        self, pool_name: str, dialect_name: str, slow_query_threshold: float,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param dialect_name: Имя диалекта базы данных.
+        :type dialect_name: str
+        :param slow_query_threshold: Порог медленного запроса в секундах.
+        :type slow_query_threshold: float
+        """
+        self.pool_name = pool_name
+        self.dialect_name = dialect_name
+        self.slow_query_threshold = slow_query_threshold
+
+    def before_cursor_execute(self, **event_args: Any) -> None:
+        """
+        Запоминает время начала запроса.
+
+        :param event_args: Аргументы события sqlalchemy.
+        :type event_args: Any
+        """
+        event_args['context'].query_started = perf_counter()
+
+    def after_cursor_execute(self, **event_args: Any) -> None:
+        """
+        Собирает метрики запроса и записывает в лог медленный запрос.
+
+        :param event_args: Аргументы события sqlalchemy.
+        :type event_args: Any
+        """
+        context = event_args['context']
+        duration = perf_counter() - context.query_started
+        statement_name = get_statement_name(event_args['statement'], context)
+        get_pool_metrics().observe_statement(
+            self.pool_name, statement_name, duration,
+        )
+        if event_args['executemany'] or duration < self.slow_query_threshold:
+            return
+        plan = explain(
+            event_args['cursor'],
+            event_args['statement'],
+            event_args['parameters'],
+            self.dialect_name,
+        )
+        logger.warning(
+            f'slow query {statement_name} on {self.pool_name} ' +
+            f'took {duration:.3f}s, plan:\n{plan}',
+        )
+
+
+def instrument_engine(engine: Engine, slow_query_threshold: float) -> None:
+    """
+    Подключает сбор метрик и лог медленных запросов к engine.
+
+    :param engine: sqlalchemy engine.
+    :type engine: Engine
+    :param slow_query_threshold: Порог медленного запроса в секундах.
+    :type slow_query_threshold: float
+    """
+    pool_name = get_pool_name(engine.url)
+    get_pool_metrics().track_pool(
+        pool_name,
+        size=lambda: engine.pool.size(),  # type: ignore[attr-defined]
+        checked_out=lambda: engine.pool.checkedout(),  # type: ignore
+        overflow=lambda: max(engine.pool.overflow(), 0),  # type: ignore
+    )
+    observer = QueryObserver(
+        pool_name, engine.dialect.name, slow_query_threshold,
+    )
+    for event_name in ('before_cursor_execute', 'after_cursor_execute'):
+        event.listen(
+            engine, event_name, getattr(observer, event_name), named=True,
+        )
+
+
+def explain(
+    cursor: Any, statement: str, query_parameters: Any, dialect_name: str,
+) -> str:
+    """
+    Возвращает план выполнения запроса.
+
+    Запрос не выполняется повторно, строится только план
+    с теми же параметрами. Ошибка построения плана записывается в лог.
+
+    :param cursor: Курсор, выполнивший запрос.
+    :type cursor: Any
+    :param statement: Текст запроса.
+    :type statement: str
+    :param query_parameters: Параметры запроса.
+    :type query_parameters: Any
+    :param dialect_name: Имя диалекта базы данных.
+    :type dialect_name: str
+    :return: План выполнения запроса.
+    :rtype: str
+    """
+    prefix = explain_prefixes.get(dialect_name)
+    if prefix is None or statement_pattern.match(statement) is None:
+        return plan_not_available
+    with closing(cursor.connection.cursor()) as plan_cursor:
+        try:
+            plan_cursor.execute(f'{prefix} {statement}', query_parameters)
+        except Exception as err:
+            logger.error(f"can't explain slow query: {err}")
+            return plan_not_available
+        plan_rows = plan_cursor.fetchall()
+    return '\n'.join(str(plan_row[-1]) for plan_row in plan_rows)
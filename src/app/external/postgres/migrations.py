@@ -0,0 +1,213 @@
+import logging
+from typing import Sequence
+
+from sqlalchemy import Connection, false, func, select, text
+
+from alembic import context, op
+
+logger = logging.getLogger(__name__)
+
+default_lock_timeout = '3s'
+default_statement_timeout = '15min'
+default_backfill_batch_size = 10000
+
+
+def apply_timeouts(
+    connection: Connection,
+    lock_timeout: str = default_lock_timeout,
+    statement_timeout: str = default_statement_timeout,
+) -> None:
+    """
+    Устанавливает ограничения времени для соединения миграций.
+
+    Ограничения действуют на уровне сессии, в том числе
+    для шагов, выполняемых вне транзакции миграции.
+
+    :param connection: Соединение с базой данных.
+    :type connection: Connection
+    :param lock_timeout: Максимальное ожидание блокировки.
+    :type lock_timeout: str
+    :param statement_timeout: Максимальное время выполнения запроса.
+    :type statement_timeout: str
+    """
+    connection.execute(
+        text(
+            "SELECT set_config('lock_timeout', :lock_timeout, false), " +
+            "set_config('statement_timeout', :statement_timeout, false)",
+        ),
+        {
+            'lock_timeout': lock_timeout,
+            'statement_timeout': statement_timeout,
+        },
+    )
+    connection.commit()
+
+
+def set_timeouts(
+    lock_timeout: str = default_lock_timeout,
+    statement_timeout: str = default_statement_timeout,
+) -> None:
+    """
+    Меняет ограничения времени внутри отдельной ревизии.
+
+    Миграция, которая не получила блокировку за lock_timeout,
+    завершается ошибкой вместо того, чтобы стоять в очереди
+    перед запросами логина. Job миграции повторит попытку.
+
+    :param lock_timeout: Максимальное ожидание блокировки.
+    :type lock_timeout: str
+    :param statement_timeout: Максимальное время выполнения запроса.
+    :type statement_timeout: str
+    """
+    settings = (
+        ('lock_timeout', lock_timeout),
+        ('statement_timeout', statement_timeout),
+    )
+    # inline literals are escaped and also render in offline --sql mode
+    op.execute(select(*(
+        func.set_config(
+            op.inline_literal(name), op.inline_literal(setting_value), false(),
+        )
+        for name, setting_value in settings
+    )))
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str],
+    *,
+    unique: bool = False,
+    where: str | None = None,
+) -> None:
+    """
+    Создает индекс без блокировки записи в таблицу.
+
+    Выполняется вне транзакции миграции. Невалидный индекс,
+    оставшийся после прерванной попытки, удаляется и строится заново.
+
+    :param index_name: Имя индекса.
+    :type index_name: str
+    :param table_name: Имя таблицы.
+    :type table_name: str
+    :param columns: Колонки индекса.
+    :type columns: Sequence[str]
+    :param unique: Уникальный ли индекс.
+    :type unique: bool
+    :param where: Условие частичного индекса.
+    :type where: str | None
+    """
+    with op.get_context().autocommit_block():
+        _drop_invalid_index(index_name)
+        op.create_index(
+            index_name,
+            table_name,
+            list(columns),
+            unique=unique,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_where=text(where) if where else None,
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    """
+    Удаляет индекс без блокировки записи в таблицу.
+
+    :param index_name: Имя индекса.
+    :type index_name: str
+    :param table_name: Имя таблицы.
+    :type table_name: str
+    """
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def add_unique_constraint_concurrently(
+    constraint_name: str, table_name: str, columns: Sequence[str],
+) -> None:
+    """
+    Добавляет ограничение уникальности без долгой блокировки.
+
+    Сначала строит уникальный индекс конкурентно,
+    затем привязывает к нему ограничение, что занимает мгновение.
+
+    :param constraint_name: Имя ограничения и индекса.
+    :type constraint_name: str
+    :param table_name: Имя таблицы.
+    :type table_name: str
+    :param columns: Колонки ограничения.
+    :type columns: Sequence[str]
+    """
+    create_index_concurrently(
+        constraint_name, table_name, columns, unique=True,
+    )
+    op.execute(text(
+        f'ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name} ' +
+        f'UNIQUE USING INDEX {constraint_name}',
+    ))
+
+
+def batched_backfill(
+    table_name: str,
+    set_clause: str,
+    where: str,
+    batch_size: int = default_backfill_batch_size,
+) -> int:
+    """
+    Заполняет колонку пачками строк, каждая в своей транзакции.
+
+    Условие where должно перестать выполняться для обновленных строк,
+    иначе заполнение не закончится.
+
+    :param table_name: Имя таблицы с колонкой id.
+    :type table_name: str
+    :param set_clause: Выражение SET, например "is_deleted = false".
+    :type set_clause: str
+    :param where: Условие строк, которые нужно обновить.
+    :type where: str
+    :param batch_size: Размер пачки.
+    :type batch_size: int
+    :return: Количество обновленных строк.
+    :rtype: int
+    """
+    # identifiers and clauses are written by migration authors
+    update = f'UPDATE {table_name} SET {set_clause}'  # noqa: S608
+    if context.is_offline_mode():
+        op.execute(text(f'{update} WHERE {where}'))
+        return 0
+    statement = text(
+        f'{update} WHERE id IN (SELECT id FROM {table_name} ' +  # noqa: S608
+        f'WHERE {where} ORDER BY id LIMIT :batch_size ' +
+        'FOR UPDATE SKIP LOCKED)',
+    )
+    updated = 0
+    with op.get_context().autocommit_block():
+        while True:
+            batch = op.get_bind().execute(
+                statement, {'batch_size': batch_size},
+            ).rowcount
+            if not batch:
+                return updated
+            updated += batch
+            logger.info(f'{table_name}: backfilled {updated} rows')
+
+
+def _drop_invalid_index(index_name: str) -> None:
+    if context.is_offline_mode():
+        return
+    is_invalid = op.get_bind().scalar(
+        text(
+            'SELECT NOT indisvalid FROM pg_index ' +  # noqa: S608 bound param
+            'WHERE indexrelid = to_regclass(:name)',
+        ),
+        {'name': index_name},
+    )
+    if is_invalid:
+        logger.warning(f'dropping invalid index {index_name}')
+        op.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}'))
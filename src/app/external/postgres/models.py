@@ -1,11 +1,20 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Table,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 username_max_len = 200
 hash_max_len = 1000
+idempotency_key_max_len = 100
 
 
 class Base(DeclarativeBase):
@@ -28,6 +37,9 @@ class User(Base):
     )
     reports: Mapped[List['Report']] = relationship(back_populates='user')
     vector: Mapped[bytes] = mapped_column(nullable=True)
+    vector_updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True,
+    )
 
 
 class Transaction(Base):
@@ -42,6 +54,23 @@ class Transaction(Base):
     is_deleted: Mapped[bool] = mapped_column(default=False)
     id_user: Mapped[int] = mapped_column(ForeignKey('users.id'))
     user: Mapped['User'] = relationship(back_populates='transactions')
+    idempotency_key: Mapped[str] = mapped_column(
+        String(idempotency_key_max_len), nullable=True,
+    )
+
+
+class TransactionRollup(Base):
+    """Итоги транзакций пользователя за день."""
+
+    __tablename__ = 'transaction_rollups'
+
+    id_user: Mapped[int] = mapped_column(
+        ForeignKey('users.id'), primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    transactions: Mapped[int] = mapped_column(BigInteger)
+    deposits: Mapped[int] = mapped_column(BigInteger)
+    withdrawals: Mapped[int] = mapped_column(BigInteger)
 
 
 class Report(Base):
@@ -0,0 +1,196 @@
+import logging
+from contextlib import closing
+from datetime import datetime
+from itertools import chain
+from typing import Any, Iterator
+
+from sqlalchemy import Engine
+
+from app.core.config.config import get_settings
+from app.core.errors import NotFoundError, RepositoryError
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+from app.external.report_formats import (
+    ReportFormat,
+    ReportTotals,
+    encode_header,
+    encode_rows,
+    encode_totals,
+)
+
+logger = logging.getLogger(__name__)
+
+create_report_sql = """
+INSERT INTO reports (start_date, end_date, is_deleted, id_user)
+SELECT %(start_date)s, %(end_date)s, false, id
+FROM users
+WHERE username = %(username)s AND NOT is_deleted
+RETURNING id, id_user
+"""  # noqa: WPS323 psycopg2 placeholder
+report_page_sql = """
+WITH page AS (
+    SELECT id, created_at, transaction_type, amount
+    FROM transactions
+    WHERE id_user = %(id_user)s
+        AND NOT is_deleted
+        AND created_at <= %(end_date)s
+        AND (created_at, id) > (%(after_date)s, %(after_id)s)
+    ORDER BY created_at, id
+    LIMIT %(page_size)s
+), linked AS (
+    INSERT INTO report_transaction (id_transaction, id_report)
+    SELECT id, %(id_report)s FROM page
+)
+SELECT id, created_at, transaction_type, amount
+FROM page
+ORDER BY created_at, id
+"""  # noqa: WPS323 psycopg2 placeholder
+delete_report_sql = """
+WITH links AS (
+    DELETE FROM report_transaction WHERE id_report = %(id_report)s
+)
+DELETE FROM reports WHERE id = %(id_report)s
+"""  # noqa: WPS323 psycopg2 placeholder
+
+ReportRow = tuple[int, datetime, bool, int]
+
+
+class ReportWriter:
+    """
+    Построение отчетов по транзакциям пользователя.
+
+    Транзакции периода читаются страницами по ключу (created_at, id),
+    каждая страница - отдельный ограниченный запрос, который в той же
+    инструкции записывает строки report_transaction. Итоги считаются
+    по мере чтения, поэтому память не зависит от числа транзакций.
+    Отчет фиксируется до начала потока, а каждая страница - своей
+    короткой транзакцией на соединении, взятом из пула только на время
+    запроса, поэтому медленный клиент не держит соединение и транзакцию.
+    Прерванный отчет удаляется вместе с записанными строками.
+    """
+
+    def __init__(
+        self,
+        engines: list[Engine] | None = None,
+        page_size: int | None = None,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param engines: Шарды или основная база данных, по умолчанию
+            шарды из настроек, а если они не заданы - основная база данных.
+        :type engines: list[Engine] | None
+        :param page_size: Количество транзакций на странице,
+            по умолчанию из настроек.
+        :type page_size: int | None
+        """
+        self.engines = engines or get_shard_pools()
+        self.page_size = (
+            page_size or get_settings().postgres.report_page_size
+        )
+
+    def open(
+        self,
+        username: str,
+        start_date: datetime,
+        end_date: datetime,
+        report_format: ReportFormat,
+    ) -> Iterator[bytes]:
+        """
+        Создает отчет и возвращает поток его страниц.
+
+        Пользователь проверяется до возврата, поэтому ошибка
+        возникает до начала ответа, а не посреди потока.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param start_date: Начало периода включительно.
+        :type start_date: datetime
+        :param end_date: Конец периода включительно.
+        :type end_date: datetime
+        :param report_format: Формат отчета.
+        :type report_format: ReportFormat
+        :return: Страницы отчета в кодировке формата.
+        :rtype: Iterator[bytes]
+        :raises NotFoundError: Если пользователь не найден.
+        :raises RepositoryError: При ошибке создания отчета.
+        """
+        engine = self.engines[get_shard_index(username, len(self.engines))]
+        query = {
+            'username': username,
+            'start_date': start_date,
+            'end_date': end_date,
+            'after_date': start_date,
+            'after_id': 0,
+            'page_size': self.page_size,
+        }
+        with closing(engine.raw_connection()) as connection:
+            try:
+                _create_report(connection, query)
+            except (NotFoundError, RepositoryError):
+                connection.rollback()
+                raise
+            connection.commit()
+        return self._stream(engine, query, report_format)
+
+    def _stream(
+        self,
+        engine: Engine,
+        query: dict[str, Any],
+        report_format: ReportFormat,
+    ) -> Iterator[bytes]:
+        totals = ReportTotals(report_id=query['id_report'])
+        pages = (
+            encode_rows(rows, totals, report_format)
+            for rows in _read_pages(engine, query)
+        )
+        try:
+            yield from chain((encode_header(report_format),), pages)
+        except BaseException:  # noqa: WPS424 remove report on disconnect too
+            _delete_report(engine, query)
+            raise
+        logger.info(f'report created: {totals}')
+        yield encode_totals(totals, report_format)
+
+
+def _create_report(connection: Any, query: dict[str, Any]) -> None:
+    cursor = connection.cursor()
+    try:
+        cursor.execute(create_report_sql, query)
+    except Exception as err:
+        logger.error("repository error can't create report")
+        raise RepositoryError(detail="can't create report") from err
+    created = cursor.fetchone()
+    if created is None:
+        logger.info(f"{query['username']} not found")
+        raise NotFoundError(detail=f"{query['username']} not found")
+    query['id_report'] = created[0]
+    query['id_user'] = created[1]
+
+
+def _read_pages(
+    engine: Engine, query: dict[str, Any],
+) -> Iterator[list[ReportRow]]:
+    while True:
+        rows = _read_page(engine, query)
+        if rows:
+            yield rows
+        if len(rows) < query['page_size']:
+            return
+        query['after_id'] = rows[-1][0]
+        query['after_date'] = rows[-1][1]
+
+
+def _read_page(engine: Engine, query: dict[str, Any]) -> list[ReportRow]:
+    with closing(engine.raw_connection()) as connection:
+        cursor = connection.cursor()
+        cursor.execute(report_page_sql, query)
+        rows: list[ReportRow] = list(cursor.fetchall())
+        connection.commit()
+    return rows
+
+
+def _delete_report(engine: Engine, query: dict[str, Any]) -> None:
+    with closing(engine.raw_connection()) as connection:
+        connection.cursor().execute(delete_report_sql, query)
+        connection.commit()
+    logger.info(f"interrupted report {query['id_report']} deleted")
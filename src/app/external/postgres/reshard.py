@@ -0,0 +1,252 @@
+import argparse
+import logging
+import os
+from collections import defaultdict
+
+from sqlalchemy import Engine, Table, delete, insert, select
+from sqlalchemy.orm import Session
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from app.core.config.config import get_settings
+from app.external.postgres import models as db
+from app.external.postgres.sharding import get_shard_index
+from app.external.postgres.storage import create_pool
+
+logger = logging.getLogger(__name__)
+
+copied_columns = (
+    'username',
+    'hashed_password',
+    'balance',
+    'is_verified',
+    'is_deleted',
+    'vector',
+    'vector_updated_at',
+)
+users_table = db.Base.metadata.tables['users']
+transactions_table = db.Base.metadata.tables['transactions']
+reports_table = db.Base.metadata.tables['reports']
+report_links_table = db.Base.metadata.tables['report_transaction']
+# tables referencing users, copied in this order and deleted in reverse
+dependent_tables = (
+    transactions_table,
+    db.Base.metadata.tables['transaction_rollups'],
+    reports_table,
+)
+
+
+def migrate_shards(shards_dns: list[str], revision: str = 'head') -> None:
+    """
+    Применяет миграции alembic ко всем шардам.
+
+    Путь к конфигурации alembic берется из переменной ALEMBIC_CONFIG.
+
+    :param shards_dns: Адреса шардов.
+    :type shards_dns: list[str]
+    :param revision: Ревизия миграции.
+    :type revision: str
+    """
+    config_path = os.getenv('ALEMBIC_CONFIG', 'alembic.ini')
+    for dns in shards_dns:
+        config = AlembicConfig(config_path)
+        # configparser interpolation treats percent signs specially
+        escaped_dns = dns.replace('%', '%%')  # noqa: WPS323 not formatting
+        config.set_main_option('sqlalchemy.url', escaped_dns)
+        logger.info(f'migrating shard {dns} to {revision}')
+        command.upgrade(config, revision)
+
+
+def reshard(
+    source_dns: list[str], target_dns: list[str], batch_size: int,
+) -> int:
+    """
+    Переносит пользователей между шардами по новой схеме шардирования.
+
+    Пользователи читаются из каждого исходного шарда пачками по id.
+    Каждая пачка сначала записывается в целевой шард вместе с
+    транзакциями, итогами и отчетами пользователей, затем удаляется
+    из исходного. В целевом шарде строки получают новые id, ссылки
+    между ними переносятся. Пользователь и его строки записываются
+    в одной транзакции, поэтому повторный запуск после сбоя безопасен:
+    уже перенесенные пользователи пропускаются.
+
+    :param source_dns: Адреса шардов текущей схемы.
+    :type source_dns: list[str]
+    :param target_dns: Адреса шардов новой схемы.
+    :type target_dns: list[str]
+    :param batch_size: Размер пачки пользователей.
+    :type batch_size: int
+    :return: Количество перенесенных пользователей.
+    :rtype: int
+    """
+    all_dns = [*source_dns, *target_dns]
+    engines = {dns: create_pool(dns) for dns in all_dns}
+    moved = sum(
+        _reshard_source(dns, target_dns, engines, batch_size)
+        for dns in source_dns
+    )
+    for engine in engines.values():
+        engine.dispose()
+    logger.info(f'resharding finished, moved {moved} users')
+    return moved
+
+
+def _reshard_source(
+    dns: str,
+    target_dns: list[str],
+    engines: dict[str, Engine],
+    batch_size: int,
+) -> int:
+    moved = 0
+    last_id = 0
+    while True:
+        with Session(engines[dns]) as session:
+            users = session.scalars(
+                select(db.User).where(
+                    db.User.id > last_id,
+                ).order_by(db.User.id).limit(batch_size),
+            ).all()
+            if not users:
+                return moved
+            last_id = users[-1].id
+            moved += _move_batch(session, dns, list(users), target_dns, engines)
+        logger.info(f'shard {dns}: checked up to id {last_id}, moved {moved}')
+
+
+def _move_batch(
+    session: Session,
+    dns: str,
+    users: list[db.User],
+    target_dns: list[str],
+    engines: dict[str, Engine],
+) -> int:
+    misplaced = _group_by_target(users, target_dns)
+    misplaced.pop(dns, None)
+    user_rows = _UserRows(session)
+    for target, target_users in misplaced.items():
+        user_rows.copy(engines[target], target_users)
+    user_rows.delete([
+        user.id for moved_users in misplaced.values() for user in moved_users
+    ])
+    session.commit()
+    return sum(len(batch) for batch in misplaced.values())
+
+
+def _group_by_target(
+    users: list[db.User], target_dns: list[str],
+) -> dict[str, list[db.User]]:
+    grouped: defaultdict[str, list[db.User]] = defaultdict(list)
+    for user in users:
+        shard_index = get_shard_index(user.username, len(target_dns))
+        grouped[target_dns[shard_index]].append(user)
+    return grouped
+
+
+class _UserRows:
+    def __init__(self, source: Session) -> None:
+        self.source = source
+
+    def copy(self, engine: Engine, users: list[db.User]) -> None:
+        with Session(engine) as session:
+            existing = set(session.scalars(
+                select(db.User.username).where(
+                    db.User.username.in_([user.username for user in users]),
+                ),
+            ))
+            for user in users:
+                if user.username not in existing:
+                    self._copy_user(session, user)
+            session.commit()
+
+    def delete(self, user_ids: list[int]) -> None:
+        user_reports = select(reports_table.c.id).where(
+            reports_table.c.id_user.in_(user_ids),
+        )
+        self.source.execute(
+            delete(report_links_table).where(
+                report_links_table.c.id_report.in_(user_reports),
+            ),
+        )
+        for table in reversed(dependent_tables):
+            self.source.execute(
+                delete(table).where(table.c.id_user.in_(user_ids)),
+            )
+        self.source.execute(
+            delete(users_table).where(users_table.c.id.in_(user_ids)),
+        )
+
+    def _copy_user(self, session: Session, user: db.User) -> None:
+        user_id = session.execute(
+            insert(users_table).returning(users_table.c.id),
+            {column: getattr(user, column) for column in copied_columns},
+        ).scalar_one()
+        new_ids = {
+            table.name: self._copy_owned(session, table, user.id, user_id)
+            for table in dependent_tables
+        }
+        transaction_ids = new_ids[transactions_table.name]
+        report_ids = new_ids[reports_table.name]
+        links = self.source.execute(
+            select(report_links_table).where(
+                report_links_table.c.id_report.in_(report_ids),
+            ),
+        ).all()
+        if links:
+            session.execute(insert(report_links_table), [
+                {
+                    'id_transaction': transaction_ids[link.id_transaction],
+                    'id_report': report_ids[link.id_report],
+                }
+                for link in links
+            ])
+
+    def _copy_owned(
+        self, session: Session, table: Table, source_id: int, user_id: int,
+    ) -> dict[int, int]:
+        rows = self.source.execute(
+            select(table).where(table.c.id_user == source_id),
+        ).mappings().all()
+        if not rows:
+            return {}
+        columns = [column.name for column in table.c if column.name != 'id']
+        copied_rows = [
+            {**{column: row[column] for column in columns}, 'id_user': user_id}
+            for row in rows
+        ]
+        if 'id' not in table.c:
+            session.execute(insert(table), copied_rows)
+            return {}
+        copied_ids = session.scalars(
+            insert(table).returning(
+                table.c.id, sort_by_parameter_order=True,
+            ),
+            copied_rows,
+        ).all()
+        return dict(zip((row['id'] for row in rows), copied_ids))
+
+
+def main() -> None:
+    """Запускает инструмент решардирования из командной строки."""
+    parser = argparse.ArgumentParser(description='Шарды таблицы users.')
+    parser.add_argument('action', choices=['migrate', 'reshard'])
+    parser.add_argument('--source', nargs='*', default=None)
+    parser.add_argument('--target', nargs='*', default=None)
+    parser.add_argument('--batch-size', type=int, default=None)
+    args = parser.parse_args()
+    settings = get_settings().postgres
+    configured = [str(dns) for dns in settings.shard_dns]
+    target_dns = args.target or configured
+    migrate_shards(target_dns)
+    if args.action == 'migrate':
+        return
+    reshard(
+        source_dns=args.source or configured,
+        target_dns=target_dns,
+        batch_size=args.batch_size or settings.reshard_batch_size,
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
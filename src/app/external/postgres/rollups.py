@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Engine, text
+
+from app.core import models as srv
+from app.core.errors import NotFoundError, RepositoryError
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+
+logger = logging.getLogger(__name__)
+
+user_id_sql = text(
+    'SELECT id FROM users WHERE username = :username AND NOT is_deleted',
+)
+summary_sql = """
+WITH parts AS (
+    SELECT transactions, deposits, withdrawals
+    FROM transaction_rollups
+    WHERE id_user = :id_user AND day >= :full_start AND day < :full_end
+    UNION ALL
+    SELECT
+        count(*),
+        coalesce(sum(amount) FILTER (WHERE transaction_type), 0),
+        coalesce(sum(amount) FILTER (WHERE NOT transaction_type), 0)
+    FROM (
+        SELECT transaction_type, amount
+        FROM transactions
+        WHERE id_user = :id_user
+            AND is_deleted = false
+            AND created_at >= :start_date
+            AND created_at < :full_start
+        UNION ALL
+        SELECT transaction_type, amount
+        FROM transactions
+        WHERE id_user = :id_user
+            AND is_deleted = false
+            AND created_at >= :full_end
+            AND created_at <= :end_date
+    ) AS edges
+)
+SELECT
+    sum(transactions)::bigint AS transactions,
+    sum(deposits)::bigint AS deposits,
+    sum(withdrawals)::bigint AS withdrawals
+FROM parts
+"""
+check_sql = """
+WITH actual AS (
+    SELECT
+        id_user,
+        created_at::date AS day,
+        count(*) AS transactions,
+        coalesce(sum(amount) FILTER (WHERE transaction_type), 0) AS deposits,
+        coalesce(
+            sum(amount) FILTER (WHERE NOT transaction_type), 0
+        ) AS withdrawals
+    FROM transactions
+    WHERE is_deleted = false
+    GROUP BY id_user, created_at::date
+)
+SELECT
+    coalesce(actual.id_user, rollups.id_user) AS id_user,
+    coalesce(actual.day, rollups.day) AS day
+FROM actual
+FULL JOIN transaction_rollups AS rollups
+    ON rollups.id_user = actual.id_user AND rollups.day = actual.day
+WHERE (actual.transactions, actual.deposits, actual.withdrawals)
+    IS DISTINCT FROM
+    (rollups.transactions, rollups.deposits, rollups.withdrawals)
+ORDER BY 1, 2
+"""
+lock_users_sql = """
+SELECT id FROM users WHERE id = ANY(:user_ids) ORDER BY id FOR NO KEY UPDATE
+"""
+delete_rollups_sql = (
+    'DELETE FROM transaction_rollups WHERE id_user = ANY(:user_ids)'
+)
+insert_rollups_sql = """
+INSERT INTO transaction_rollups (
+    id_user, day, transactions, deposits, withdrawals
+)
+SELECT
+    id_user,
+    created_at::date,
+    count(*),
+    coalesce(sum(amount) FILTER (WHERE transaction_type), 0),
+    coalesce(sum(amount) FILTER (WHERE NOT transaction_type), 0)
+FROM transactions
+WHERE is_deleted = false AND id_user = ANY(:user_ids)
+GROUP BY id_user, created_at::date
+"""
+
+
+class BalanceReader:
+    """
+    Итоги транзакций пользователя за период.
+
+    Полные дни периода берутся из дневных агрегатов transaction_rollups,
+    которые обновляются вместе с записью пачки транзакций, и только
+    неполные первый и последний дни читаются из самих транзакций.
+    Поэтому стоимость запроса зависит от числа дней, а не транзакций.
+    """
+
+    def __init__(self, engines: list[Engine] | None = None) -> None:
+        """
+        Метод инициализации.
+
+        :param engines: Шарды или основная база данных, по умолчанию
+            шарды из настроек, а если они не заданы - основная база данных.
+        :type engines: list[Engine] | None
+        """
+        self.engines = engines or get_shard_pools()
+
+    async def summarize(
+        self,
+        username: str,
+        start_date: datetime | None,
+        end_date: datetime,
+    ) -> srv.BalanceSummary:
+        """
+        Читает итоги за период, не блокируя цикл событий.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param start_date: Начало периода включительно, без него
+            итоги считаются с первой транзакции.
+        :type start_date: datetime | None
+        :param end_date: Конец периода включительно.
+        :type end_date: datetime
+        :return: Итоги транзакций.
+        :rtype: srv.BalanceSummary
+        """
+        return await asyncio.to_thread(
+            self.read_summary, username, start_date, end_date,
+        )
+
+    def read_summary(
+        self,
+        username: str,
+        start_date: datetime | None,
+        end_date: datetime,
+    ) -> srv.BalanceSummary:
+        """
+        Читает итоги транзакций пользователя за период.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :param start_date: Начало периода включительно, без него
+            итоги считаются с первой транзакции.
+        :type start_date: datetime | None
+        :param end_date: Конец периода включительно.
+        :type end_date: datetime
+        :return: Итоги транзакций.
+        :rtype: srv.BalanceSummary
+        :raises NotFoundError: Если пользователь не найден.
+        :raises RepositoryError: При ошибке чтения.
+        """
+        query = _summary_query(start_date, end_date)
+        engine = self.engines[get_shard_index(username, len(self.engines))]
+        try:
+            summary = _read_summary(engine, username, query)
+        except Exception as err:
+            logger.error("repository error can't read balance summary")
+            raise RepositoryError(detail="can't read balance summary") from err
+        if summary is None:
+            logger.info(f'{username} not found')
+            raise NotFoundError(detail=f'{username} not found')
+        return summary
+
+
+def check_rollups(engine: Engine) -> list[tuple[int, date]]:
+    """
+    Сравнивает дневные агрегаты с транзакциями.
+
+    Расхождения появляются, если транзакции меняются или удаляются
+    в обход записи пачек, или если пачки записывались во время
+    заполнения таблицы агрегатов миграцией.
+
+    :param engine: Шард или основная база данных.
+    :type engine: Engine
+    :return: Пользователи и дни, агрегаты которых не совпадают.
+    :rtype: list[tuple[int, date]]
+    """
+    with engine.connect() as connection:
+        mismatches = list(connection.execute(text(check_sql)).tuples())
+    for user_id, day in mismatches:
+        logger.warning(f'rollup of user {user_id} for {day} mismatched')
+    return mismatches
+
+
+def repair_rollups(engine: Engine, user_ids: list[int]) -> None:
+    """
+    Пересчитывает дневные агрегаты пользователей по транзакциям.
+
+    Строки пользователей блокируются так же, как при записи пачки,
+    поэтому параллельно записанные транзакции не теряются.
+
+    :param engine: Шард или основная база данных.
+    :type engine: Engine
+    :param user_ids: Идентификаторы пользователей.
+    :type user_ids: list[int]
+    """
+    query = {'user_ids': sorted(user_ids)}
+    with engine.begin() as connection:
+        for sql in (lock_users_sql, delete_rollups_sql, insert_rollups_sql):
+            connection.execute(text(sql), query)
+    logger.info(f'rollups repaired for users {query["user_ids"]}')
+
+
+def main() -> None:
+    """Проверяет и исправляет дневные агрегаты из командной строки."""
+    parser = argparse.ArgumentParser(description='Агрегаты транзакций.')
+    parser.add_argument('--repair', action='store_true')
+    args = parser.parse_args()
+    mismatched = sum(
+        _check_shard(engine, repair=args.repair)
+        for engine in get_shard_pools()
+    )
+    if mismatched and not args.repair:
+        raise SystemExit(1)
+
+
+def _check_shard(engine: Engine, repair: bool) -> int:
+    mismatches = check_rollups(engine)
+    if repair and mismatches:
+        repair_rollups(engine, list({user_id for user_id, _ in mismatches}))
+    return len(mismatches)
+
+
+def _summary_query(
+    start_date: datetime | None, end_date: datetime,
+) -> dict[str, datetime]:
+    # transactions store naive UTC, an aware bound can't be compared
+    end_date = srv.naive_utc(end_date)
+    window_start = srv.naive_utc(start_date or datetime.min)
+    full_start = datetime.combine(window_start.date(), time.min)
+    if full_start < window_start:
+        full_start += timedelta(days=1)
+    full_end = datetime.combine(end_date.date(), time.min)
+    if full_start > full_end:
+        # the period lies within one day, raw transactions cover it
+        full_start = window_start
+        full_end = window_start
+    return {
+        'start_date': window_start,
+        'end_date': end_date,
+        'full_start': full_start,
+        'full_end': full_end,
+    }
+
+
+def _read_summary(
+    engine: Engine, username: str, query: dict[str, datetime],
+) -> srv.BalanceSummary | None:
+    with engine.connect() as connection:
+        user_id = connection.scalar(user_id_sql, {'username': username})
+        if user_id is None:
+            return None
+        totals = connection.execute(
+            text(summary_sql), {**query, 'id_user': user_id},
+        ).one()
+    return srv.BalanceSummary(
+        transactions=totals.transactions,
+        deposits=totals.deposits,
+        withdrawals=totals.withdrawals,
+        balance_change=totals.deposits - totals.withdrawals,
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
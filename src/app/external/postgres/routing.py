@@ -0,0 +1,142 @@
+import logging
+from itertools import count
+from time import monotonic
+
+from sqlalchemy import Engine, text
+
+logger = logging.getLogger(__name__)
+
+sticky_keys_limit = 10000
+
+
+class ReplicaRouter:  # noqa: WPS214 keeps health and stickiness together
+    """
+    Маршрутизатор запросов между основной базой данных и репликами.
+
+    Запросы на запись направляются в основную базу данных.
+    Запросы на чтение распределяются по доступным репликам.
+    После записи чтение по тому же ключу некоторое время
+    выполняется из основной базы данных (read-your-writes).
+
+    Attributes:
+        primary: Engine - основная база данных.
+        replicas: list[Engine] - реплики базы данных.
+        health_check_interval: float - период проверки реплик в секундах.
+        sticky_window: float - время чтения из основной базы после записи.
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: list[Engine],
+        health_check_interval: float,
+        sticky_window: float,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param primary: Основная база данных.
+        :type primary: Engine
+        :param replicas: Реплики базы данных.
+        :type replicas: list[Engine]
+        :param health_check_interval: Период проверки реплик в секундах.
+        :type health_check_interval: float
+        :param sticky_window: Время чтения из основной базы после записи.
+        :type sticky_window: float
+        """
+        self.primary = primary
+        self.replicas = replicas
+        self.health_check_interval = health_check_interval
+        self.sticky_window = sticky_window
+        self._counter = count()
+        self._health: dict[int, tuple[bool, float]] = {}
+        self._sticky: dict[str, float] = {}
+
+    def get_writer(self) -> Engine:
+        """
+        Возвращает базу данных для записи.
+
+        :return: Основная база данных.
+        :rtype: Engine
+        """
+        return self.primary
+
+    def get_reader(self, key: str) -> Engine:
+        """
+        Возвращает базу данных для чтения.
+
+        :param key: Ключ записи, например имя пользователя.
+        :type key: str
+        :return: Реплика или основная база данных.
+        :rtype: Engine
+        """
+        if not self.replicas or self._is_sticky(key):
+            return self.primary
+        replicas_count = len(self.replicas)
+        start = next(self._counter) % replicas_count
+        for offset in range(replicas_count):
+            index = (start + offset) % replicas_count
+            if self._is_healthy(index):
+                return self.replicas[index]
+        logger.warning('no healthy replicas, reading from primary')
+        return self.primary
+
+    def mark_written(self, key: str) -> None:
+        """
+        Отмечает запись по ключу.
+
+        :param key: Ключ записи, например имя пользователя.
+        :type key: str
+        """
+        if not self.replicas:
+            return
+        if len(self._sticky) >= sticky_keys_limit:
+            self._prune()
+        self._sticky[key] = monotonic() + self.sticky_window
+
+    def mark_unhealthy(self, engine: Engine) -> None:
+        """
+        Отмечает реплику недоступной до следующей проверки.
+
+        :param engine: Реплика базы данных.
+        :type engine: Engine
+        """
+        for index, replica in enumerate(self.replicas):
+            if replica is engine:
+                logger.warning(f'replica {index} marked unhealthy')
+                self._health[index] = (False, monotonic())
+
+    def _is_sticky(self, key: str) -> bool:
+        deadline = self._sticky.get(key)
+        if deadline is None:
+            return False
+        if deadline > monotonic():
+            return True
+        self._sticky.pop(key, None)
+        return False
+
+    def _is_healthy(self, index: int) -> bool:
+        now = monotonic()
+        state = self._health.get(index)
+        if state is not None and now - state[1] < self.health_check_interval:
+            return state[0]
+        healthy = self._check(self.replicas[index])
+        self._health[index] = (healthy, now)
+        return healthy
+
+    def _check(self, engine: Engine) -> bool:
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+        except Exception as exc:
+            logger.warning(f'replica health check failed: {exc}')
+            return False
+        return True
+
+    def _prune(self) -> None:
+        now = monotonic()
+        self._sticky = {
+            key: deadline
+            for key, deadline in self._sticky.items()
+            if deadline > now
+        }
@@ -0,0 +1,122 @@
+import hashlib
+import logging
+from functools import lru_cache
+
+from sqlalchemy import Engine
+
+from app.core import models as srv
+from app.core.config.config import get_settings
+from app.core.errors import ConfigError
+from app.external.postgres.storage import DBStorage, get_pool
+
+logger = logging.getLogger(__name__)
+
+# constants of the jump consistent hash by Lamping and Veach
+jump_multiplier = 2862933555777941757
+jump_modulo = 2 ** 64  # noqa: WPS432 64-bit arithmetic
+jump_shift = 33
+jump_scale = float(1 << 31)  # noqa: WPS432 31-bit precision
+
+
+def get_shard_index(username: str, shards_count: int) -> int:
+    """
+    Возвращает номер шарда пользователя.
+
+    Использует jump consistent hash от sha256 имени пользователя.
+    При добавлении шарда перемещается только 1/n пользователей.
+
+    :param username: Имя пользователя.
+    :type username: str
+    :param shards_count: Количество шардов.
+    :type shards_count: int
+    :return: Номер шарда.
+    :rtype: int
+    """
+    digest = hashlib.sha256(username.encode()).digest()
+    key = int.from_bytes(digest[:8], 'big')
+    bucket, candidate = -1, 0
+    while candidate < shards_count:
+        bucket = candidate
+        key = (key * jump_multiplier + 1) % jump_modulo
+        candidate = int(
+            (bucket + 1) * (jump_scale / float((key >> jump_shift) + 1)),
+        )
+    return bucket
+
+
+@lru_cache
+def get_shard_pools() -> list[Engine]:
+    """
+    Возвращает общие для процесса пулы соединений к шардам.
+
+    Объекты пакетной записи и чтения используют пулы шардов
+    вместе с хранилищами, без шардов - пул основной базы данных.
+
+    :return: Шарды из настроек, а если они не заданы - основная база данных.
+    :rtype: list[Engine]
+    """
+    settings = get_settings().postgres
+    shards_dns = settings.shard_dns or [settings.pg_dns]
+    return [get_pool(str(dns)) for dns in shards_dns]
+
+
+class ShardedDBStorage:
+    """
+    База данных, разделенная на шарды по имени пользователя.
+
+    Каждый шард - отдельная база данных PostgreSQL со своим пулом
+    соединений и полной схемой таблиц.
+
+    Attributes:
+        shards: list[DBStorage] - хранилища шардов.
+    """
+
+    def __init__(self, shards_dns: list[str] | None = None) -> None:
+        """
+        Метод инициализации.
+
+        :param shards_dns: Адреса шардов, по умолчанию из настроек.
+        :type shards_dns: list[str] | None
+        :raises ConfigError: Если не задан ни один шард.
+        """
+        if shards_dns is None:
+            shards_dns = [
+                str(dns) for dns in get_settings().postgres.shard_dns
+            ]
+        if not shards_dns:
+            logger.critical('postgres shards are not configured')
+            raise ConfigError(detail='postgres shards are not configured')
+        self.shards = [DBStorage(dns) for dns in shards_dns]
+
+    async def create_user(self, user: srv.User) -> srv.User:
+        """
+        Создает пользователя в шарде пользователя.
+
+        :param user: объект пользователя
+        :type user: User
+        :return: Пользователь созданный в базе данных.
+        :rtype: srv.User
+        """
+        return await self.get_shard(user.username).create_user(user)
+
+    async def get_user(self, user: srv.User) -> srv.User | None:
+        """
+        Получает пользователя из шарда пользователя.
+
+        :param user: объект пользователя
+        :type user: User
+        :return: Пользователь в базе данных
+        :rtype: srv.User | None
+        """
+        return await self.get_shard(user.username).get_user(user)
+
+    def get_shard(self, username: str) -> DBStorage:
+        """
+        Возвращает шард пользователя.
+
+        :param username: Имя пользователя.
+        :type username: str
+        :return: Хранилище шарда.
+        :rtype: DBStorage
+        """
+        return self.shards[get_shard_index(username, len(self.shards))]
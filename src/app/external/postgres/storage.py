@@ -1,29 +1,70 @@
 import logging
+from functools import lru_cache
 
-from sqlalchemy import Engine, create_engine, select
+from sqlalchemy import Engine, create_engine, make_url, select
 from sqlalchemy.orm import Session
 
 from app.core import models as srv
 from app.core.config.config import get_settings
 from app.core.errors import RepositoryError
 from app.external.postgres import models as db
+from app.external.postgres.instrumentation import (
+    InstrumentedQueuePool,
+    get_pool_name,
+    instrument_engine,
+)
+from app.external.postgres.routing import ReplicaRouter
 
 logger = logging.getLogger(__name__)
 
 
-def create_pool() -> Engine:
+def create_pool(
+    dns: str | None = None, connect_timeout: int | None = None,
+) -> Engine:
     """
     Создает sqlalchemy engine с пулом соединений.
 
+    К engine подключается сбор метрик пула и запросов.
+
+    :param dns: Адрес базы данных, по умолчанию основная база данных.
+    :type dns: str | None
+    :param connect_timeout: Таймаут подключения в секундах.
+    :type connect_timeout: int | None
     :return: sqlalchemy engine
     :rtype: Engine
     """
     settings = get_settings()
-    return create_engine(
-        str(settings.postgres.pg_dns),
+    if dns is None:
+        dns = str(settings.postgres.pg_dns)
+    connect_args: dict[str, int] = {}
+    if connect_timeout is not None:
+        connect_args['connect_timeout'] = connect_timeout
+    engine = create_engine(
+        dns,
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
         pool_size=settings.postgres.pool_size,
         max_overflow=settings.postgres.max_overflow,
+        pool_logging_name=get_pool_name(make_url(dns)),
     )
+    instrument_engine(engine, settings.postgres.slow_query_threshold)
+    return engine
+
+
+@lru_cache
+def get_pool(dns: str) -> Engine:
+    """
+    Возвращает общий для процесса пул соединений к базе данных.
+
+    Хранилища, объекты пакетной записи и чтения одной базы данных
+    используют один engine, а не открывают свои соединения.
+
+    :param dns: Адрес базы данных.
+    :type dns: str
+    :return: sqlalchemy engine
+    :rtype: Engine
+    """
+    return create_pool(dns)
 
 
 def create_all_tables() -> None:
@@ -35,9 +76,29 @@ def create_all_tables() -> None:
 class DBStorage:
     """База данных."""
 
-    def __init__(self) -> None:
-        """Метод инициализации."""
-        self.pool = create_pool()
+    def __init__(self, dns: str | None = None) -> None:
+        """
+        Метод инициализации.
+
+        Реплики подключаются только к основной базе данных из настроек,
+        с таймаутом подключения, чтобы зависшая реплика не блокировала
+        запросы на время проверки.
+
+        :param dns: Адрес базы данных, по умолчанию основная база данных.
+        :type dns: str | None
+        """
+        settings = get_settings().postgres
+        replicas_dns = settings.replica_dns if dns is None else []
+        self.pool = get_pool(dns or str(settings.pg_dns))
+        self.router = ReplicaRouter(
+            primary=self.pool,
+            replicas=[
+                create_pool(str(replica), settings.replica_connect_timeout)
+                for replica in replicas_dns
+            ],
+            health_check_interval=settings.replica_health_check_interval,
+            sticky_window=settings.read_your_writes_window,
+        )
 
     async def create_user(self, user: srv.User) -> srv.User:
         """
@@ -72,18 +133,37 @@ class DBStorage:
                     detail=f"can't commit create user {user.username}",
                 ) from com_err
             srv_user = self._get_srv_user(db_user)
+        self.router.mark_written(user.username)
         return srv_user
 
     async def get_user(self, user: srv.User) -> srv.User | None:
         """
         Абстрактный метод получения токена.
 
+        Читает из реплики, если она доступна. При ошибке реплики или
+        если пользователь не найден в реплике, которая может отставать,
+        повторяет запрос в основной базе данных.
+
         :param user: объект пользователя
         :type user: User
         :return: Пользователь в базе данных
         :rtype: srv.User | None
+        :raises RepositoryError: При ошибке в основной базе данных
         """
-        with Session(self.pool) as session:
+        engine = self.router.get_reader(user.username)
+        try:
+            srv_user = self._read_user(user, engine)
+        except RepositoryError:
+            if engine is self.pool:
+                raise
+            self.router.mark_unhealthy(engine)
+            return self._read_user(user, self.pool)
+        if srv_user is None and engine is not self.pool:
+            return self._read_user(user, self.pool)
+        return srv_user
+
+    def _read_user(self, user: srv.User, engine: Engine) -> srv.User | None:
+        with Session(engine) as session:
             db_user = self._get_db_user(user, session)
             if db_user is not None:
                 return self._get_srv_user(db_user)
@@ -92,7 +172,9 @@ class DBStorage:
     def _get_db_user(self, user: srv.User, session: Session) -> db.User | None:
         try:
             return session.scalars(
-                select(db.User).where(db.User.username == user.username),
+                select(db.User).where(
+                    db.User.username == user.username,
+                ).execution_options(statement_name='get_user'),
             ).first()
         except Exception as err:
             logger.error(f"repository error can't get {user.username}")
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import closing
+from typing import Any, Sequence
+
+from psycopg2.extras import execute_values
+from sqlalchemy import Engine
+
+from app.core import models as srv
+from app.core.errors import RepositoryError
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+
+logger = logging.getLogger(__name__)
+
+lock_users_sql = """
+SELECT username, id
+FROM users
+WHERE username = ANY(%s) AND NOT is_deleted
+ORDER BY id
+FOR NO KEY UPDATE
+"""  # noqa: WPS323 psycopg2 placeholder
+ingest_sql = """
+WITH inserted AS (
+    INSERT INTO transactions (
+        id_user,
+        transaction_type,
+        amount,
+        created_at,
+        idempotency_key,
+        is_deleted
+    )
+    SELECT
+        id_user,
+        transaction_type,
+        amount,
+        coalesce(created_at, timezone('utc', now())),
+        idempotency_key,
+        false
+    FROM (VALUES %s) AS batch (
+        id_user, transaction_type, amount, created_at, idempotency_key
+    )
+    ON CONFLICT (id_user, idempotency_key)
+        WHERE idempotency_key IS NOT NULL
+        DO NOTHING
+    RETURNING
+        id_user,
+        created_at::date AS day,
+        CASE WHEN transaction_type THEN amount ELSE -amount END AS delta
+), totals AS (
+    SELECT id_user, sum(delta) AS delta
+    FROM inserted
+    GROUP BY id_user
+), updated AS (
+    UPDATE users
+    SET balance = users.balance + totals.delta
+    FROM totals
+    WHERE users.id = totals.id_user
+), rolled_up AS (
+    INSERT INTO transaction_rollups AS rollups (
+        id_user, day, transactions, deposits, withdrawals
+    )
+    SELECT
+        id_user,
+        day,
+        count(*),
+        coalesce(sum(delta) FILTER (WHERE delta > 0), 0),
+        coalesce(-sum(delta) FILTER (WHERE delta < 0), 0)
+    FROM inserted
+    GROUP BY id_user, day
+    ON CONFLICT (id_user, day) DO UPDATE
+    SET
+        transactions = rollups.transactions + excluded.transactions,
+        deposits = rollups.deposits + excluded.deposits,
+        withdrawals = rollups.withdrawals + excluded.withdrawals
+)
+SELECT count(*) FROM inserted
+"""  # noqa: WPS323 psycopg2 placeholder
+ingest_row_template = """
+(%s::integer, %s::boolean, %s::integer, %s::timestamp, %s::varchar)
+"""  # noqa: WPS323 psycopg2 placeholder
+
+TransactionRow = tuple[int, bool, int, Any, str]
+
+
+class TransactionWriter:
+    """
+    Запись пачек транзакций с обновлением балансов пользователей.
+
+    Транзакции шарда записываются одним многострочным INSERT,
+    балансы и дневные агрегаты transaction_rollups обновляются в той же
+    транзакции базы данных одним агрегированным запросом на пользователя
+    и день. Повтор транзакции с тем же
+    ключом идемпотентности пропускается и не меняет баланс.
+
+    Строки пользователей пачки блокируются заранее в порядке id,
+    поэтому параллельные пачки с общими пользователями выполняются
+    по очереди и не приводят к взаимной блокировке.
+    """
+
+    def __init__(self, engines: list[Engine] | None = None) -> None:
+        """
+        Метод инициализации.
+
+        :param engines: Шарды или основная база данных, по умолчанию
+            шарды из настроек, а если они не заданы - основная база данных.
+        :type engines: list[Engine] | None
+        """
+        self.engines = engines or get_shard_pools()
+
+    async def ingest(
+        self, transactions: Sequence[srv.Transaction],
+    ) -> srv.IngestResult:
+        """
+        Записывает пачку транзакций, не блокируя цикл событий.
+
+        :param transactions: Транзакции.
+        :type transactions: Sequence[srv.Transaction]
+        :return: Количество записанных, повторных и отклоненных транзакций.
+        :rtype: srv.IngestResult
+        """
+        return await asyncio.to_thread(self.write, transactions)
+
+    def write(
+        self, transactions: Sequence[srv.Transaction],
+    ) -> srv.IngestResult:
+        """
+        Записывает пачку транзакций и обновляет балансы пользователей.
+
+        Каждый шард фиксируется отдельно. После ошибки пачку можно
+        отправить повторно: уже записанные транзакции будут пропущены.
+        Транзакции несуществующих и удаленных пользователей отклоняются.
+        Ошибка базы данных передается как RepositoryError.
+
+        :param transactions: Транзакции.
+        :type transactions: Sequence[srv.Transaction]
+        :return: Количество записанных, повторных и отклоненных транзакций.
+        :rtype: srv.IngestResult
+        """
+        shard_batches = self._group_by_shard(transactions)
+        ingested = srv.IngestResult()
+        for shard_index, shard_batch in sorted(shard_batches.items()):
+            shard_ingested = _write_shard(
+                self.engines[shard_index], shard_batch,
+            )
+            ingested.accepted += shard_ingested.accepted
+            ingested.duplicates += shard_ingested.duplicates
+            ingested.rejected += shard_ingested.rejected
+        logger.info(f'transactions ingested: {ingested}')
+        return ingested
+
+    def _group_by_shard(
+        self, transactions: Sequence[srv.Transaction],
+    ) -> dict[int, list[srv.Transaction]]:
+        shard_batches = defaultdict(list)
+        for transaction in transactions:
+            shard_index = get_shard_index(
+                transaction.username, len(self.engines),
+            )
+            shard_batches[shard_index].append(transaction)
+        return shard_batches
+
+
+def _write_shard(
+    engine: Engine, transactions: list[srv.Transaction],
+) -> srv.IngestResult:
+    with closing(engine.raw_connection()) as connection:
+        try:
+            return _ingest(connection, transactions)
+        except Exception as err:
+            logger.error("repository error can't ingest transactions")
+            raise RepositoryError(detail="can't ingest transactions") from err
+
+
+def _ingest(
+    connection: Any, transactions: list[srv.Transaction],
+) -> srv.IngestResult:
+    cursor = connection.cursor()
+    user_ids = _lock_users(cursor, transactions)
+    rows = [
+        (
+            user_ids[transaction.username],
+            transaction.transaction_type,
+            transaction.amount,
+            transaction.created_at,
+            transaction.idempotency_key,
+        )
+        for transaction in transactions
+        if transaction.username in user_ids
+    ]
+    accepted = _insert_transactions(cursor, rows)
+    connection.commit()
+    return srv.IngestResult(
+        accepted=accepted,
+        duplicates=len(rows) - accepted,
+        rejected=len(transactions) - len(rows),
+    )
+
+
+def _lock_users(
+    cursor: Any, transactions: list[srv.Transaction],
+) -> dict[str, int]:
+    usernames = sorted({transaction.username for transaction in transactions})
+    cursor.execute(lock_users_sql, (usernames,))
+    return dict(cursor.fetchall())
+
+
+def _insert_transactions(cursor: Any, rows: list[TransactionRow]) -> int:
+    if not rows:
+        return 0
+    counts = execute_values(
+        cursor,
+        ingest_sql,
+        rows,
+        template=ingest_row_template,
+        page_size=len(rows),
+        fetch=True,
+    )
+    return int(counts[0][0])
@@ -0,0 +1,136 @@
+import logging
+from collections import defaultdict
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator, Sequence
+
+from psycopg2.extras import execute_values
+from sqlalchemy import Engine, Row, text
+
+from app.external.postgres.sharding import get_shard_index, get_shard_pools
+
+logger = logging.getLogger(__name__)
+
+VectorRow = tuple[str, bytes, bool]
+VectorBatch = Sequence[Row[Any]]
+
+update_vectors_sql = """
+UPDATE users
+SET
+    vector = batch.vector,
+    is_verified = batch.is_verified,
+    vector_updated_at = now()
+FROM (VALUES %s) AS batch (username, vector, is_verified)
+WHERE users.username = batch.username
+"""  # noqa: WPS323 psycopg2 placeholder
+select_vectors_sql = """
+SELECT
+    username,
+    CASE WHEN is_deleted THEN NULL ELSE vector END AS vector,
+    vector_updated_at
+FROM users
+"""
+all_vectors_filter = 'WHERE vector IS NOT NULL AND NOT is_deleted'
+changed_vectors_filter = 'WHERE vector_updated_at > :since'
+
+
+@dataclass(frozen=True)
+class VerificationResult:
+    """Результат верификации пользователя."""
+
+    username: str
+    vector: bytes
+    is_verified: bool
+
+
+def read_vectors(
+    engines: Sequence[Engine], since: datetime | None, batch_size: int,
+) -> Iterator[VectorBatch]:
+    """
+    Читает эмбеддинги пользователей пачками.
+
+    Без since читаются все эмбеддинги, иначе только измененные
+    после since. У удаленных пользователей эмбеддинг пустой.
+
+    :param engines: Шарды или основная база данных.
+    :type engines: Sequence[Engine]
+    :param since: Время последнего прочитанного изменения.
+    :type since: datetime | None
+    :param batch_size: Количество строк в пачке.
+    :type batch_size: int
+    :yield: Строки username, vector, vector_updated_at.
+    :ytype: VectorBatch
+    """
+    query = text(f'{select_vectors_sql}{all_vectors_filter}')
+    if since is not None:
+        query = text(f'{select_vectors_sql}{changed_vectors_filter}')
+    for engine in engines:
+        with engine.connect() as connection:
+            rows = connection.execution_options(
+                yield_per=batch_size,
+            ).execute(query, {'since': since})
+            yield from rows.partitions()
+
+
+class VectorWriter:
+    """
+    Запись эмбеддингов пользователей в базу данных пачками.
+
+    Пачка записывается одним запросом UPDATE ... FROM (VALUES ...)
+    в каждый шард, в котором есть пользователи пачки.
+    """
+
+    def __init__(self, engines: list[Engine] | None = None) -> None:
+        """
+        Метод инициализации.
+
+        :param engines: Шарды или основная база данных, по умолчанию
+            шарды из настроек, а если они не заданы - основная база данных.
+        :type engines: list[Engine] | None
+        """
+        self.engines = engines or get_shard_pools()
+
+    def write(self, verifications: list[VerificationResult]) -> int:
+        """
+        Записывает эмбеддинги и признак верификации пользователей.
+
+        Для каждого пользователя записывается последний результат пачки.
+        Возвращается после фиксации транзакций во всех шардах.
+
+        :param verifications: Результаты верификации.
+        :type verifications: list[VerificationResult]
+        :return: Количество обновленных пользователей.
+        :rtype: int
+        """
+        shard_rows = self._group_by_shard(verifications)
+        updated = sum(
+            _update_vectors(self.engines[shard_index], rows)
+            for shard_index, rows in shard_rows.items()
+        )
+        logger.info(f'{updated} user vectors updated')
+        return updated
+
+    def _group_by_shard(
+        self, verifications: list[VerificationResult],
+    ) -> dict[int, list[VectorRow]]:
+        latest = {
+            verification.username: verification
+            for verification in verifications
+        }
+        shard_rows: dict[int, list[VectorRow]] = defaultdict(list)
+        for username, verification in latest.items():
+            shard_index = get_shard_index(username, len(self.engines))
+            shard_rows[shard_index].append(
+                (username, verification.vector, verification.is_verified),
+            )
+        return shard_rows
+
+
+def _update_vectors(engine: Engine, rows: list[VectorRow]) -> int:
+    with closing(engine.raw_connection()) as connection:
+        cursor = connection.cursor()
+        execute_values(cursor, update_vectors_sql, rows, page_size=len(rows))
+        updated = cursor.rowcount
+        connection.commit()
+    return updated
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from functools import partial
+from time import monotonic
+from typing import Any
+
+from aiokafka import AIOKafkaProducer
+
+from app.external.serialization import Headers
+from app.metrics.kafka import get_kafka_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Publisher:
+    """
+    Публикация сообщений в kafka без ожидания подтверждения.
+
+    Сообщения копятся в пачки внутри AIOKafkaProducer
+    согласно linger_ms и max_batch_size. Подтверждение доставки
+    обрабатывается в callback future, возвращенного send().
+    Количество неподтвержденных сообщений ограничено max_in_flight:
+    при заполнении очереди publish ждет подтверждения доставки.
+    """
+
+    def __init__(
+        self,
+        producer: AIOKafkaProducer,
+        topic: str,
+        max_in_flight: int,
+        headers: Headers | None = None,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param producer: Producer kafka.
+        :type producer: AIOKafkaProducer
+        :param topic: Топик kafka.
+        :type topic: str
+        :param max_in_flight: Максимум неподтвержденных сообщений.
+        :type max_in_flight: int
+        :param headers: Заголовки каждого сообщения.
+        :type headers: Headers | None
+        """
+        self.producer = producer
+        self.topic = topic
+        self.headers = headers or []
+        self.in_flight = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def publish(
+        self,
+        message: Any,
+        headers: Headers | None = None,
+        key: bytes | None = None,
+    ) -> asyncio.Future[Any]:
+        """
+        Ставит сообщение в очередь на отправку.
+
+        Ждет только свободного места в очереди, но не подтверждения
+        брокером. Ошибки доставки записываются в лог и метрики.
+
+        :param message: Сообщение.
+        :type message: Any
+        :param headers: Заголовки сообщения в дополнение к общим.
+        :type headers: Headers | None
+        :param key: Ключ партиционирования, None для случайной партиции.
+        :type key: bytes | None
+        :return: Future, завершающийся при подтверждении доставки.
+        :rtype: asyncio.Future[Any]
+        """
+        await self._slots.acquire()
+        started = monotonic()
+        delivery = await self._send(
+            message, self.headers + (headers or []), key,
+        )
+        self._set_in_flight(self.in_flight + 1)
+        delivery.add_done_callback(partial(self._on_delivery, started))
+        return delivery
+
+    async def flush(self) -> None:
+        """Ждет отправки всех сообщений из очереди."""
+        await self.producer.flush()
+
+    async def _send(
+        self, message: Any, headers: Headers, key: bytes | None,
+    ) -> asyncio.Future[Any]:
+        try:
+            delivery: asyncio.Future[Any] = await self.producer.send(
+                self.topic, message, key=key, headers=headers,
+            )
+        except BaseException:  # noqa: WPS424 free the slot on cancel too
+            self._slots.release()
+            raise
+        return delivery
+
+    def _on_delivery(self, started: float, delivery: asyncio.Future[Any]):
+        self._slots.release()
+        self._set_in_flight(self.in_flight - 1)
+        metrics = get_kafka_metrics()
+        if delivery.cancelled() or delivery.exception() is not None:
+            metrics.inc_delivery_errors(self.topic)
+            logger.error(f'message to {self.topic} not delivered')
+            return
+        metrics.observe_delivery(self.topic, monotonic() - started)
+
+    def _set_in_flight(self, in_flight: int) -> None:
+        self.in_flight = in_flight
+        get_kafka_metrics().observe_in_flight(self.topic, in_flight)
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import StrEnum
+from typing import Any, Iterable, Sequence
+
+ReportRow = tuple[int, datetime, bool, int]
+
+csv_columns = (
+    'id', 'created_at', 'transaction_type', 'amount', 'balance_change',
+)
+deposit_type = 'deposit'
+withdrawal_type = 'withdrawal'
+
+
+class ReportFormat(StrEnum):
+    """Формат отчета."""
+
+    csv = 'csv'
+    ndjson = 'ndjson'
+
+    @property
+    def media_type(self) -> str:
+        """
+        Возвращает тип содержимого ответа.
+
+        :return: MIME тип формата.
+        :rtype: str
+        """
+        if self is ReportFormat.csv:
+            return 'text/csv'
+        return 'application/x-ndjson'
+
+
+@dataclass
+class ReportTotals:
+    """
+    Итоги отчета, накапливаемые по мере чтения транзакций.
+
+    Attributes:
+        report_id: int - идентификатор отчета.
+        transactions: int - количество транзакций.
+        deposits: int - сумма пополнений.
+        withdrawals: int - сумма списаний.
+        balance_change: int - изменение баланса за период.
+    """
+
+    report_id: int
+    transactions: int = 0
+    deposits: int = 0
+    withdrawals: int = 0
+    balance_change: int = 0
+
+
+def encode_header(report_format: ReportFormat) -> bytes:
+    """
+    Кодирует начало отчета.
+
+    :param report_format: Формат отчета.
+    :type report_format: ReportFormat
+    :return: Строка заголовков CSV или пустая строка для NDJSON.
+    :rtype: bytes
+    """
+    if report_format is ReportFormat.ndjson:
+        return b''
+    return _encode_csv([csv_columns])
+
+
+def encode_rows(
+    rows: Sequence[ReportRow],
+    totals: ReportTotals,
+    report_format: ReportFormat,
+) -> bytes:
+    """
+    Кодирует страницу транзакций и добавляет их в итоги.
+
+    Каждая строка содержит изменение баланса с начала периода,
+    поэтому последняя строка CSV совпадает с итогом отчета.
+
+    :param rows: Строки id, created_at, transaction_type, amount.
+    :type rows: Sequence[ReportRow]
+    :param totals: Итоги отчета.
+    :type totals: ReportTotals
+    :param report_format: Формат отчета.
+    :type report_format: ReportFormat
+    :return: Закодированная страница.
+    :rtype: bytes
+    """
+    records = []
+    for row in rows:
+        totals.transactions += 1
+        if row[2]:
+            totals.deposits += row[3]
+        else:
+            totals.withdrawals += row[3]
+        totals.balance_change = totals.deposits - totals.withdrawals
+        records.append((
+            row[0],
+            row[1].isoformat(),
+            deposit_type if row[2] else withdrawal_type,
+            row[3],
+            totals.balance_change,
+        ))
+    if report_format is ReportFormat.csv:
+        return _encode_csv(records)
+    return _encode_ndjson(
+        dict(zip(csv_columns, record)) for record in records
+    )
+
+
+def encode_totals(totals: ReportTotals, report_format: ReportFormat) -> bytes:
+    """
+    Кодирует окончание отчета.
+
+    :param totals: Итоги отчета.
+    :type totals: ReportTotals
+    :param report_format: Формат отчета.
+    :type report_format: ReportFormat
+    :return: Строка итогов NDJSON или пустая строка для CSV.
+    :rtype: bytes
+    """
+    if report_format is ReportFormat.csv:
+        return b''
+    return _encode_ndjson([{'totals': asdict(totals)}])
+
+
+def _encode_csv(records: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(records)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(records: Iterable[dict[str, Any]]) -> bytes:
+    lines = '\n'.join(json.dumps(record) for record in records)
+    return f'{lines}\n'.encode()
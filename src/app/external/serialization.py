@@ -0,0 +1,112 @@
+import importlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+from aiokafka import codec as kafka_codec
+
+from app.core.errors import ConfigError
+
+logger = logging.getLogger(__name__)
+
+schema_version = 1
+content_type_header = 'content-type'
+schema_version_header = 'schema-version'
+no_compression = 'none'
+optional_serializers = frozenset(('orjson', 'msgpack'))
+not_installed = 'kafka {0} {1} is not installed'
+
+Headers = list[tuple[str, bytes]]
+
+
+@dataclass(frozen=True)
+class Serializer:
+    """Формат сообщений kafka."""
+
+    content_type: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+    @property
+    def headers(self) -> Headers:
+        """
+        Заголовки сообщения kafka с форматом и версией схемы.
+
+        :return: Заголовки сообщения.
+        :rtype: Headers
+        """
+        return [
+            (content_type_header, self.content_type.encode()),
+            (schema_version_header, str(schema_version).encode()),
+        ]
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    Возвращает формат сообщений по имени из настроек.
+
+    orjson и msgpack устанавливаются отдельно,
+    и импортируются только при выборе соответствующего формата.
+
+    :param name: Имя формата: json, orjson или msgpack.
+    :type name: str
+    :return: Формат сообщений.
+    :rtype: Serializer
+    :raises ConfigError: Если формат неизвестен или не установлен.
+    """
+    if name == 'json':
+        return Serializer(
+            content_type='application/json',
+            dumps=lambda message: json.dumps(message).encode(),
+            loads=json.loads,
+        )
+    if name not in optional_serializers:
+        raise ConfigError(detail=f'unknown kafka serializer {name}')
+    try:
+        module = importlib.import_module(name)
+    except ImportError as import_err:
+        detail = not_installed.format('serializer', name)
+        logger.critical(detail)
+        raise ConfigError(detail=detail) from import_err
+    if name == 'orjson':
+        return Serializer('application/json', module.dumps, module.loads)
+    return Serializer('application/msgpack', module.packb, module.unpackb)
+
+
+def get_compression_type(codec: str) -> str | None:
+    """
+    Возвращает тип сжатия для AIOKafkaProducer.
+
+    :param codec: Имя кодека: none, gzip, snappy, lz4 или zstd.
+    :type codec: str
+    :return: Тип сжатия, None без сжатия.
+    :rtype: str | None
+    :raises ConfigError: Если библиотека кодека не установлена.
+    """
+    if codec == no_compression:
+        return None
+    is_available = getattr(kafka_codec, f'has_{codec}')
+    if not is_available():
+        detail = not_installed.format('compression', codec)
+        logger.critical(detail)
+        raise ConfigError(detail=detail)
+    return codec
+
+
+def deserialize(message_value: bytes, headers: Sequence[tuple[str, bytes]]):
+    """
+    Десериализирует сообщение по заголовку content-type.
+
+    Сообщения без заголовков считаются JSON первой версии схемы.
+
+    :param message_value: Сериализированное сообщение.
+    :type message_value: bytes
+    :param headers: Заголовки сообщения kafka.
+    :type headers: Sequence[tuple[str, bytes]]
+    :return: Сообщение.
+    """
+    content_type = dict(headers).get(content_type_header, b'')
+    if content_type == b'application/msgpack':
+        return get_serializer('msgpack').loads(message_value)
+    return json.loads(message_value)
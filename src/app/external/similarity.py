@@ -0,0 +1,342 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Self, Sequence
+
+import numpy as np
+
+from app.external.embeddings import normalize_embedding, top_k, vector_dtype
+from app.external.snapshots import (
+    create_snapshot,
+    read_header,
+    read_names,
+    write_header,
+    write_names,
+)
+
+logger = logging.getLogger(__name__)
+
+snapshot_magic = b'USRVEC01'
+search_chunk_rows = 65536
+min_tail_rows = 1024
+watermark_field = 'watermark'
+
+Match = tuple[str, float]
+Chunk = tuple[np.ndarray, np.ndarray]
+
+
+class VectorRows:
+    """
+    Строки матрицы эмбеддингов.
+
+    Строки снимка хранятся в отображенной в память матрице,
+    новые строки - в матрице в памяти, емкость которой растет вдвое.
+    Освобожденные строки обнуляются и занимаются новыми в первую очередь.
+
+    Attributes:
+        base: np.ndarray - матрица строк снимка.
+        dimension: int - размерность эмбеддингов.
+        size: int - количество занятых и освобожденных строк.
+        free: list[int] - освобожденные строки.
+    """
+
+    def __init__(self, base: np.ndarray) -> None:
+        """
+        Метод инициализации.
+
+        :param base: Матрица строк снимка.
+        :type base: np.ndarray
+        """
+        self.base = base
+        self.dimension = base.shape[1]
+        self.size = len(base)
+        self.free: list[int] = []
+        self._tail = np.empty((0, self.dimension), dtype=vector_dtype)
+
+    def allocate(self) -> int:
+        """
+        Выделяет строку под новый эмбеддинг.
+
+        :return: Номер строки.
+        :rtype: int
+        """
+        if self.free:
+            return self.free.pop()
+        tail_size = self.size - len(self.base)
+        if tail_size == len(self._tail):
+            capacity = max(tail_size, min_tail_rows)
+            extension = np.empty((capacity, self.dimension), vector_dtype)
+            self._tail = np.concatenate((self._tail, extension))
+        self.size += 1
+        return self.size - 1
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Записывает эмбеддинги в строки.
+
+        :param rows: Номера строк.
+        :type rows: np.ndarray
+        :param vectors: Эмбеддинги по строкам.
+        :type vectors: np.ndarray
+        """
+        in_base = rows < len(self.base)
+        in_tail = ~in_base
+        tail_rows = rows[in_tail] - len(self.base)
+        self.base[rows[in_base]] = vectors[in_base]
+        self._tail[tail_rows] = vectors[in_tail]
+
+    def release(self, rows: list[int]) -> None:
+        """
+        Освобождает строки.
+
+        :param rows: Номера строк.
+        :type rows: list[int]
+        """
+        self.assign(
+            np.array(rows, dtype=np.int64),
+            np.zeros((len(rows), self.dimension), dtype=vector_dtype),
+        )
+        self.free.extend(rows)
+
+    def chunks(self, chunk_rows: int) -> Iterator[Chunk]:
+        """
+        Перебирает строки непрерывными фрагментами без копирования.
+
+        :param chunk_rows: Максимальное количество строк во фрагменте.
+        :type chunk_rows: int
+        :yield: Номера строк фрагмента и фрагмент матрицы.
+        :ytype: Chunk
+        """
+        for offset, matrix in self._segments():
+            for start in range(0, len(matrix), chunk_rows):
+                chunk = matrix[start:start + chunk_rows]
+                yield np.arange(len(chunk)) + (offset + start), chunk
+
+    def _segments(self) -> list[tuple[int, np.ndarray]]:
+        tail = self._tail[:self.size - len(self.base)]
+        return [(0, self.base), (len(self.base), tail)]
+
+
+class SimilarityIndex:
+    """
+    Индекс эмбеддингов пользователей для поиска по косинусной близости.
+
+    Эмбеддинги хранятся в непрерывной матрице float32. Матрица снимка
+    отображается в память без чтения файла, измененные строки копируются
+    в память процесса при записи, файл снимка не меняется. Поиск
+    умножает пачку запросов на матрицу фрагментами по search_chunk_rows
+    строк, поэтому память под оценки не зависит от размера индекса.
+
+    Attributes:
+        positions: dict[str, int] - строка эмбеддинга каждого пользователя.
+        watermark: datetime | None - время последнего учтенного изменения.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        usernames: list[str],
+        watermark: datetime | None = None,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param vectors: Эмбеддинги единичной длины по строкам.
+        :type vectors: np.ndarray
+        :param usernames: Имена пользователей строк.
+        :type usernames: list[str]
+        :param watermark: Время последнего учтенного изменения.
+        :type watermark: datetime | None
+        """
+        self.positions = {
+            username: row for row, username in enumerate(usernames)
+        }
+        self.watermark = watermark
+        self._usernames = list(usernames)
+        self._rows = VectorRows(vectors)
+
+    @classmethod
+    def load(cls, path: Path) -> Self:
+        """
+        Загружает индекс из снимка, отображая матрицу в память.
+
+        :param path: Путь к снимку.
+        :type path: Path
+        :return: Индекс.
+        :rtype: Self
+        """
+        return cls(*read_snapshot(path))
+
+    def save(self, path: Path) -> None:
+        """
+        Сохраняет снимок индекса.
+
+        Освобожденные строки в снимок не попадают.
+        Снимок заменяется атомарно.
+
+        :param path: Путь к снимку.
+        :type path: Path
+        """
+        watermark = self.watermark and self.watermark.isoformat()
+        with create_snapshot(path) as snapshot:
+            write_header(snapshot, snapshot_magic, {
+                'dimension': self._rows.dimension,
+                'count': len(self.positions),
+                watermark_field: watermark,
+            })
+            for rows, chunk in self._rows.chunks(search_chunk_rows):
+                is_used = [bool(self._usernames[row]) for row in rows]
+                snapshot.write(np.compress(is_used, chunk, axis=0).tobytes())
+            write_names(snapshot, filter(None, self._usernames))
+        logger.info(f'vector index snapshot saved to {path}')
+
+    def upsert(self, usernames: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Добавляет или заменяет эмбеддинги пользователей.
+
+        :param usernames: Имена пользователей.
+        :type usernames: Sequence[str]
+        :param vectors: Эмбеддинги пользователей по строкам.
+        :type vectors: np.ndarray
+        """
+        latest = {username: index for index, username in enumerate(usernames)}
+        for username in latest.keys() - self.positions.keys():
+            row = self._rows.allocate()
+            self.positions[username] = row
+            if row == len(self._usernames):
+                self._usernames.append(username)
+            else:
+                self._usernames[row] = username
+        self._rows.assign(
+            np.array([self.positions[name] for name in latest]),
+            normalize_embedding(vectors[list(latest.values())]),
+        )
+
+    def remove(self, usernames: Sequence[str]) -> None:
+        """
+        Удаляет эмбеддинги пользователей.
+
+        :param usernames: Имена пользователей.
+        :type usernames: Sequence[str]
+        """
+        rows = [
+            self.positions.pop(username)
+            for username in usernames
+            if username in self.positions
+        ]
+        for row in rows:
+            self._usernames[row] = ''
+        self._rows.release(rows)
+
+    def apply_changes(self, changes: Sequence[Any]) -> None:
+        """
+        Применяет изменения эмбеддингов, прочитанные из базы данных.
+
+        Пустой эмбеддинг и эмбеддинг другой размерности удаляются.
+
+        :param changes: Строки username, vector, vector_updated_at.
+        :type changes: Sequence[Any]
+        """
+        row_size = self._rows.dimension * vector_dtype.itemsize
+        live = [
+            change
+            for change in changes
+            if change.vector is not None and len(change.vector) == row_size
+        ]
+        live_usernames = [change.username for change in live]
+        self.remove(list(
+            {change.username for change in changes} - set(live_usernames),
+        ))
+        if live:
+            vectors = np.frombuffer(
+                b''.join(change.vector for change in live), dtype=vector_dtype,
+            )
+            self.upsert(live_usernames, vectors.reshape(len(live), -1))
+        self.watermark = max(
+            filter(None, [self.watermark, *(
+                change.vector_updated_at for change in changes
+            )]),
+            default=None,
+        )
+
+    def search(self, queries: np.ndarray, limit: int) -> list[list[Match]]:
+        """
+        Ищет limit самых близких пользователей для каждого запроса.
+
+        :param queries: Эмбеддинги запросов по строкам или один эмбеддинг.
+        :type queries: np.ndarray
+        :param limit: Количество пользователей в ответе.
+        :type limit: int
+        :return: Имена пользователей и косинусная близость по убыванию.
+        :rtype: list[list[Match]]
+        """
+        queries = normalize_embedding(np.atleast_2d(queries))
+        top_scores, top_rows = _search_rows(
+            self._rows, queries, limit + len(self._rows.free),
+        )
+        return [
+            _get_matches(self._usernames, scores, rows)[:limit]
+            for scores, rows in zip(top_scores, top_rows)
+        ]
+
+
+def read_snapshot(
+    path: Path,
+) -> tuple[np.ndarray, list[str], datetime | None]:
+    """
+    Читает снимок индекса, отображая матрицу эмбеддингов в память.
+
+    Матрица открывается в режиме копирования при записи.
+
+    :param path: Путь к снимку.
+    :type path: Path
+    :return: Эмбеддинги по строкам, имена пользователей строк и время
+        последнего учтенного изменения.
+    :rtype: tuple[np.ndarray, list[str], datetime | None]
+    """
+    with open(path, 'rb') as snapshot:
+        header = read_header(snapshot, snapshot_magic)
+        vectors = _map_vectors(path, header)
+        snapshot.seek(header['data_offset'] + vectors.nbytes)
+        usernames = read_names(snapshot)
+    watermark = header[watermark_field]
+    if watermark is not None:
+        watermark = datetime.fromisoformat(watermark)
+    return vectors, usernames, watermark
+
+
+def _map_vectors(path: Path, header: dict[str, Any]) -> np.ndarray:
+    shape = (header['count'], header['dimension'])
+    if not header['count']:
+        return np.zeros(shape, dtype=vector_dtype)
+    return np.memmap(
+        path,
+        dtype=vector_dtype,
+        mode='c',
+        offset=header['data_offset'],
+        shape=shape,
+    )
+
+
+def _search_rows(
+    vector_rows: VectorRows, queries: np.ndarray, limit: int,
+) -> Chunk:
+    found = [
+        top_k(queries @ chunk.T, rows, limit)
+        for rows, chunk in vector_rows.chunks(search_chunk_rows)
+    ]
+    if not found:
+        scores = np.empty((len(queries), 0), dtype=vector_dtype)
+        return scores, scores.astype(np.int64)
+    scores, rows = (np.hstack(part) for part in zip(*found))
+    return top_k(scores, rows, limit)
+
+
+def _get_matches(
+    usernames: list[str], scores: np.ndarray, rows: np.ndarray,
+) -> list[Match]:
+    return [
+        (usernames[row], float(score))
+        for score, row in zip(scores, rows)
+        if usernames[row]
+    ]
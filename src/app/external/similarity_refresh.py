@@ -0,0 +1,76 @@
+import argparse
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import Engine
+
+from app.core.config.config import get_settings
+from app.external.embeddings import embedding_dimension, vector_dtype
+from app.external.postgres.sharding import get_shard_pools
+from app.external.postgres.vectors import read_vectors
+from app.external.similarity import SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_index(
+    index: SimilarityIndex,
+    engines: Sequence[Engine],
+    batch_size: int,
+    overlap: float,
+) -> int:
+    """
+    Обновляет индекс изменениями эмбеддингов из базы данных.
+
+    Пустой индекс загружается целиком. Иначе читаются изменения после
+    watermark индекса с запасом overlap секунд на транзакции,
+    зафиксированные позже, чем началась их запись.
+
+    :param index: Индекс.
+    :type index: SimilarityIndex
+    :param engines: Шарды или основная база данных.
+    :type engines: Sequence[Engine]
+    :param batch_size: Количество строк в пачке.
+    :type batch_size: int
+    :param overlap: Запас времени для повторного чтения изменений, сек.
+    :type overlap: float
+    :return: Количество прочитанных изменений.
+    :rtype: int
+    """
+    since = index.watermark
+    if since is not None:
+        since -= timedelta(seconds=overlap)
+    changed = 0
+    for changes in read_vectors(engines, since, batch_size):
+        index.apply_changes(changes)
+        changed += len(changes)
+    logger.info(f'{changed} vector changes applied since {since}')
+    return changed
+
+
+def main() -> None:
+    """Обновляет снимок индекса эмбеддингов из командной строки."""
+    parser = argparse.ArgumentParser(description='Снимок индекса эмбеддингов.')
+    parser.add_argument('--snapshot', default=None)
+    settings = get_settings().similarity
+    path = Path(parser.parse_args().snapshot or settings.snapshot_path)
+    index = SimilarityIndex(
+        np.zeros((0, embedding_dimension), dtype=vector_dtype), [],
+    )
+    if path.exists():
+        index = SimilarityIndex.load(path)
+    refresh_index(
+        index,
+        get_shard_pools(),
+        batch_size=settings.refresh_batch_size,
+        overlap=settings.refresh_overlap,
+    )
+    index.save(path)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,127 @@
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Literal
+
+header_length_size = 4
+byte_order: Literal['little'] = 'little'
+data_alignment = 64
+name_separator = '\0'
+temp_suffix = '.tmp'
+
+
+def get_aligned_size(size: int) -> int:
+    """
+    Округляет размер вверх до границы выравнивания данных снимка.
+
+    :param size: Размер в байтах.
+    :type size: int
+    :return: Выровненный размер в байтах.
+    :rtype: int
+    """
+    return size + (-size % data_alignment)
+
+
+@contextmanager
+def create_snapshot(path: Path) -> Iterator[BinaryIO]:
+    """
+    Открывает снимок на запись и атомарно заменяет им прежний снимок.
+
+    Данные пишутся во временный файл рядом со снимком, который
+    переименовывается после fsync, поэтому читатели никогда
+    не видят недописанный снимок.
+
+    :param path: Путь к снимку.
+    :type path: Path
+    :yield: Временный файл снимка.
+    :ytype: BinaryIO
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(temp_suffix)
+    with open(temp_path, 'wb') as snapshot:
+        yield snapshot
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temp_path, path)
+
+
+def write_header(
+    snapshot: BinaryIO, magic: bytes, header: dict[str, Any],
+) -> None:
+    """
+    Записывает сигнатуру и заголовок снимка.
+
+    После заголовка файл дополняется до границы выравнивания,
+    чтобы данные можно было отобразить в память.
+
+    :param snapshot: Файл снимка.
+    :type snapshot: BinaryIO
+    :param magic: Сигнатура формата снимка.
+    :type magic: bytes
+    :param header: Заголовок, сериализуемый в JSON.
+    :type header: dict[str, Any]
+    """
+    header_bytes = json.dumps(header).encode()
+    snapshot.write(magic)
+    snapshot.write(len(header_bytes).to_bytes(header_length_size, byte_order))
+    snapshot.write(header_bytes)
+    write_padding(snapshot)
+
+
+def read_header(snapshot: BinaryIO, magic: bytes) -> dict[str, Any]:
+    """
+    Читает заголовок снимка и переходит к началу данных.
+
+    :param snapshot: Файл снимка.
+    :type snapshot: BinaryIO
+    :param magic: Ожидаемая сигнатура формата снимка.
+    :type magic: bytes
+    :return: Заголовок и смещение данных в поле data_offset.
+    :rtype: dict[str, Any]
+    :raises ValueError: Если файл не является снимком этого формата.
+    """
+    if snapshot.read(len(magic)) != magic:
+        raise ValueError(f'{snapshot.name} is not a {magic!r} snapshot')
+    header_size = int.from_bytes(
+        snapshot.read(header_length_size), byte_order,
+    )
+    header: dict[str, Any] = json.loads(snapshot.read(header_size))
+    header['data_offset'] = get_aligned_size(snapshot.tell())
+    snapshot.seek(header['data_offset'])
+    return header
+
+
+def write_padding(snapshot: BinaryIO) -> None:
+    """
+    Дополняет файл нулями до границы выравнивания.
+
+    :param snapshot: Файл снимка.
+    :type snapshot: BinaryIO
+    """
+    snapshot.write(bytes(-snapshot.tell() % data_alignment))
+
+
+def write_names(snapshot: BinaryIO, names: Iterable[str]) -> None:
+    """
+    Записывает имена в конец снимка.
+
+    :param snapshot: Файл снимка.
+    :type snapshot: BinaryIO
+    :param names: Непустые имена без символа name_separator.
+    :type names: Iterable[str]
+    """
+    snapshot.write(name_separator.join(names).encode())
+
+
+def read_names(snapshot: BinaryIO) -> list[str]:
+    """
+    Читает имена с текущей позиции до конца снимка.
+
+    :param snapshot: Файл снимка.
+    :type snapshot: BinaryIO
+    :return: Имена.
+    :rtype: list[str]
+    """
+    names = snapshot.read().decode()
+    return names.split(name_separator) if names else []
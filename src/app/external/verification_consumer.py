@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import signal
+from pathlib import Path
+from time import monotonic
+from typing import Any
+
+import brotli
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
+from aiokafka.abc import ConsumerRebalanceListener
+
+from app.core.config.config import get_settings
+from app.external.content_store import acknowledge_image
+from app.external.embeddings import (
+    compute_placeholder_embedding,
+    pack_embedding,
+    read_embedding,
+)
+from app.external.images import brotli_encoding
+from app.external.payloads import PayloadKey, read_inline_image
+from app.external.postgres.vectors import VectorWriter, VerificationResult
+from app.external.serialization import deserialize
+
+logger = logging.getLogger(__name__)
+
+milliseconds = 1000
+skipped_message = 'message {0} at offset {1} skipped: {2}'
+
+
+def read_result(message: dict[str, Any]) -> VerificationResult:
+    """
+    Возвращает результат верификации из сообщения kafka.
+
+    Эмбеддинг модели верификации из сообщения принимается как есть,
+    иначе по изображению вычисляется заглушка эмбеддинга, которая
+    не подходит для поиска пользователя по лицу. Результат
+    верификации должен быть указан в сообщении явно.
+
+    :param message: Сообщение kafka.
+    :type message: dict[str, Any]
+    :return: Результат верификации.
+    :rtype: VerificationResult
+    :raises ValueError: В сообщении нет результата верификации.
+    """
+    is_verified = message.get(PayloadKey.is_verified)
+    if not isinstance(is_verified, bool):
+        raise ValueError(f'no verification result: {is_verified}')
+    embedding = message.get(PayloadKey.embedding)
+    if embedding is None:
+        vector = compute_placeholder_embedding(_read_image(message))
+    else:
+        vector = read_embedding(embedding)
+    return VerificationResult(
+        username=message[PayloadKey.username],
+        vector=pack_embedding(vector),
+        is_verified=is_verified,
+    )
+
+
+class VerificationBatch:
+    """Пачка результатов верификации, ожидающая записи."""
+
+    def __init__(self, flush_at: float) -> None:
+        """
+        Метод инициализации.
+
+        :param flush_at: Время записи пачки по monotonic.
+        :type flush_at: float
+        """
+        self.flush_at = flush_at
+        self.verifications: list[VerificationResult] = []
+        self.images: list[str] = []
+        self.consumed = 0
+
+    def extend(self, records: list[ConsumerRecord]) -> None:
+        """
+        Добавляет сообщения kafka в пачку.
+
+        :param records: Сообщения kafka из одной партиции.
+        :type records: list[ConsumerRecord]
+        """
+        for record in records:
+            self.add(record)
+
+    def add(self, record: ConsumerRecord) -> None:
+        """
+        Добавляет сообщение kafka в пачку.
+
+        Сообщение, которое нельзя обработать, пропускается,
+        чтобы не останавливать чтение партиции. Изображение такого
+        сообщения не подтверждается и остается на диске.
+
+        :param record: Сообщение kafka.
+        :type record: ConsumerRecord
+        """
+        self.consumed += 1
+        try:
+            message = deserialize(record.value, record.headers)
+        except Exception as deserialize_err:
+            logger.warning(skipped_message.format(
+                record.partition, record.offset, deserialize_err,
+            ))
+            return
+        try:
+            self.verifications.append(read_result(message))
+        except Exception as read_err:
+            logger.warning(skipped_message.format(
+                record.partition, record.offset, read_err,
+            ))
+            return
+        if message.get(PayloadKey.file_path):
+            self.images.append(message[PayloadKey.file_path])
+
+
+class VerificationConsumer:
+    """
+    Запись результатов верификации из kafka в базу данных.
+
+    Сообщения копятся в пачку, пока она не наберет batch_size
+    сообщений или не пройдет flush_interval секунд с первого
+    сообщения пачки. Пачка записывается в базу данных, и только
+    после фиксации транзакции фиксируются смещения kafka и
+    подтверждаются файлы изображений. Сообщения читаются из топика
+    результатов верификатора, а не из топика загрузок сервиса, поэтому
+    изображение подтверждается только после настоящей верификации.
+    При сбое пачка будет прочитана повторно, запись эмбеддинга
+    идемпотентна.
+    """
+
+    def __init__(
+        self,
+        consumer: AIOKafkaConsumer,
+        writer: VectorWriter,
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        """
+        Метод инициализации.
+
+        :param consumer: kafka consumer.
+        :type consumer: AIOKafkaConsumer
+        :param writer: Запись эмбеддингов в базу данных.
+        :type writer: VectorWriter
+        :param batch_size: Максимальное количество сообщений в пачке.
+        :type batch_size: int
+        :param flush_interval: Максимальное время накопления пачки, сек.
+        :type flush_interval: float
+        """
+        self.consumer = consumer
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._batch = VerificationBatch(flush_at=monotonic())
+        self._lock = asyncio.Lock()
+
+    async def start(self, topic: str) -> None:
+        """
+        Подписывается на топик и подключается к kafka.
+
+        :param topic: Топик с результатами верификации.
+        :type topic: str
+        """
+        self.consumer.subscribe([topic], listener=_FlushOnRevoke(self))
+        await self.consumer.start()
+
+    async def run(self) -> None:
+        """Обрабатывает сообщения до отмены задачи."""
+        while True:  # noqa: WPS457 stopped by task cancellation
+            timeout = self.flush_interval
+            if self._batch.consumed:
+                timeout = max(self._batch.flush_at - monotonic(), 0)
+            batches = await self.consumer.getmany(
+                timeout_ms=int(timeout * milliseconds),
+                max_records=self.batch_size - self._batch.consumed,
+            )
+            async with self._lock:
+                await self._consume(list(batches.values()))
+
+    async def flush(self) -> None:
+        """Записывает накопленную пачку и фиксирует смещения kafka."""
+        async with self._lock:
+            await self._flush()
+
+    async def stop(self) -> None:
+        """Записывает накопленную пачку и отключается от kafka."""
+        try:
+            await self.flush()
+        except Exception as exc:
+            logger.warning(f'batch is not flushed on stop: {exc}')
+        await self.consumer.stop()
+
+    async def _consume(self, batches: list[list[ConsumerRecord]]) -> None:
+        if not self._batch.consumed:
+            self._batch.flush_at = monotonic() + self.flush_interval
+        for records in batches:
+            await asyncio.to_thread(self._batch.extend, records)
+        is_full = self._batch.consumed >= self.batch_size
+        if is_full or monotonic() >= self._batch.flush_at:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        batch = self._batch
+        if not batch.consumed:
+            return
+        if batch.verifications:
+            await asyncio.to_thread(self.writer.write, batch.verifications)
+        await self.consumer.commit()
+        self._batch = VerificationBatch(flush_at=monotonic())
+        for file_path in batch.images:
+            acknowledge_image(file_path)
+        logger.info(f'{batch.consumed} verification messages committed')
+
+
+class _FlushOnRevoke(ConsumerRebalanceListener):
+    def __init__(self, consumer: VerificationConsumer) -> None:
+        self.consumer = consumer
+
+    async def on_partitions_revoked(
+        self, revoked: list[TopicPartition],
+    ) -> None:
+        await self.consumer.flush()
+
+    async def on_partitions_assigned(
+        self, assigned: list[TopicPartition],
+    ) -> None:
+        logger.info(f'partitions assigned: {assigned}')
+
+
+async def run_consumer() -> None:
+    """Обрабатывает результаты верификации до сигнала остановки."""
+    settings = get_settings().kafka
+    consumer = VerificationConsumer(
+        AIOKafkaConsumer(
+            bootstrap_servers=settings.instance,
+            group_id=settings.consumer_group,
+            enable_auto_commit=False,
+            auto_offset_reset='earliest',
+        ),
+        VectorWriter(),
+        batch_size=settings.consumer_batch_size,
+        flush_interval=settings.consumer_flush_interval,
+    )
+    await consumer.start(settings.results_topic)
+    task = asyncio.current_task()
+    if task is not None:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, task.cancel)
+    try:
+        await consumer.run()
+    except asyncio.CancelledError:
+        logger.info('verification consumer is stopping')
+    finally:
+        await consumer.stop()
+
+
+def main() -> None:
+    """Запускает consumer результатов верификации из командной строки."""
+    asyncio.run(run_consumer())
+
+
+def _read_image(message: dict[str, Any]) -> bytes:
+    image: bytes
+    if PayloadKey.image in message:
+        image = read_inline_image(message)
+    else:
+        image = Path(message[PayloadKey.file_path]).read_bytes()
+        if message.get(PayloadKey.content_encoding) == brotli_encoding:
+            image = brotli.decompress(image)
+    return image
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,110 @@
+import logging
+from functools import lru_cache
+
+from prometheus_client import Counter, Histogram
+
+from app.core.config.config import get_settings
+from app.metrics.metrics import SERVICE_PREFIX, Label
+
+logger = logging.getLogger(__name__)
+
+
+class NoneImageMetrics:
+    """Заглушка сбора метрик хранилища изображений."""
+
+    def observe_image(
+        self, encoding: str, size: int, stored_size: int, cpu_time: float,
+    ) -> None:
+        """
+        Метод сбора метрик сохраненного изображения.
+
+        :param encoding: Кодировка файла, br или identity.
+        :type encoding: str
+        :param size: Размер загруженного изображения.
+        :type size: int
+        :param stored_size: Размер файла на диске.
+        :type stored_size: int
+        :param cpu_time: Время CPU на сжатие.
+        :type cpu_time: float
+        """
+        logger.debug(self.observe_image.__name__)
+
+    def inc_deduplicated(self, encoding: str) -> None:
+        """
+        Метод сбора метрик изображений, найденных в хранилище.
+
+        :param encoding: Кодировка файла, br или identity.
+        :type encoding: str
+        """
+        logger.debug(self.inc_deduplicated.__name__)
+
+
+class PrometheusImageMetrics:
+    """Сбор метрик хранилища изображений prometheus."""
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        self.compression_ratio = Histogram(
+            name=f'{SERVICE_PREFIX}_image_compression_ratio',
+            documentation='Stored size to uploaded size ratio',
+            labelnames=[Label.encoding],
+            buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 1, 1.05),
+        )
+        self.compression_cpu = Histogram(
+            name=f'{SERVICE_PREFIX}_image_compression_cpu_seconds',
+            documentation='CPU time spent compressing an image',
+            labelnames=[Label.encoding],
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+        )
+        self.stored_bytes = Counter(
+            name=f'{SERVICE_PREFIX}_image_stored_bytes',
+            documentation='Total number of image bytes written to storage',
+            labelnames=[Label.encoding],
+        )
+        self.deduplicated = Counter(
+            name=f'{SERVICE_PREFIX}_image_deduplicated',
+            documentation='Total number of uploads already in storage',
+            labelnames=[Label.encoding],
+        )
+
+    def observe_image(
+        self, encoding: str, size: int, stored_size: int, cpu_time: float,
+    ) -> None:
+        """
+        Метод сбора метрик сохраненного изображения.
+
+        :param encoding: Кодировка файла, br или identity.
+        :type encoding: str
+        :param size: Размер загруженного изображения.
+        :type size: int
+        :param stored_size: Размер файла на диске.
+        :type stored_size: int
+        :param cpu_time: Время CPU на сжатие.
+        :type cpu_time: float
+        """
+        if size:
+            self.compression_ratio.labels(encoding).observe(stored_size / size)
+        self.compression_cpu.labels(encoding).observe(cpu_time)
+        self.stored_bytes.labels(encoding).inc(stored_size)
+
+    def inc_deduplicated(self, encoding: str) -> None:
+        """
+        Метод сбора метрик изображений, найденных в хранилище.
+
+        :param encoding: Кодировка файла, br или identity.
+        :type encoding: str
+        """
+        self.deduplicated.labels(encoding).inc()
+
+
+@lru_cache
+def get_image_metrics() -> NoneImageMetrics | PrometheusImageMetrics:
+    """
+    Возвращает клиент метрик хранилища изображений.
+
+    :return: Клиент метрик хранилища изображений.
+    :rtype: NoneImageMetrics | PrometheusImageMetrics
+    """
+    if get_settings().metrics.enabled:
+        return PrometheusImageMetrics()
+    return NoneImageMetrics()
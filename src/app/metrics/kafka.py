@@ -0,0 +1,138 @@
+import logging
+from functools import lru_cache
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config.config import get_settings
+from app.metrics.metrics import SERVICE_PREFIX, Label
+
+logger = logging.getLogger(__name__)
+
+
+class NoneKafkaMetrics:
+    """Заглушка сбора метрик публикации в kafka."""
+
+    def observe_in_flight(self, topic: str, in_flight: int) -> None:
+        """
+        Метод сбора метрик неподтвержденных сообщений.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param in_flight: Количество неподтвержденных сообщений.
+        :type in_flight: int
+        """
+        logger.debug(self.observe_in_flight.__name__)
+
+    def observe_delivery(self, topic: str, duration: float) -> None:
+        """
+        Метод сбора метрик задержки доставки сообщения.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param duration: Время от отправки до подтверждения брокером.
+        :type duration: float
+        """
+        logger.debug(self.observe_delivery.__name__)
+
+    def inc_delivery_errors(self, topic: str) -> None:
+        """
+        Метод подсчета ошибок доставки сообщений.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        """
+        logger.debug(self.inc_delivery_errors.__name__)
+
+    def observe_connected(self, topic: str, is_connected: bool) -> None:
+        """
+        Метод сбора метрик подключения к kafka.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param is_connected: Подключен ли producer к kafka.
+        :type is_connected: bool
+        """
+        logger.debug(self.observe_connected.__name__)
+
+
+class PrometheusKafkaMetrics:
+    """Сбор метрик публикации в kafka prometheus."""
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        self.in_flight = Gauge(
+            name=f'{SERVICE_PREFIX}_kafka_in_flight',
+            documentation='Messages sent but not yet acknowledged',
+            labelnames=[Label.topic],
+        )
+        self.delivery_duration = Histogram(
+            name=f'{SERVICE_PREFIX}_kafka_delivery_duration',
+            documentation='Time from send to broker acknowledgement',
+            labelnames=[Label.topic],
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10),
+        )
+        self.delivery_errors = Counter(
+            name=f'{SERVICE_PREFIX}_kafka_delivery_errors',
+            documentation='Total number of failed message deliveries',
+            labelnames=[Label.topic],
+        )
+        self.connected = Gauge(
+            name=f'{SERVICE_PREFIX}_kafka_connected',
+            documentation='1 if producer is connected to kafka, 0 otherwise',
+            labelnames=[Label.topic],
+        )
+
+    def observe_in_flight(self, topic: str, in_flight: int) -> None:
+        """
+        Метод сбора метрик неподтвержденных сообщений.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param in_flight: Количество неподтвержденных сообщений.
+        :type in_flight: int
+        """
+        self.in_flight.labels(topic).set(in_flight)
+
+    def observe_delivery(self, topic: str, duration: float) -> None:
+        """
+        Метод сбора метрик задержки доставки сообщения.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param duration: Время от отправки до подтверждения брокером.
+        :type duration: float
+        """
+        self.delivery_duration.labels(topic).observe(duration)
+
+    def inc_delivery_errors(self, topic: str) -> None:
+        """
+        Метод подсчета ошибок доставки сообщений.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        """
+        self.delivery_errors.labels(topic).inc()
+
+    def observe_connected(self, topic: str, is_connected: bool) -> None:
+        """
+        Метод сбора метрик подключения к kafka.
+
+        :param topic: Топик kafka.
+        :type topic: str
+        :param is_connected: Подключен ли producer к kafka.
+        :type is_connected: bool
+        """
+        self.connected.labels(topic).set(int(is_connected))
+
+
+@lru_cache
+def get_kafka_metrics() -> NoneKafkaMetrics | PrometheusKafkaMetrics:
+    """
+    Возвращает клиент метрик публикации в kafka.
+
+    :return: Клиент метрик публикации в kafka.
+    :rtype: NoneKafkaMetrics | PrometheusKafkaMetrics
+    """
+    if get_settings().metrics.enabled:
+        return PrometheusKafkaMetrics()
+    return NoneKafkaMetrics()
@@ -1,8 +1,9 @@
 import logging
 from enum import StrEnum
-from typing import Final
+from typing import Any, Final
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+from prometheus_client.metrics import MetricWrapperBase
 
 from app.core.config.config import get_settings
 
@@ -16,6 +17,10 @@ class Label(StrEnum):
     service = 'service'
     endpoint = 'endpoint'
     status = 'status'
+    pool = 'pool'
+    statement = 'statement'
+    topic = 'topic'
+    encoding = 'encoding'
 
 
 class AuthStatus(StrEnum):
@@ -79,21 +84,34 @@ class NoneClient:
 
 
 class PrometheusClient:
-    """Клиент сбора метрик prometheus."""
+    """
+    Клиент сбора метрик prometheus.
 
-    def __init__(self, metrics_app) -> None:
+    Дочерние метрики с лэйблами создаются один раз на набор значений
+    лэйблов и затем берутся из словаря, без разбора и проверки лэйблов
+    в labels() на каждый запрос. Словарь не растет быстрее самих
+    метрик: prometheus хранит каждый набор лэйблов до перезапуска.
+    """
+
+    def __init__(
+        self, metrics_app, registry: CollectorRegistry = REGISTRY,
+    ) -> None:
         """
         Метод инициализации.
 
         :param metrics_app: Клиент метрик.
+        :param registry: Реестр метрик.
+        :type registry: CollectorRegistry
         """
         self.app = metrics_app
+        self._children: dict[tuple[Any, ...], Any] = {}
         self.ready_count = Counter(
             name=f'{SERVICE_PREFIX}_ready_count',
             documentation='Total number of requests',
             labelnames=[
                 Label.method, Label.service, Label.endpoint, Label.status,
             ],
+            registry=registry,
         )
         self.request_count = Counter(
             name=f'{SERVICE_PREFIX}_request_count',
@@ -101,12 +119,14 @@ class PrometheusClient:
             labelnames=[
                 Label.method, Label.service, Label.endpoint, Label.status,
             ],
+            registry=registry,
         )
         self.request_duration = Histogram(
             name=f'{SERVICE_PREFIX}_request_duration',
             documentation='Time spent processing request',
             labelnames=[Label.method, Label.service, Label.endpoint],
             buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+            registry=registry,
         )
         self.auth_success_count = Counter(
             name=f'{SERVICE_PREFIX}_auth_success_count',
@@ -114,6 +134,7 @@ class PrometheusClient:
             labelnames=[
                 Label.method, Label.service, Label.endpoint, Label.status,
             ],
+            registry=registry,
         )
         self.auth_failure_count = Counter(
             name=f'{SERVICE_PREFIX}_auth_failure_count',
@@ -121,6 +142,7 @@ class PrometheusClient:
             labelnames=[
                 Label.method, Label.service, Label.endpoint, Label.status,
             ],
+            registry=registry,
         )
 
     def inc_ready_count(self, **kwargs) -> None:
@@ -129,7 +151,7 @@ class PrometheusClient:
 
         :param kwargs: Пары ключ-значение передаваемые в метрику.
         """
-        self.ready_count.labels(**kwargs).inc()
+        self._labels(self.ready_count, kwargs).inc()
 
     def inc_request_count(self, **kwargs) -> None:
         """
@@ -137,7 +159,7 @@ class PrometheusClient:
 
         :param kwargs: Пары ключ-значение передаваемые в метрику.
         """
-        self.request_count.labels(**kwargs).inc()
+        self._labels(self.request_count, kwargs).inc()
 
     def observe_duration(self, *, process_time, **kwargs) -> None:
         """
@@ -146,7 +168,7 @@ class PrometheusClient:
         :param kwargs: Пары ключ-значение передаваемые в метрику.
         :param process_time: Время обработки запроса.
         """
-        self.request_duration.labels(**kwargs).observe(process_time)
+        self._labels(self.request_duration, kwargs).observe(process_time)
 
     def observe_auth(self, *, auth_status, **kwargs) -> None:
         """
@@ -157,8 +179,18 @@ class PrometheusClient:
         """
         match auth_status:
             case AuthStatus.success:
-                self.auth_success_count.labels(**kwargs).inc()
+                self._labels(self.auth_success_count, kwargs).inc()
             case AuthStatus.failure:
-                self.auth_failure_count.labels(**kwargs).inc()
+                self._labels(self.auth_failure_count, kwargs).inc()
             case _:
                 logger.error(f'undefined AuthStatus {auth_status}')
+
+    def _labels(
+        self, metric: MetricWrapperBase, label_values: dict[str, Any],
+    ) -> Any:
+        key = (id(metric), *label_values.items())
+        child = self._children.get(key)
+        if child is None:
+            child = metric.labels(**label_values)
+            self._children[key] = child
+        return child
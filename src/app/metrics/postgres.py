@@ -0,0 +1,160 @@
+import logging
+from collections import defaultdict
+from functools import lru_cache, partial
+from typing import Callable
+
+from prometheus_client import REGISTRY, CollectorRegistry, Gauge, Histogram
+
+from app.core.config.config import get_settings
+from app.metrics.metrics import SERVICE_PREFIX, Label
+
+logger = logging.getLogger(__name__)
+
+PoolGauge = Callable[[], float]
+
+
+class NonePoolMetrics:
+    """Заглушка сбора метрик пула соединений."""
+
+    def track_pool(self, pool_name: str, **gauges: PoolGauge) -> None:
+        """
+        Метод регистрации показателей пула соединений.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param gauges: Функции, возвращающие показатели пула.
+        :type gauges: PoolGauge
+        """
+        logger.debug(f'pool {pool_name} is not tracked')
+
+    def observe_checkout_wait(self, pool_name: str, wait_time: float) -> None:
+        """
+        Метод сбора метрик ожидания соединения из пула.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param wait_time: Время ожидания соединения.
+        :type wait_time: float
+        """
+        logger.debug(self.observe_checkout_wait.__name__)
+
+    def observe_statement(
+        self, pool_name: str, statement_name: str, duration: float,
+    ) -> None:
+        """
+        Метод сбора метрик продолжительности запроса.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param statement_name: Имя запроса.
+        :type statement_name: str
+        :param duration: Продолжительность запроса.
+        :type duration: float
+        """
+        logger.debug(self.observe_statement.__name__)
+
+
+class PrometheusPoolMetrics:
+    """Сбор метрик пула соединений prometheus."""
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY) -> None:
+        """
+        Метод инициализации.
+
+        :param registry: Реестр метрик.
+        :type registry: CollectorRegistry
+        """
+        self.gauges = {
+            gauge_name: Gauge(
+                name=f'{SERVICE_PREFIX}_db_pool_{gauge_name}',
+                documentation=f'Connection pool {gauge_name}',
+                labelnames=[Label.pool],
+                registry=registry,
+            )
+            for gauge_name in ('size', 'checked_out', 'overflow')
+        }
+        self.checkout_wait = Histogram(
+            name=f'{SERVICE_PREFIX}_db_pool_checkout_wait',
+            documentation='Time spent waiting for a pool connection',
+            labelnames=[Label.pool],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+            registry=registry,
+        )
+        self.statement_duration = Histogram(
+            name=f'{SERVICE_PREFIX}_db_statement_duration',
+            documentation='Time spent executing database statements',
+            labelnames=[Label.pool, Label.statement],
+            buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+            registry=registry,
+        )
+        self._pool_gauges: defaultdict[
+            tuple[str, str], list[PoolGauge],
+        ] = defaultdict(list)
+
+    def track_pool(self, pool_name: str, **gauges: PoolGauge) -> None:
+        """
+        Метод регистрации показателей пула соединений.
+
+        Показатели вычисляются в момент сбора метрик. Несколько
+        пулов к одной базе данных, например у хранилища и у пакетной
+        записи транзакций, имеют одно имя, их показатели суммируются.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param gauges: Функции, возвращающие показатели пула.
+        :type gauges: PoolGauge
+        """
+        for gauge_name, gauge_function in gauges.items():
+            pool_gauges = self._pool_gauges[(pool_name, gauge_name)]
+            pool_gauges.append(gauge_function)
+            self.gauges[gauge_name].labels(pool_name).set_function(
+                partial(_sum_gauges, pool_gauges),
+            )
+
+    def observe_checkout_wait(self, pool_name: str, wait_time: float) -> None:
+        """
+        Метод сбора метрик ожидания соединения из пула.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param wait_time: Время ожидания соединения.
+        :type wait_time: float
+        """
+        self.checkout_wait.labels(pool_name).observe(wait_time)
+
+    def observe_statement(
+        self, pool_name: str, statement_name: str, duration: float,
+    ) -> None:
+        """
+        Метод сбора метрик продолжительности запроса.
+
+        :param pool_name: Имя пула соединений.
+        :type pool_name: str
+        :param statement_name: Имя запроса.
+        :type statement_name: str
+        :param duration: Продолжительность запроса.
+        :type duration: float
+        """
+        self.statement_duration.labels(pool_name, statement_name).observe(
+            duration,
+        )
+
+
+def _sum_gauges(pool_gauges: list[PoolGauge]) -> float:
+    return sum(pool_gauge() for pool_gauge in pool_gauges)
+
+
+@lru_cache
+def get_pool_metrics() -> NonePoolMetrics | PrometheusPoolMetrics:
+    """
+    Возвращает клиент метрик пулов соединений.
+
+    Метрики prometheus регистрируются один раз на процесс
+    и разделяются всеми пулами, пулы различаются лэйблом pool.
+
+    :return: Клиент метрик пулов соединений.
+    :rtype: NonePoolMetrics | PrometheusPoolMetrics
+    """
+    if get_settings().metrics.enabled:
+        return PrometheusPoolMetrics()
+    return NonePoolMetrics()
@@ -1,15 +1,19 @@
+from contextlib import contextmanager
 from enum import StrEnum
+from typing import Iterator
 
-from fastapi import Request
 from jaeger_client.config import Config
 from jaeger_client.tracer import Tracer
+from opentracing import InvalidCarrierException
+from opentracing import Scope as SpanScope
 from opentracing import (
-    InvalidCarrierException,
     SpanContextCorruptedException,
     global_tracer,
     propagation,
     tags,
 )
+from starlette.datastructures import URL, Headers
+from starlette.types import Scope
 
 from app.core.config.config import get_settings
 
@@ -68,35 +72,37 @@ def is_business_route(path: str) -> bool:
     return not any((path.startswith(route) for route in not_business_routes))
 
 
-async def tracing_middleware(request: Request, call_next):
+@contextmanager
+def start_request_span(scope: Scope) -> Iterator[SpanScope | None]:
     """
-    Создает спан для сервиса.
+    Создает спан запроса к сервису.
 
-    :param request: Объект запроса.
-    :type request: Request
-    :param call_next: Функция вызываемая следом.
-    :return: Ответ сервиса
-    :rtype: Response
+    Для путей не относящихся к бизнес логике спан не создается.
+
+    :param scope: Параметры ASGI запроса.
+    :type scope: Scope
+    :yield: Контекст активного спана или None.
+    :ytype: SpanScope | None
     """
-    path = request.url.path
+    path = scope['path']
     if not is_business_route(path):
-        return await call_next(request)
+        yield None
+        return
     try:
         span_ctx = global_tracer().extract(
-            propagation.Format.HTTP_HEADERS, request.headers,
+            propagation.Format.HTTP_HEADERS, Headers(scope=scope),
         )
     except (InvalidCarrierException, SpanContextCorruptedException):
         span_ctx = None
+    method = scope['method']
     span_tags = {
         tags.SPAN_KIND: tags.SPAN_KIND_RPC_SERVER,
-        tags.HTTP_METHOD: request.method,
-        tags.HTTP_URL: str(request.url),
+        tags.HTTP_METHOD: method,
+        tags.HTTP_URL: str(URL(scope=scope)),
     }
     with global_tracer().start_active_span(
-        f'auth_{request.method}_{path}',
+        f'auth_{method}_{path}',
         child_of=span_ctx,
         tags=span_tags,
-    ) as scope:
-        response = await call_next(request)
-        scope.span.set_tag(tags.HTTP_STATUS_CODE, response.status_code)
-        return response
+    ) as span_scope:
+        yield span_scope
@@ -1,120 +1,130 @@
 import logging
 import time
 
-from fastapi import Request, status
+from fastapi import status
+from opentracing import Scope as SpanScope
+from opentracing import tags
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.interfaces import MetricsClient
 from app.metrics.metrics import AuthStatus, NoneClient
+from app.metrics.tracing import start_request_span
 
 logger = logging.getLogger(__name__)
 
 
 service_name = 'auth-service'
+ready_path = '/healthz/ready'
+unmatched_endpoint = 'unmatched'
 
 
-def get_metrics_client_from_request(request: Request) -> MetricsClient:
-    """Получает клиент метрик из запроса."""
+def get_metrics_client(scope: Scope) -> MetricsClient:
+    """Получает клиент метрик из состояния запроса."""
     try:
-        return request.state.metrics_client
+        return scope['state']['metrics_client']
     except Exception:
         logger.error('expected MetricsCLient but received None')
         return NoneClient()
 
 
-async def ready_metric_middleware(request: Request, call_next):
+def get_endpoint(scope: Scope) -> str:
     """
-    Middleware для сбора метрики READY_COUNT.
-
-    :param request: Объект запроса.
-    :type request: Request
-    :param call_next: Функция вызываемая следом.
-    :return: Ответ сервиса
-    :rtype: Response
-    """
-    metrics_client = get_metrics_client_from_request(request)
-    response = await call_next(request)
-
-    path = request.url.path
-    if path.startswith('/healthz/ready'):
-        metrics_client.inc_ready_count(
-            method=request.method,
-            service=service_name,
-            endpoint=path,
-            status=response.status_code,
-        )
-    return response
+    Возвращает лэйбл endpoint для метрик запроса.
 
+    Лэйбл берется из шаблона маршрута, например /reports/{username},
+    поэтому число рядов метрик не зависит от значений в пути.
+    Для смонтированного приложения лэйбл - путь монтирования, а все
+    пути без маршрута попадают в один лэйбл unmatched_endpoint.
 
-async def duration_metric_middleware(request: Request, call_next):
+    :param scope: Параметры запроса после маршрутизации.
+    :type scope: Scope
+    :return: Шаблон пути.
+    :rtype: str
     """
-    Middleware для сбора метрики REQUEST_DURATION.
-
-    :param request: Объект запроса.
-    :type request: Request
-    :param call_next: Функция вызываемая следом.
-    :return: Ответ сервиса
-    :rtype: Response
-    """
-    metrics_client = get_metrics_client_from_request(request)
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-
-    metrics_client.observe_duration(
-        process_time=process_time,
-        method=request.method,
-        service=service_name,
-        endpoint=request.url.path,
-    )
-    return response
+    route: Route | None = scope.get('route')
+    if route is not None:
+        return route.path_format
+    app_root_path: str | None = scope.get('app_root_path')
+    if app_root_path is not None:
+        root_path: str = scope['root_path']
+        return root_path.removeprefix(app_root_path)
+    return unmatched_endpoint
 
 
-async def count_metric_middleware(request: Request, call_next):
+class MetricsMiddleware:
     """
-    Middleware для сбора метрики REQUEST_COUNT.
+    Middleware сбора метрик и трейсинга запросов.
 
-    :param request: Объект запроса.
-    :type request: Request
-    :param call_next: Функция вызываемая следом.
-    :return: Ответ сервиса
-    :rtype: Response
+    Собирает метрики READY_COUNT, REQUEST_DURATION, REQUEST_COUNT,
+    AUTH_COUNT и создает спан запроса за один проход. Тело ответа
+    передается без изменений, метрики записываются при отправке
+    статуса ответа, когда маршрут запроса уже известен.
     """
-    metrics_client = get_metrics_client_from_request(request)
-    response = await call_next(request)
 
-    metrics_client.inc_request_count(
-        method=request.method,
-        service=service_name,
-        endpoint=request.url.path,
-        status=response.status_code,
-    )
-    return response
-
-
-async def auth_metric_middleware(request: Request, call_next):
-    """
-    Middleware для сбора метрики AUTH_COUNT.
-
-    :param request: Объект запроса.
-    :type request: Request
-    :param call_next: Функция вызываемая следом.
-    :return: Ответ сервиса
-    :rtype: Response
-    """
-    metrics_client = get_metrics_client_from_request(request)
-    response = await call_next(request)
-    response_status_code = response.status_code
-
-    if response_status_code == status.HTTP_200_OK:
-        auth_status = AuthStatus.success
-    else:
-        auth_status = AuthStatus.failure
-
-    metrics_client.observe_auth(
-        auth_status=auth_status,
-        method=request.method,
-        service=service_name,
-        endpoint=request.url.path,
-        status=response.status_code,
-    )
-    return response
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Метод инициализации.
+
+        :param app: Приложение, вызываемое следом.
+        :type app: ASGIApp
+        """
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send,
+    ) -> None:
+        """
+        Обрабатывает запрос.
+
+        :param scope: Параметры запроса.
+        :type scope: Scope
+        :param receive: Функция получения сообщений запроса.
+        :type receive: Receive
+        :param send: Функция отправки сообщений ответа.
+        :type send: Send
+        """
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        with start_request_span(scope) as span_scope:
+            observer = _ResponseObserver(scope, send, span_scope)
+            await self.app(scope, receive, observer.send)
+
+
+class _ResponseObserver:
+    def __init__(
+        self, scope: Scope, send: Send, span_scope: SpanScope | None,
+    ) -> None:
+        self.scope = scope
+        self.send_next = send
+        self.span_scope = span_scope
+        self.start_time = time.time()
+
+    async def send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self._observe(message['status'])
+        await self.send_next(message)
+
+    def _observe(self, status_code: int) -> None:
+        process_time = time.time() - self.start_time
+        metrics_client = get_metrics_client(self.scope)
+        endpoint = get_endpoint(self.scope)
+        labels = {
+            'method': self.scope['method'],
+            'service': service_name,
+            'endpoint': endpoint,
+        }
+        if endpoint == ready_path:
+            metrics_client.inc_ready_count(status=status_code, **labels)
+        metrics_client.observe_duration(process_time=process_time, **labels)
+        metrics_client.inc_request_count(status=status_code, **labels)
+        if status_code == status.HTTP_200_OK:
+            auth_status = AuthStatus.success
+        else:
+            auth_status = AuthStatus.failure
+        metrics_client.observe_auth(
+            auth_status=auth_status, status=status_code, **labels,
+        )
+        if self.span_scope is not None:
+            self.span_scope.span.set_tag(tags.HTTP_STATUS_CODE, status_code)
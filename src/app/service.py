@@ -3,19 +3,19 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from prometheus_client import make_asgi_app
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from app.api.handlers import router
 from app.api.healthz.handlers import healthz_router
-from app.core.authentication import AuthService
+from app.core.authentication import AuthService, Repository
 from app.core.config.config import get_auth_config, get_settings
 from app.core.interfaces import MetricsClient
 from app.external.kafka import KafkaProducer
+from app.external.postgres.sharding import ShardedDBStorage
 from app.external.postgres.storage import DBStorage
 from app.external.redis import TokenCache
 from app.metrics.metrics import NoneClient, PrometheusClient
-from app.metrics.tracing import get_tracer, tracing_middleware
-from app.middleware import middleware
+from app.metrics.tracing import get_tracer
+from app.middleware.middleware import MetricsMiddleware
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +28,11 @@ def get_service() -> AuthService:
     :rtype: AuthService
     """
     cache = TokenCache()
-    persistent = DBStorage()
+    persistent: Repository
+    if get_settings().postgres.shard_dns:
+        persistent = ShardedDBStorage()
+    else:
+        persistent = DBStorage()
     config = get_auth_config()
     queue = KafkaProducer()
     return AuthService(
@@ -79,21 +83,7 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(lifespan=lifespan)
 
-app.add_middleware(
-    BaseHTTPMiddleware, dispatch=middleware.ready_metric_middleware,
-)
-app.add_middleware(
-    BaseHTTPMiddleware, dispatch=middleware.duration_metric_middleware,
-)
-app.add_middleware(
-    BaseHTTPMiddleware, dispatch=middleware.count_metric_middleware,
-)
-app.add_middleware(
-    BaseHTTPMiddleware, dispatch=middleware.auth_metric_middleware,
-)
-app.add_middleware(
-    BaseHTTPMiddleware, dispatch=tracing_middleware,
-)
+app.add_middleware(MetricsMiddleware)
 
 app.mount('/metrics', metrics_app)  # type: ignore
 app.include_router(router)
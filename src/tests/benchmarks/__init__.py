@@ -0,0 +1 @@
+"""Пакет бенчмарков сервиса. Запуск: pytest -m slow src/tests/benchmarks."""
@@ -0,0 +1,142 @@
+import logging
+import time
+
+from fastapi import FastAPI, Request, status
+from opentracing import (
+    InvalidCarrierException,
+    SpanContextCorruptedException,
+    global_tracer,
+    propagation,
+    tags,
+)
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.interfaces import MetricsClient
+from app.metrics.metrics import AuthStatus, NoneClient
+from app.metrics.tracing import is_business_route
+from app.middleware.middleware import service_name
+
+logger = logging.getLogger(__name__)
+
+
+def get_metrics_client_from_request(request: Request) -> MetricsClient:
+    """Получает клиент метрик из запроса."""
+    try:
+        return request.state.metrics_client
+    except Exception:
+        logger.error('expected MetricsCLient but received None')
+        return NoneClient()
+
+
+async def ready_metric_middleware(request: Request, call_next):
+    """Middleware для сбора метрики READY_COUNT."""
+    metrics_client = get_metrics_client_from_request(request)
+    response = await call_next(request)
+
+    path = request.url.path
+    if path.startswith('/healthz/ready'):
+        metrics_client.inc_ready_count(
+            method=request.method,
+            service=service_name,
+            endpoint=path,
+            status=response.status_code,
+        )
+    return response
+
+
+async def duration_metric_middleware(request: Request, call_next):
+    """Middleware для сбора метрики REQUEST_DURATION."""
+    metrics_client = get_metrics_client_from_request(request)
+    start_time = time.time()
+    response = await call_next(request)
+    process_time = time.time() - start_time
+
+    metrics_client.observe_duration(
+        process_time=process_time,
+        method=request.method,
+        service=service_name,
+        endpoint=request.url.path,
+    )
+    return response
+
+
+async def count_metric_middleware(request: Request, call_next):
+    """Middleware для сбора метрики REQUEST_COUNT."""
+    metrics_client = get_metrics_client_from_request(request)
+    response = await call_next(request)
+
+    metrics_client.inc_request_count(
+        method=request.method,
+        service=service_name,
+        endpoint=request.url.path,
+        status=response.status_code,
+    )
+    return response
+
+
+async def auth_metric_middleware(request: Request, call_next):
+    """Middleware для сбора метрики AUTH_COUNT."""
+    metrics_client = get_metrics_client_from_request(request)
+    response = await call_next(request)
+
+    if response.status_code == status.HTTP_200_OK:
+        auth_status = AuthStatus.success
+    else:
+        auth_status = AuthStatus.failure
+    metrics_client.observe_auth(
+        auth_status=auth_status,
+        method=request.method,
+        service=service_name,
+        endpoint=request.url.path,
+        status=response.status_code,
+    )
+    return response
+
+
+async def tracing_middleware(request: Request, call_next):
+    """Создает спан для сервиса."""
+    path = request.url.path
+    if not is_business_route(path):
+        return await call_next(request)
+    try:
+        span_ctx = global_tracer().extract(
+            propagation.Format.HTTP_HEADERS, request.headers,
+        )
+    except (InvalidCarrierException, SpanContextCorruptedException):
+        span_ctx = None
+    span_tags = {
+        tags.SPAN_KIND: tags.SPAN_KIND_RPC_SERVER,
+        tags.HTTP_METHOD: request.method,
+        tags.HTTP_URL: str(request.url),
+    }
+    with global_tracer().start_active_span(
+        f'auth_{request.method}_{path}',
+        child_of=span_ctx,
+        tags=span_tags,
+    ) as scope:
+        response = await call_next(request)
+        scope.span.set_tag(tags.HTTP_STATUS_CODE, response.status_code)
+        return response
+
+
+baseline_dispatches = (
+    ready_metric_middleware,
+    duration_metric_middleware,
+    count_metric_middleware,
+    auth_metric_middleware,
+    tracing_middleware,
+)
+
+
+def add_baseline_middleware(app: FastAPI) -> None:
+    """
+    Добавляет приложению middleware сервиса до MetricsMiddleware.
+
+    Пять слоев BaseHTTPMiddleware с метриками и трейсингом
+    в порядке, в котором их добавлял прежний service.py.
+
+    :param app: Приложение.
+    :type app: FastAPI
+    """
+    for dispatch in baseline_dispatches:
+        app.add_middleware(BaseHTTPMiddleware, dispatch=dispatch)
@@ -0,0 +1,83 @@
+import io
+import logging
+import time
+import tracemalloc
+
+import pytest
+
+from app.external.postgres.bulk_import import (
+    CopyStream,
+    ImportProgress,
+    read_credentials,
+)
+
+logger = logging.getLogger(__name__)
+
+copy_chunk_size = 8192
+hash_sample = '$2b$12${0}'.format('x' * 53)
+
+
+class GeneratedCSV(io.TextIOBase):
+    """Поток CSV, генерирующий строки без хранения файла в памяти."""
+
+    def __init__(self, rows_count: int) -> None:
+        """Метод инициализации."""
+        self.rows_count = rows_count
+        self.position = -1
+
+    def __iter__(self):
+        """Итерирует строки CSV."""
+        return self
+
+    def __next__(self) -> str:
+        """Возвращает следующую строку CSV."""
+        self.position += 1
+        if self.position == 0:
+            return 'username,hashed_password\n'
+        if self.position > self.rows_count:
+            raise StopIteration
+        return f'user-{self.position},{hash_sample}\n'
+
+
+def stream_rows(rows_count: int) -> int:
+    """Прогоняет строки через разбор и кодирование для COPY."""
+    progress = ImportProgress()
+    rows = read_credentials(GeneratedCSV(rows_count), 'csv', progress)
+    stream = CopyStream(rows)
+    chunk = stream.read(copy_chunk_size)
+    while chunk:
+        chunk = stream.read(copy_chunk_size)
+    return stream.count
+
+
+def measure_peak(rows_count: int) -> int:
+    """Измеряет пиковое потребление памяти при импорте."""
+    tracemalloc.start()
+    stream_rows(rows_count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+@pytest.mark.slow
+def test_import_pipeline_throughput():
+    """Бенчмарк скорости разбора и кодирования строк для COPY."""
+    rows_count = 1000000
+
+    started = time.perf_counter()
+    streamed = stream_rows(rows_count)
+    elapsed = time.perf_counter() - started
+
+    rows_per_second = round(rows_count / elapsed)
+    logger.warning(f'import pipeline: {rows_per_second} rows/s')
+    assert streamed == rows_count
+
+
+@pytest.mark.slow
+def test_import_pipeline_memory_is_constant():
+    """Бенчмарк памяти: пик не растет с размером файла."""
+    small_peak = measure_peak(10000)
+    large_peak = measure_peak(200000)
+
+    logger.warning(f'import pipeline peak memory: {large_peak} bytes')
+    assert large_peak < small_peak * 2
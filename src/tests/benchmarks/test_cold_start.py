@@ -0,0 +1,96 @@
+import logging
+import os
+import socket
+import subprocess  # noqa: S404 the benchmark starts the real service
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+import yaml
+
+logger = logging.getLogger(__name__)
+
+src_path = Path(__file__).parents[2]
+config_path = src_path / 'config' / 'config-local.yml'
+startup_timeout = 30
+poll_interval = 0.01
+max_cold_start = 10
+
+
+def get_free_port() -> int:
+    """Возвращает свободный порт на localhost."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def write_config(tmp_path: Path) -> Path:
+    """Создает конфигурацию с недоступной kafka."""
+    with open(config_path) as config_file:
+        config = yaml.safe_load(config_file)
+    config['kafka']['host'] = '127.0.0.1'
+    config['kafka']['port'] = get_free_port()
+    config['kafka']['storage_path'] = str(tmp_path / 'storage')
+    config['metrics']['enabled'] = False
+    config['tracing']['enabled'] = False
+    service_config = tmp_path / 'config.yml'
+    service_config.write_text(yaml.safe_dump(config))
+    return service_config
+
+
+def wait_for_first_response(url: str, server: subprocess.Popen) -> None:
+    """Ждет первого успешного ответа сервиса."""
+    deadline = time.perf_counter() + startup_timeout
+    while time.perf_counter() < deadline and server.poll() is None:
+        try:
+            response = httpx.get(url)
+        except httpx.TransportError:
+            time.sleep(poll_interval)
+            continue
+        if response.is_success:
+            return
+    raise TimeoutError(f'{url} is not served in {startup_timeout}s')
+
+
+def start_service(tmp_path: Path, port: int) -> subprocess.Popen:
+    """Запускает сервис в отдельном процессе."""
+    command = [sys.executable, '-m', 'uvicorn', 'app.service:app']
+    command.extend(['--port', str(port), '--log-level', 'warning'])
+    env = dict(os.environ, CONFIG_PATH=str(write_config(tmp_path)))
+    return subprocess.Popen(  # noqa: S603 trusted arguments
+        command, cwd=src_path, env=env,
+    )
+
+
+def exercise_service(
+    port: int, server: subprocess.Popen, started: float,
+) -> tuple[float, httpx.Response]:
+    """Возвращает время до первого ответа и ответ /verify без kafka."""
+    service_url = f'http://127.0.0.1:{port}'
+    wait_for_first_response(f'{service_url}/healthz/ready', server)
+    cold_start = time.perf_counter() - started
+    return cold_start, httpx.post(
+        f'{service_url}/verify',
+        data={'username': 'george'},
+        files={'image': ('face.jpg', b'\xff\xd8\xff\xe0face')},
+    )
+
+
+@pytest.mark.slow
+def test_cold_start_without_kafka(tmp_path):
+    """Бенчмарк времени запуска сервиса до первого ответа без kafka."""
+    port = get_free_port()
+    started = time.perf_counter()
+    server = start_service(tmp_path, port)
+    try:
+        cold_start, verified = exercise_service(port, server, started)
+    finally:
+        server.terminate()
+        server.wait()
+
+    logger.warning(f'cold start without kafka {cold_start:.2f}s')
+    assert cold_start < max_cold_start
+    assert verified.is_success
+    assert list((tmp_path / 'storage' / 'outbox').iterdir())
@@ -0,0 +1,160 @@
+import logging
+import statistics
+from datetime import datetime
+from time import perf_counter
+
+import pytest
+from sqlalchemy import text
+
+from app.external.postgres.history import HistoryReader, encode_cursor
+from app.external.postgres.storage import DBStorage
+
+logger = logging.getLogger(__name__)
+
+users_count = 10000
+user_transactions = 2000
+heavy_transactions = 1000000
+page_size = 50
+requests_count = 200
+deep_position = 900000
+username_prefix = 'history-'
+heavy_prefix = 'history-heavy'
+heavy_username = 'history-heavy0'
+started_at = datetime.fromisoformat('2020-01-01')
+username_pattern = {'pattern': f'{username_prefix}%'}
+create_users_sql = """
+INSERT INTO users (username, hashed_password, balance, is_deleted, is_verified)
+SELECT :prefix || row, 'hash', 0, false, false
+FROM generate_series(0, :users - 1) AS row
+"""
+create_transactions_sql = """
+INSERT INTO transactions (
+    id_user, transaction_type, amount, created_at, is_deleted
+)
+SELECT
+    users.id,
+    row % 3 != 0,
+    row % 100 + 1,
+    :started_at + row * interval '1 minute',
+    row % 50 = 0
+FROM users, generate_series(1, :count) AS row
+WHERE users.username LIKE :pattern
+"""
+offset_page_sql = """
+SELECT id, transaction_type, amount, created_at
+FROM transactions
+WHERE id_user = (SELECT id FROM users WHERE username = :username)
+    AND is_deleted = false
+ORDER BY created_at DESC, id DESC
+OFFSET :offset LIMIT :limit
+"""
+delete_transactions_sql = """
+DELETE FROM transactions
+WHERE id_user IN (SELECT id FROM users WHERE username LIKE :pattern)
+"""
+delete_users_sql = 'DELETE FROM users WHERE username LIKE :pattern'
+vacuum_sql = 'VACUUM ANALYZE transactions'
+
+
+@pytest.fixture(scope='module')
+def storage():
+    """Создает пользователей с транзакциями и удаляет их после тестов."""
+    db_storage = DBStorage()
+    create_history(db_storage)
+    yield db_storage
+    # users go last: their foreign key checks would otherwise
+    # read every deleted transaction row
+    for sql in (delete_transactions_sql, vacuum_sql, delete_users_sql):
+        execute_autocommit(db_storage, sql)
+
+
+def create_history(db_storage: DBStorage) -> None:
+    """
+    Создает users_count * user_transactions транзакций.
+
+    Кроме того, у пользователя heavy_username heavy_transactions
+    транзакций для проверки глубоких страниц.
+
+    :param db_storage: Хранилище.
+    :type db_storage: DBStorage
+    """
+    with db_storage.pool.begin() as connection:
+        connection.execute(
+            text(create_users_sql),
+            {'prefix': username_prefix, 'users': users_count},
+        )
+        connection.execute(
+            text(create_users_sql), {'prefix': heavy_prefix, 'users': 1},
+        )
+        connection.execute(text(create_transactions_sql), {
+            'started_at': started_at,
+            'count': user_transactions,
+            'pattern': f'{username_prefix}_%',
+        })
+        connection.execute(text(create_transactions_sql), {
+            'started_at': started_at,
+            'count': heavy_transactions,
+            'pattern': heavy_username,
+        })
+    execute_autocommit(db_storage, vacuum_sql)
+
+
+def execute_autocommit(db_storage: DBStorage, sql: str) -> None:
+    """Выполняет запрос вне транзакции для тестовых пользователей."""
+    with db_storage.pool.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT').execute(
+            text(sql), username_pattern,
+        )
+
+
+def get_username(request_number: int) -> str:
+    """Возвращает имя одного из обычных пользователей."""
+    user_index = request_number * 37 % users_count
+    return f'{username_prefix}{user_index}'
+
+
+def measure(name: str, read_page) -> float:
+    """Выполняет requests_count запросов и возвращает медиану задержки."""
+    latencies = []
+    for request_number in range(requests_count):
+        started = perf_counter()
+        read_page(request_number)
+        latencies.append(perf_counter() - started)
+    median = statistics.median(latencies)
+    slowest = statistics.quantiles(latencies, n=100)[-1]
+    logger.warning(
+        f'{name}: p50 {median:.6f} s, ' +
+        f'p99 {slowest:.6f} s',
+    )
+    return median
+
+
+def read_heavy_page(storage: DBStorage, offset: int, limit: int) -> list:
+    """Читает страницу истории крупного пользователя через OFFSET."""
+    with storage.pool.connect() as connection:
+        return connection.execute(text(offset_page_sql), {
+            'username': heavy_username,
+            'offset': offset,
+            'limit': limit,
+        }).all()
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_history_pages(storage: DBStorage):
+    """Бенчмарк первой и глубокой страницы истории."""
+    reader = HistoryReader([storage.pool])
+    last_row = read_heavy_page(storage, deep_position - 1, 1)[0]
+    deep_cursor = encode_cursor(last_row.created_at, last_row.id)
+
+    first_page = measure('first page', lambda number: reader.read_page(
+        get_username(number), page_size,
+    ))
+    deep_page = measure('keyset deep page', lambda _: reader.read_page(
+        heavy_username, page_size, deep_cursor,
+    ))
+
+    assert deep_page < first_page * 3
+    assert measure('offset deep page', lambda _: read_heavy_page(
+        storage, deep_position, page_size,
+    )) > deep_page * 10
@@ -0,0 +1,97 @@
+import asyncio
+import io
+import logging
+import os
+from time import perf_counter
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.external.normalization import ImageNormalizer
+
+logger = logging.getLogger(__name__)
+
+photo_size = (4000, 3000)
+images_count = 16
+max_dimension = 1024
+quality = 85
+max_pixels = 40000000
+workers = os.cpu_count() or 1
+decoded_size = photo_size[0] * photo_size[1] * 3
+
+
+def get_photo(size: tuple[int, int]) -> bytes:
+    """Создает JPEG заданного размера, похожий на фото с телефона."""
+    noise = Image.effect_noise(size, 8).convert('RGB')
+    output = io.BytesIO()
+    noise.save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+def get_peak_rss() -> int:
+    """Возвращает пиковый RSS текущего процесса в байтах."""
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def normalize(normalizer: ImageNormalizer, photo: bytes) -> UploadFile:
+    """Нормализует изображение."""
+    return await normalizer.normalize(
+        UploadFile(io.BytesIO(photo), size=len(photo)),
+    )
+
+
+async def normalize_all(photos: list[bytes]) -> float:
+    """Нормализует изображения в пуле процессов и возвращает images/s."""
+    normalizer = ImageNormalizer(max_dimension, quality, max_pixels, workers)
+    await normalize(normalizer, get_photo((16, 16)))
+    started = perf_counter()
+    await asyncio.gather(*(normalize(normalizer, photo) for photo in photos))
+    elapsed = perf_counter() - started
+    normalizer.shutdown()
+    return len(photos) / elapsed
+
+
+async def get_worker_rss_growth(photo: bytes) -> int:
+    """Возвращает рост пикового RSS процесса при нормализации."""
+    normalizer = ImageNormalizer(max_dimension, quality, max_pixels, 1)
+    loop = asyncio.get_running_loop()
+    await normalize(normalizer, get_photo((16, 16)))
+    baseline = await loop.run_in_executor(normalizer.executor, get_peak_rss)
+    await normalize(normalizer, photo)
+    peak = await loop.run_in_executor(normalizer.executor, get_peak_rss)
+    normalizer.shutdown()
+    return peak - baseline
+
+
+@pytest.mark.slow
+def test_normalization_throughput():
+    """Бенчмарк пропускной способности нормализации в пуле процессов."""
+    photos = [get_photo(photo_size) for _ in range(images_count)]
+
+    throughput = asyncio.run(normalize_all(photos))
+
+    logger.warning(
+        f'{images_count} photos {photo_size} by {workers} workers: ' +
+        f'{throughput:.1f} images/s',
+    )
+    assert throughput > 0
+
+
+@pytest.mark.slow
+def test_normalization_memory_ceiling():
+    """Бенчмарк памяти процесса нормализации на одно изображение."""
+    photo = get_photo(photo_size)
+    photo_bytes = len(photo)
+
+    growth = asyncio.run(get_worker_rss_growth(photo))
+
+    logger.warning(
+        f'photo {photo_size} of {photo_bytes} bytes: ' +
+        f'worker peak RSS growth {growth} bytes',
+    )
+    assert growth < decoded_size
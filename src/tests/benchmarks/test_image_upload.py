@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import os
+import threading
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from fastapi import UploadFile
+
+from app.external.images import ImageStorage, StoredImage
+
+logger = logging.getLogger(__name__)
+
+uploads_count = 8
+image_size = 32 * 1024 * 1024
+fill_chunk = b'\xff' * 1024 * 1024
+page_size = os.sysconf('SC_PAGE_SIZE')
+sampling_interval = 0.005
+
+
+def get_rss() -> int:
+    """Возвращает текущий RSS процесса в байтах."""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * page_size
+
+
+def get_spooled_image() -> UploadFile:
+    """Создает изображение в файле на диске, как после разбора формы."""
+    spool = SpooledTemporaryFile(max_size=1024 * 1024)
+    for _ in range(image_size // len(fill_chunk)):
+        spool.write(fill_chunk)
+    spool.seek(0)
+    return UploadFile(file=spool, size=image_size)
+
+
+class RSSSampler(threading.Thread):
+    """Поток, запоминающий пиковый RSS процесса."""
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        super().__init__(daemon=True)
+        self.peak = get_rss()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        """Опрашивает RSS до остановки."""
+        while not self.stopped.wait(sampling_interval):
+            self.peak = max(self.peak, get_rss())
+
+
+async def upload_all(tmp_path, images: list[UploadFile]) -> list[StoredImage]:
+    """Загружает изображения параллельно."""
+    storage = ImageStorage(
+        chunk_size=64 * 1024, max_upload_size=image_size, max_writers=4,
+    )
+    stored = await asyncio.gather(*(
+        storage.save(str(tmp_path / f'image-{index}'), image)
+        for index, image in enumerate(images)
+    ))
+    storage.shutdown()
+    return stored
+
+
+@pytest.mark.slow
+def test_concurrent_uploads_peak_rss(tmp_path):
+    """Бенчмарк пикового RSS при параллельной загрузке изображений."""
+    images = [get_spooled_image() for _ in range(uploads_count)]
+    sampler = RSSSampler()
+    baseline = sampler.peak
+    sampler.start()
+
+    stored = asyncio.run(upload_all(tmp_path, images))
+    sampler.stopped.set()
+    sampler.join()
+
+    growth = sampler.peak - baseline
+    logger.warning(
+        f'{uploads_count} uploads of {image_size} bytes: ' +
+        f'peak RSS growth {growth} bytes',
+    )
+    assert sum(image.size for image in stored) == image_size * uploads_count
+    assert growth < image_size
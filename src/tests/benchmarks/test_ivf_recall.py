@@ -0,0 +1,115 @@
+import logging
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pytest
+
+from app.external.embeddings import (
+    embedding_dimension,
+    normalize_embedding,
+    vector_dtype,
+)
+from app.external.ivf import IVFIndex, train_centroids
+from app.external.similarity import SimilarityIndex, search_chunk_rows
+
+logger = logging.getLogger(__name__)
+
+users_count = 1000000
+clusters_count = 4096
+spread = 0.06
+queries_count = 64
+lists_count = 1024
+iterations = 10
+sample_size = 100000
+limit = 10
+nprobes = (1, 4, 16, 64)
+min_recall = 0.9
+
+
+def get_vectors(centers: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Создает эмбеддинги вокруг случайно выбранных центров."""
+    rng = np.random.default_rng(seed)
+    offsets = rng.standard_normal((count, embedding_dimension), vector_dtype)
+    clusters = rng.integers(len(centers), size=count)
+    return normalize_embedding(centers[clusters] + offsets * spread)
+
+
+def write_vectors(path: Path) -> np.ndarray:
+    """Записывает users_count эмбеддингов из clusters_count кластеров."""
+    centers = get_vectors(np.zeros((1, embedding_dimension)), clusters_count, 0)
+    vectors = np.memmap(
+        path,
+        dtype=vector_dtype,
+        mode='w+',
+        shape=(users_count, embedding_dimension),
+    )
+    for start in range(0, users_count, search_chunk_rows):
+        chunk = vectors[start:start + search_chunk_rows]
+        np.copyto(chunk, get_vectors(centers, len(chunk), start + 1))
+    return vectors
+
+
+@pytest.fixture(scope='module')
+def indexes(tmp_path_factory) -> tuple[SimilarityIndex, IVFIndex]:
+    """Создает точный и IVF индексы на users_count эмбеддингов."""
+    tmp_path = tmp_path_factory.mktemp('ivf')
+    vectors = write_vectors(tmp_path / 'vectors.f32')
+    usernames = [f'user-{row}' for row in range(users_count)]
+    centroids = train_centroids(vectors, lists_count, iterations, sample_size)
+    IVFIndex.build(centroids, vectors, usernames).save(tmp_path / 'users.ivf')
+    return (
+        SimilarityIndex(vectors, usernames),
+        IVFIndex.load(tmp_path / 'users.ivf'),
+    )
+
+
+def get_recall(found: list, expected: list) -> float:
+    """Возвращает долю точных ответов, найденных приближенным поиском."""
+    hits = sum(
+        len(dict(matches).keys() & dict(exact).keys())
+        for matches, exact in zip(found, expected)
+    )
+    return hits / (len(expected) * limit)
+
+
+def measure_recall(
+    approximate: IVFIndex, queries: np.ndarray, expected: list, nprobe: int,
+) -> float:
+    """Ищет в nprobe списках и возвращает полноту поиска."""
+    approximate.search(queries, limit, nprobe)
+    started = perf_counter()
+    found = approximate.search(queries, limit, nprobe)
+    throughput = len(queries) / (perf_counter() - started)
+    recall = get_recall(found, expected)
+    logger.warning(
+        f'nprobe {nprobe} of {lists_count} lists: ' +
+        f'recall@{limit} {recall:.3f}, ' +
+        f'{throughput:.1f} queries/s',
+    )
+    return recall
+
+
+def search_exact(exact: SimilarityIndex, queries: np.ndarray) -> list:
+    """Ищет полным перебором для сравнения."""
+    started = perf_counter()
+    found = exact.search(queries, limit)
+    throughput = len(queries) / (perf_counter() - started)
+    logger.warning(f'exact search: {throughput:.1f} queries/s')
+    return found
+
+
+@pytest.mark.slow
+def test_recall_against_exact(indexes: tuple[SimilarityIndex, IVFIndex]):
+    """Бенчмарк полноты и скорости IVF поиска в зависимости от nprobe."""
+    exact, approximate = indexes
+    queries = get_vectors(approximate.vectors, queries_count, users_count)
+    expected = search_exact(exact, queries)
+
+    recalls = [
+        measure_recall(approximate, queries, expected, nprobe)
+        for nprobe in nprobes
+    ]
+
+    assert recalls == sorted(recalls)
+    assert recalls[-1] >= min_recall
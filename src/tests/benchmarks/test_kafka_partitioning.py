@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+
+from app.external.outbox import Outbox, OutboxDrainer
+from app.external.partitioning import get_partitioner
+from app.external.publisher import Publisher
+
+logger = logging.getLogger(__name__)
+
+users_count = 64
+uploads_per_user = 10
+processing_time = 0.002
+topic = 'faces'
+
+
+class PartitionedTopic:
+    """
+    Топик kafka в памяти процесса.
+
+    Сообщение попадает в партицию, выбранную партиционером по ключу,
+    и подтверждается сразу.
+    """
+
+    def __init__(self, partitions_count: int, partitioner: str) -> None:
+        """Метод инициализации."""
+        self.partitions: list[asyncio.Queue] = [
+            asyncio.Queue() for _ in range(partitions_count)
+        ]
+        self.partitioner = get_partitioner(partitioner)
+
+    async def send(self, topic_name, message_value, key=None, headers=None):
+        """Добавляет сообщение в партицию по ключу."""
+        partition_ids = list(range(len(self.partitions)))
+        partition = self.partitioner(key, partition_ids, partition_ids)
+        self.partitions[partition].put_nowait(message_value)
+        delivery = asyncio.get_running_loop().create_future()
+        delivery.set_result(None)
+        return delivery
+
+    async def flush(self):
+        """Сообщения подтверждаются сразу, ждать нечего."""
+
+
+class ConsumerGroup:
+    """Группа потребителей, по одному на партицию."""
+
+    def __init__(self, kafka_topic: PartitionedTopic) -> None:
+        """Метод инициализации."""
+        self.topic = kafka_topic
+        self.processed: dict[str, list[int]] = defaultdict(list)
+
+    async def consume(self) -> None:
+        """Обрабатывает сообщения всех партиций параллельно."""
+        await asyncio.gather(*(
+            self._consume_partition(partition)
+            for partition in self.topic.partitions
+        ))
+
+    async def _consume_partition(self, partition: asyncio.Queue) -> None:
+        while not partition.empty():
+            message = partition.get_nowait()
+            await asyncio.sleep(processing_time)
+            self.processed[message['username']].append(message['upload'])
+
+
+async def fill_outbox(path: Path) -> Outbox:
+    """Создает журнал с загрузками пользователей вперемешку."""
+    outbox = Outbox(path, segment_size=1024 * 1024, fsync='never')
+    for upload in range(uploads_per_user):
+        for user in range(users_count):
+            await outbox.append({'username': f'user-{user}', 'upload': upload})
+    return outbox
+
+
+async def run_pipeline(
+    path: Path, partitions_count: int, partitioner: str,
+) -> tuple[ConsumerGroup, float]:
+    """Отправляет загрузки через журнал и обрабатывает их потребителями."""
+    group = ConsumerGroup(PartitionedTopic(partitions_count, partitioner))
+    outbox = await fill_outbox(path)
+    drainer = OutboxDrainer(
+        outbox, Publisher(group.topic, topic, 1000), batch_size=100,
+    )
+    started = time.perf_counter()
+    delivered = await drainer.drain()
+    await group.consume()
+    await outbox.close()
+    return group, delivered / (time.perf_counter() - started)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('partitioner', ('murmur2', 'crc32'))
+def test_per_user_order_and_scaling(tmp_path, partitioner):
+    """Бенчмарк порядка обработки и масштабирования по партициям."""
+    single, single_throughput = asyncio.run(
+        run_pipeline(tmp_path / 'single', 1, partitioner),
+    )
+    group, throughput = asyncio.run(
+        run_pipeline(tmp_path / 'partitioned', 8, partitioner),
+    )
+
+    logger.warning(
+        f'{partitioner}: 1 partition {single_throughput:.0f} msg/s, ' +
+        f'8 partitions {throughput:.0f} msg/s',
+    )
+    in_order = list(range(uploads_per_user))
+    assert all(uploads == in_order for uploads in group.processed.values())
+    assert all(uploads == in_order for uploads in single.processed.values())
+    assert throughput > single_throughput * 4
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.external.publisher import Publisher
+
+logger = logging.getLogger(__name__)
+
+messages_count = 500
+broker_latency = 0.002
+linger = 0.005
+topic = 'faces'
+
+
+class FakeBroker:
+    """
+    Брокер в памяти процесса.
+
+    Копит сообщения linger секунд и подтверждает пачку целиком
+    через broker_latency секунд, как producer с linger_ms.
+    """
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        self.batch: list[asyncio.Future] = []
+        self.delivered = 0
+
+    async def send(self, topic_name, message_value, key=None, headers=None):
+        """Добавляет сообщение в текущую пачку."""
+        delivery = asyncio.get_running_loop().create_future()
+        if not self.batch:
+            asyncio.get_running_loop().call_later(
+                linger + broker_latency, self._ack, self.batch,
+            )
+        self.batch.append(delivery)
+        return delivery
+
+    async def send_and_wait(self, topic_name, message_value):
+        """Отправляет сообщение и ждет подтверждения."""
+        return await (await self.send(topic_name, message_value))
+
+    async def flush(self):
+        """Ждет подтверждения всех сообщений."""
+        while self.delivered < messages_count:
+            await asyncio.sleep(linger)
+
+    def _ack(self, batch: list[asyncio.Future]) -> None:
+        self.batch = []
+        for delivery in batch:
+            delivery.set_result(None)
+        self.delivered += len(batch)
+
+
+async def publish_sequentially() -> None:
+    """Отправляет сообщения по одному с ожиданием подтверждения."""
+    broker = FakeBroker()
+    for _ in range(messages_count):
+        await broker.send_and_wait(topic, {})
+
+
+async def publish_batched() -> None:
+    """Отправляет сообщения через Publisher."""
+    broker = FakeBroker()
+    publisher = Publisher(broker, topic, max_in_flight=100)
+    for _ in range(messages_count):
+        await publisher.publish({})
+    await publisher.flush()
+
+
+def measure(publish) -> float:
+    """Возвращает количество сообщений в секунду."""
+    started = time.perf_counter()
+    asyncio.run(publish())
+    return messages_count / (time.perf_counter() - started)
+
+
+@pytest.mark.slow
+def test_publish_throughput():
+    """Бенчмарк пропускной способности публикации сообщений."""
+    sequential = measure(publish_sequentially)
+    batched = measure(publish_batched)
+
+    logger.warning(
+        f'kafka publish: sequential {sequential:.0f} msg/s, ' +
+        f'batched {batched:.0f} msg/s',
+    )
+    assert batched > sequential * 10
@@ -0,0 +1,103 @@
+import itertools
+import logging
+import time
+
+import pytest
+from aiokafka import codec as kafka_codec
+from aiokafka.record.default_records import DefaultRecordBatchBuilder
+
+from app.external.serialization import Serializer, get_serializer
+
+logger = logging.getLogger(__name__)
+
+messages_count = 20000
+batch_messages = 100
+batch_size = 16384
+Combination = tuple[str, str]
+Costs = dict[Combination, tuple[float, float]]
+codec_ids = {  # noqa: WPS407 aiokafka record batch attributes
+    'none': 0,
+    'gzip': 1,
+    'snappy': 2,
+    'lz4': 3,
+    'zstd': 4,
+}
+serializer_names = ('json', 'orjson', 'msgpack')
+
+
+def get_message(index: int) -> dict[str, str]:
+    """Создает сообщение о загруженном изображении."""
+    return {
+        'username': f'user-{index}',
+        'file_path': f'/var/www/face_verification/vectors/user-{index}-' +
+        '2024-08-20T12:00:00.000000',
+    }
+
+
+def build_batch(serializer: Serializer, codec: str, first: int) -> int:
+    """Собирает пачку сообщений и возвращает ее размер в байтах."""
+    builder = DefaultRecordBatchBuilder(
+        magic=2,
+        compression_type=codec_ids[codec],
+        is_transactional=False,
+        producer_id=-1,
+        producer_epoch=-1,
+        base_sequence=-1,
+        batch_size=batch_size,
+    )
+    for offset in range(batch_messages):
+        builder.append(
+            offset,
+            timestamp=None,
+            key=None,
+            value=serializer.dumps(get_message(first + offset)),
+            headers=serializer.headers,
+        )
+    return len(builder.build())
+
+
+def encode(serializer_name: str, codec: str) -> tuple[float, float]:
+    """Кодирует сообщения пачками, как AIOKafkaProducer."""
+    serializer = get_serializer(serializer_name)
+    started = time.process_time()
+    total_bytes = sum(
+        build_batch(serializer, codec, first)
+        for first in range(0, messages_count, batch_messages)
+    )
+    cpu_time = time.process_time() - started
+    return cpu_time / messages_count, total_bytes / messages_count
+
+
+def is_available(serializer_name: str, codec: str) -> bool:
+    """Проверяет что формат и кодек установлены."""
+    try:
+        get_serializer(serializer_name)
+    except Exception:
+        return False
+    return codec == 'none' or getattr(kafka_codec, f'has_{codec}')()
+
+
+def log_costs(costs: Costs) -> None:
+    """Записывает стоимость сообщения для каждой комбинации в лог."""
+    for combination, (cpu_time, size) in costs.items():
+        microseconds = round(cpu_time * 1e6, 1)
+        logger.warning(
+            '{0}+{1}: {2} us CPU, {3:.1f} bytes per message'.format(
+                *combination, microseconds, size,
+            ),
+        )
+
+
+@pytest.mark.slow
+def test_wire_format_cost():
+    """Бенчмарк CPU и байт на сообщение для форматов и кодеков."""
+    costs = {
+        combination: encode(*combination)
+        for combination in itertools.product(serializer_names, codec_ids)
+        if is_available(*combination)
+    }
+
+    log_costs(costs)
+    _, gzip_size = costs['json', 'gzip']
+    _, plain_size = costs['json', 'none']
+    assert gzip_size < plain_size
@@ -0,0 +1,111 @@
+import logging
+import secrets
+from functools import partial
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import CollectorRegistry
+
+from app.api.handlers import router
+from app.api.reports.handlers import get_balance_reader
+from app.core.models import BalanceSummary
+from app.metrics.metrics import SERVICE_PREFIX, PrometheusClient
+from app.middleware.middleware import MetricsMiddleware
+
+logger = logging.getLogger(__name__)
+
+fuzz_count = 1000
+max_series = 6
+summary_query = {'end_date': '2024-01-01T00:00:00'}
+invalid_query = {'end_date': 'invalid'}
+token_headers = {'authorization': 'Bearer token'}
+request_count_name = f'{SERVICE_PREFIX}_request_count_total'
+
+FuzzRequest = tuple[str, dict[str, str]]
+
+
+def create_app() -> FastAPI:
+    """Создает приложение с маршрутами сервиса и заглушкой итогов."""
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+    reader = AsyncMock()
+    reader.summarize.return_value = BalanceSummary(
+        transactions=0, deposits=0, withdrawals=0, balance_change=0,
+    )
+    app.dependency_overrides[get_balance_reader] = lambda: reader
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+    return app
+
+
+async def serve_with_state(
+    app: FastAPI, metrics_client: PrometheusClient, scope, receive, send,
+) -> None:
+    """Передает клиент метрик в состоянии запроса, как lifespan."""
+    scope['state'] = {'metrics_client': metrics_client}
+    await app(scope, receive, send)
+
+
+def get_fuzz_requests() -> list[FuzzRequest]:
+    """Возвращает запросы со случайными путями и параметрами."""
+    tokens = [secrets.token_hex(4) for _ in range(fuzz_count)]
+    return [
+        fuzz_request
+        for token in tokens
+        for fuzz_request in (
+            (f'/reports/{token}/summary', summary_query),
+            (f'/reports/{token}/summary', invalid_query),
+            (f'/probe/{token}', summary_query),
+        )
+    ]
+
+
+async def send_fuzz_requests(
+    metrics_client: PrometheusClient,
+) -> set[tuple[str, int]]:
+    """
+    Отправляет запросы на случайные пути.
+
+    :param metrics_client: Клиент метрик.
+    :type metrics_client: PrometheusClient
+    :return: Пары путь и статус, то есть ряды при лэйблах из пути.
+    :rtype: set[tuple[str, int]]
+    """
+    raw_series = set()
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(
+            partial(serve_with_state, create_app(), metrics_client),
+        ),
+        base_url='http://test',
+    ) as client:
+        for path, query in get_fuzz_requests():
+            response = await client.get(
+                path, params=query, headers=token_headers,
+            )
+            raw_series.add((path, response.status_code))
+    return raw_series
+
+
+def count_series(registry: CollectorRegistry) -> int:
+    """Возвращает количество рядов метрики REQUEST_COUNT."""
+    return sum(
+        sample.name == request_count_name
+        for metric in registry.collect()
+        for sample in metric.samples
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_series_under_path_fuzzing():
+    """Бенчмарк количества рядов метрик при случайных путях запросов."""
+    registry = CollectorRegistry()
+
+    raw_series = await send_fuzz_requests(PrometheusClient(None, registry))
+
+    series = count_series(registry)
+    raw_count = len(raw_series)
+    logger.warning(f'{series} series, {raw_count} with raw path labels')
+    assert series <= max_series
@@ -0,0 +1,103 @@
+import logging
+from functools import partial
+from time import perf_counter
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import CollectorRegistry
+
+from app.api.handlers import router
+from app.api.healthz.handlers import healthz_router
+from app.metrics.metrics import PrometheusClient
+from app.middleware.middleware import MetricsMiddleware
+from tests.benchmarks.baseline_middleware import add_baseline_middleware
+
+logger = logging.getLogger(__name__)
+
+requests_count = 3000
+warmup_count = 300
+token_headers = {'authorization': 'token'}
+
+
+@pytest.fixture(scope='module')
+def metrics_client() -> PrometheusClient:
+    """Создает клиент метрик prometheus."""
+    return PrometheusClient(None, CollectorRegistry())
+
+
+def create_app(is_baseline: bool) -> FastAPI:
+    """Создает приложение с маршрутами сервиса и его middleware."""
+    app = FastAPI()
+    if is_baseline:
+        add_baseline_middleware(app)
+    else:
+        app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+    app.include_router(healthz_router)
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+    app.service.check_token.return_value = {'message': 'ok'}
+    return app
+
+
+async def serve_with_state(
+    app: FastAPI, metrics_client: PrometheusClient, scope, receive, send,
+) -> None:
+    """Передает клиент метрик в состоянии запроса, как lifespan."""
+    scope['state'] = {'metrics_client': metrics_client, 'tracer': None}
+    await app(scope, receive, send)
+
+
+async def measure(client: httpx.AsyncClient, send_request) -> float:
+    """Выполняет requests_count запросов и возвращает запросы в секунду."""
+    for _ in range(warmup_count):
+        await send_request(client)
+    started = perf_counter()
+    for _ in range(requests_count):
+        await send_request(client)
+    return requests_count / (perf_counter() - started)
+
+
+async def measure_app(
+    is_baseline: bool, metrics_client: PrometheusClient,
+) -> dict[str, float]:
+    """Измеряет пропускную способность /healthz/up и /check_token."""
+    transport = httpx.ASGITransport(
+        partial(serve_with_state, create_app(is_baseline), metrics_client),
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://test',
+    ) as client:
+        return {
+            '/healthz/up': await measure(
+                client, lambda app_client: app_client.get('/healthz/up'),
+            ),
+            '/check_token': await measure(
+                client, lambda app_client: app_client.post(
+                    '/check_token', headers=token_headers,
+                ),
+            ),
+        }
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_middleware_throughput(metrics_client: PrometheusClient):
+    """Бенчмарк запросов в секунду с прежними middleware и MetricsMiddleware."""
+    baseline = await measure_app(
+        is_baseline=True, metrics_client=metrics_client,
+    )
+    single = await measure_app(
+        is_baseline=False, metrics_client=metrics_client,
+    )
+
+    for path, throughput in single.items():
+        logger.warning(
+            f'{path}: {throughput:.0f} requests/s, ' +
+            f'with the baseline middleware {baseline[path]:.0f}',
+        )
+    # wall clock ratios are noisy on shared runners, only a regression fails
+    assert all(
+        single[measured] >= baseline[measured] for measured in single
+    )
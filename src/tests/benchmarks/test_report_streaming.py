@@ -0,0 +1,110 @@
+import logging
+import tracemalloc
+from datetime import datetime
+from time import perf_counter
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.external.postgres.reports import ReportWriter
+from app.external.postgres.storage import DBStorage
+from app.external.report_formats import ReportFormat
+
+logger = logging.getLogger(__name__)
+
+small_count = 100000
+large_count = 1000000
+page_size = 10000
+username_prefix = 'report-'
+started_at = datetime.fromisoformat('2024-01-01')
+ended_at = datetime.fromisoformat('2025-01-01')
+create_user_sql = """
+WITH created AS (
+    INSERT INTO users (
+        username, hashed_password, balance, is_deleted, is_verified
+    )
+    VALUES (:username, 'hash', 0, false, false)
+    RETURNING id
+)
+INSERT INTO transactions (
+    id_user, transaction_type, amount, created_at, is_deleted
+)
+SELECT
+    created.id,
+    row % 3 != 0,
+    row % 100 + 1,
+    :started_at + row * interval '1 second',
+    false
+FROM created, generate_series(1, :count) AS row
+"""
+delete_users_sql = """
+WITH users AS (
+    SELECT id FROM users WHERE username LIKE :pattern
+), links AS (
+    DELETE FROM report_transaction
+    USING reports
+    WHERE report_transaction.id_report = reports.id
+        AND reports.id_user IN (SELECT id FROM users)
+), reports AS (
+    DELETE FROM reports WHERE id_user IN (SELECT id FROM users)
+), transactions AS (
+    DELETE FROM transactions WHERE id_user IN (SELECT id FROM users)
+)
+SELECT 1
+"""
+delete_user_sql = 'DELETE FROM users WHERE username LIKE :pattern'
+
+
+@pytest.fixture(scope='module')
+def storage():
+    """Создает пользователей с small_count и large_count транзакций."""
+    db_storage = DBStorage()
+    with Session(db_storage.pool) as session:
+        for count in (small_count, large_count):
+            session.execute(text(create_user_sql), {
+                'username': f'{username_prefix}{count}',
+                'started_at': started_at,
+                'count': count,
+            })
+        session.commit()
+    yield db_storage
+    delete_users(db_storage)
+
+
+def delete_users(db_storage: DBStorage) -> None:
+    """Удаляет тестовых пользователей с транзакциями и отчетами."""
+    pattern = {'pattern': f'{username_prefix}_%'}
+    with Session(db_storage.pool) as session:
+        session.execute(text(delete_users_sql), pattern)
+        session.execute(text(delete_user_sql), pattern)
+        session.commit()
+
+
+def measure_report(writer: ReportWriter, count: int) -> int:
+    """Читает отчет пользователя и возвращает пик памяти."""
+    tracemalloc.start()
+    started = perf_counter()
+    report_size = sum(len(chunk) for chunk in writer.open(
+        f'{username_prefix}{count}', started_at, ended_at, ReportFormat.csv,
+    ))
+    throughput = round(count / (perf_counter() - started))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    logger.warning(
+        f'{count} transactions: {throughput} rows/s, ' +
+        f'{report_size} bytes, peak memory {peak} bytes',
+    )
+    return peak
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_report_memory_is_constant(storage: DBStorage):
+    """Бенчмарк памяти: пик не растет с числом транзакций."""
+    writer = ReportWriter([storage.pool], page_size)
+
+    small_peak = measure_report(writer, small_count)
+    large_peak = measure_report(writer, large_count)
+
+    assert large_peak < small_peak * 2
@@ -0,0 +1,123 @@
+import logging
+import statistics
+from datetime import datetime
+from time import perf_counter
+
+import pytest
+from sqlalchemy import text
+
+from app.external.postgres.rollups import BalanceReader, repair_rollups
+from app.external.postgres.storage import DBStorage
+
+logger = logging.getLogger(__name__)
+
+transactions_count = 1000000
+requests_count = 50
+username = 'rollup-heavy'
+started_at = datetime.fromisoformat('2020-01-01 00:30')
+window_start = datetime.fromisoformat('2020-01-01 12:00')
+window_end = datetime.fromisoformat('2021-10-01 12:00')
+user_query = {'username': username}
+create_user_sql = """
+WITH created AS (
+    INSERT INTO users (
+        username, hashed_password, balance, is_deleted, is_verified
+    )
+    VALUES (:username, 'hash', 0, false, false)
+    RETURNING id
+), inserted AS (
+    INSERT INTO transactions (
+        id_user, transaction_type, amount, created_at, is_deleted
+    )
+    SELECT
+        created.id,
+        row % 3 != 0,
+        row % 100 + 1,
+        :started_at + row * interval '1 minute',
+        false
+    FROM created, generate_series(1, :count) AS row
+)
+SELECT id FROM created
+"""
+raw_summary_sql = """
+SELECT
+    count(*),
+    coalesce(sum(amount) FILTER (WHERE transaction_type), 0),
+    coalesce(sum(amount) FILTER (WHERE NOT transaction_type), 0)
+FROM transactions
+WHERE id_user = (SELECT id FROM users WHERE username = :username)
+    AND is_deleted = false
+    AND created_at >= :start_date
+    AND created_at <= :end_date
+"""
+delete_user_sql = """
+WITH users AS (
+    SELECT id FROM users WHERE username = :username
+), rollups AS (
+    DELETE FROM transaction_rollups WHERE id_user IN (SELECT id FROM users)
+), transactions AS (
+    DELETE FROM transactions WHERE id_user IN (SELECT id FROM users)
+)
+SELECT 1
+"""
+delete_user_row_sql = 'DELETE FROM users WHERE username = :username'
+
+
+@pytest.fixture(scope='module')
+def storage():
+    """Создает пользователя с transactions_count транзакций и агрегатами."""
+    db_storage = DBStorage()
+    with db_storage.pool.begin() as connection:
+        user_id = connection.scalar(text(create_user_sql), {
+            **user_query,
+            'started_at': started_at,
+            'count': transactions_count,
+        })
+    repair_rollups(db_storage.pool, [user_id])
+    yield db_storage
+    delete_user(db_storage)
+
+
+def delete_user(db_storage: DBStorage) -> None:
+    """Удаляет тестового пользователя с транзакциями и агрегатами."""
+    with db_storage.pool.begin() as connection:
+        for sql in (delete_user_sql, delete_user_row_sql):
+            connection.execute(text(sql), user_query)
+
+
+def measure(name: str, read_summary) -> float:
+    """Выполняет requests_count запросов и возвращает медиану задержки."""
+    latencies = []
+    for _ in range(requests_count):
+        started = perf_counter()
+        read_summary()
+        latencies.append(perf_counter() - started)
+    median = statistics.median(latencies)
+    logger.warning(f'{name}: p50 {median:.6f} s')
+    return median
+
+
+def read_raw_summary(storage: DBStorage) -> tuple[int, int, int]:
+    """Считает итоги периода по самим транзакциям."""
+    with storage.pool.connect() as connection:
+        return connection.execute(text(raw_summary_sql), {
+            **user_query,
+            'start_date': window_start,
+            'end_date': window_end,
+        }).one()
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_rollup_summary(storage: DBStorage):
+    """Бенчмарк итогов периода по агрегатам и по транзакциям."""
+    reader = BalanceReader([storage.pool])
+    summary = reader.read_summary(username, window_start, window_end)
+
+    assert tuple(read_raw_summary(storage)) == (
+        summary.transactions, summary.deposits, summary.withdrawals,
+    )
+    raw = measure('raw transactions', lambda: read_raw_summary(storage))
+    assert measure('rollups', lambda: reader.read_summary(
+        username, window_start, window_end,
+    )) * 10 < raw
@@ -0,0 +1,109 @@
+import logging
+from pathlib import Path
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.external.embeddings import (
+    embedding_dimension,
+    normalize_embedding,
+    vector_dtype,
+)
+from app.external.similarity import SimilarityIndex, search_chunk_rows
+
+logger = logging.getLogger(__name__)
+
+users_count = 1000000
+queries_count = 64
+changes_count = 10000
+limit = 10
+max_load_time = 1
+
+
+def get_vectors(count: int, seed: int) -> np.ndarray:
+    """Создает случайные эмбеддинги единичной длины."""
+    rng = np.random.default_rng(seed)
+    return normalize_embedding(
+        rng.standard_normal((count, embedding_dimension), dtype=vector_dtype),
+    )
+
+
+def get_usernames(rows: range) -> list[str]:
+    """Создает имена пользователей строк."""
+    return [f'user-{row}' for row in rows]
+
+
+def get_changes(count: int) -> list[SimpleNamespace]:
+    """Создает изменения эмбеддингов каждого второго пользователя."""
+    usernames = get_usernames(range(0, users_count, 2))
+    return [
+        SimpleNamespace(
+            username=username, vector=vector.tobytes(), vector_updated_at=None,
+        )
+        for username, vector in zip(usernames, get_vectors(count, users_count))
+    ]
+
+
+@pytest.fixture(scope='module')
+def snapshot_path(tmp_path_factory) -> Path:
+    """Создает снимок индекса на users_count эмбеддингов."""
+    tmp_path = tmp_path_factory.mktemp('similarity')
+    vectors = np.memmap(
+        tmp_path / 'vectors.f32',
+        dtype=vector_dtype,
+        mode='w+',
+        shape=(users_count, embedding_dimension),
+    )
+    for start in range(0, users_count, search_chunk_rows):
+        chunk = vectors[start:start + search_chunk_rows]
+        np.copyto(chunk, get_vectors(len(chunk), seed=start))
+    path = tmp_path / 'users.idx'
+    SimilarityIndex(vectors, get_usernames(range(users_count))).save(path)
+    return path
+
+
+@pytest.mark.slow
+def test_snapshot_load_time(snapshot_path: Path):
+    """Бенчмарк загрузки снимка с отображением матрицы в память."""
+    started = perf_counter()
+    index = SimilarityIndex.load(snapshot_path)
+    elapsed = perf_counter() - started
+
+    logger.warning(f'{users_count} vectors loaded in {elapsed:.3f}s')
+    assert len(index.positions) == users_count
+    assert elapsed < max_load_time
+
+
+@pytest.mark.slow
+def test_batched_search_throughput(snapshot_path: Path):
+    """Бенчмарк пропускной способности поиска пачкой запросов."""
+    index = SimilarityIndex.load(snapshot_path)
+    queries = get_vectors(queries_count, seed=users_count + 1)
+
+    started = perf_counter()
+    found = index.search(queries, limit=limit)
+    throughput = queries_count / (perf_counter() - started)
+
+    logger.warning(
+        f'{queries_count} queries over {users_count} vectors: ' +
+        f'{throughput:.1f} queries/s',
+    )
+    assert all(len(matches) == limit for matches in found)
+
+
+@pytest.mark.slow
+def test_incremental_refresh(snapshot_path: Path):
+    """Бенчмарк применения изменений эмбеддингов к загруженному индексу."""
+    index = SimilarityIndex.load(snapshot_path)
+    changes = get_changes(changes_count)
+
+    started = perf_counter()
+    index.apply_changes(changes)
+    elapsed = perf_counter() - started
+
+    logger.warning(
+        f'{changes_count} vector changes applied in {elapsed:.3f}s',
+    )
+    assert len(index.positions) == users_count
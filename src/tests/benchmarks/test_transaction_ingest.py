@@ -0,0 +1,109 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import pytest
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.models import Transaction
+from app.external.postgres.models import Transaction as DBTransaction
+from app.external.postgres.models import TransactionRollup as DBRollup
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.storage import DBStorage
+from app.external.postgres.transactions import TransactionWriter
+
+logger = logging.getLogger(__name__)
+
+users_count = 100
+writers_count = 8
+batches_count = 200
+batch_size = 500
+amount = 1
+username_prefix = 'ingest-'
+
+
+def get_username(row: int) -> str:
+    """Возвращает имя тестового пользователя."""
+    user_index = row % users_count
+    return f'{username_prefix}{user_index}'
+
+
+@pytest.fixture(scope='module')
+def storage():
+    """Создает пользователей и удаляет их вместе с транзакциями."""
+    db_storage = DBStorage()
+    with Session(db_storage.pool) as session:
+        session.execute(insert(DBUser), [
+            {
+                'username': get_username(row),
+                'hashed_password': 'hash',  # noqa: S105 test value
+            }
+            for row in range(users_count)
+        ])
+        session.commit()
+    yield db_storage
+    delete_users(db_storage)
+
+
+def delete_users(db_storage: DBStorage) -> None:
+    """Удаляет тестовых пользователей, их транзакции и агрегаты."""
+    with Session(db_storage.pool) as session:
+        user_ids = select(DBUser.id).where(
+            DBUser.username.startswith(username_prefix),
+        )
+        for model in (DBRollup, DBTransaction):
+            session.execute(delete(model).where(model.id_user.in_(user_ids)))
+        session.execute(
+            delete(DBUser).where(DBUser.username.startswith(username_prefix)),
+        )
+        session.commit()
+
+
+def get_batch(batch_index: int) -> list[Transaction]:
+    """Создает пачку, пользователи которой пересекаются с соседними."""
+    return [
+        Transaction(
+            username=get_username(batch_index + row),
+            idempotency_key=f'{batch_index}-{row}',
+            transaction_type=True,
+            amount=amount,
+        )
+        for row in range(batch_size)
+    ]
+
+
+def get_total_balance(storage: DBStorage) -> int:
+    """Возвращает сумму балансов тестовых пользователей."""
+    with Session(storage.pool) as session:
+        return session.scalar(
+            select(func.sum(DBUser.balance)).where(
+                DBUser.username.startswith(username_prefix),
+            ),
+        )
+
+
+def measure_ingest(
+    writer: TransactionWriter, batches: list[list[Transaction]],
+) -> int:
+    """Записывает пачки параллельно и возвращает число новых транзакций."""
+    started = perf_counter()
+    with ThreadPoolExecutor(writers_count) as executor:
+        ingested = list(executor.map(writer.write, batches))
+    throughput = round(batches_count * batch_size / (perf_counter() - started))
+    logger.warning(f'{writers_count} writers: {throughput} transactions/s')
+    return sum(shard.accepted for shard in ingested)
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_concurrent_ingest_throughput(storage: DBStorage):
+    """Бенчмарк параллельной записи пачек с повторной отправкой."""
+    writer = TransactionWriter([storage.pool])
+    batches = [get_batch(batch_index) for batch_index in range(batches_count)]
+    resent = batches[::2]
+
+    accepted = measure_ingest(writer, batches + resent)
+
+    assert accepted == batches_count * batch_size
+    assert get_total_balance(storage) == batches_count * batch_size * amount
@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+from sqlalchemy import delete, text
+
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from app.external.postgres.bulk_import import ImportProgress, import_users
+from app.external.postgres.models import User
+from app.external.postgres.storage import DBStorage
+
+logger = logging.getLogger(__name__)
+
+users_count = 200000
+load_workers = 4
+max_login_latency = 1
+# released revisions before it are not written for online migrations
+base_revision = '4e7f4a00d63f'
+alembic_config = 'alembic.ini'
+login_query = text(
+    'SELECT id, hashed_password FROM users WHERE username = :username',
+)
+
+
+def generate_load(storage: DBStorage, stop: threading.Event) -> list[float]:
+    """Выполняет запросы логина до остановки и возвращает задержки."""
+    latencies = []
+    request_number = 0
+    while not stop.is_set():
+        request_number = (request_number + 1) % users_count
+        started = time.perf_counter()
+        with storage.pool.connect() as connection:
+            connection.execute(
+                login_query, {'username': f'load-{request_number}'},
+            ).first()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+@pytest.fixture
+def loaded_storage() -> Iterator[DBStorage]:
+    """Заполняет таблицу users и откатывает схему до базовой ревизии."""
+    storage = DBStorage()
+    command.upgrade(AlembicConfig(alembic_config), 'head')
+    rows = ((f'load-{index}', 'hash') for index in range(users_count))
+    import_users([storage.pool], rows, ImportProgress(), batch_size=users_count)
+    command.downgrade(AlembicConfig(alembic_config), base_revision)
+    yield storage
+    command.upgrade(AlembicConfig(alembic_config), 'head')
+    with storage.pool.begin() as connection:
+        connection.execute(delete(User).where(User.username.like('load-%')))
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_migrations_do_not_block_logins(loaded_storage: DBStorage):
+    """Тестирует миграции под нагрузкой на путь логина."""
+    stop = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=load_workers) as executor:
+        futures = [
+            executor.submit(generate_load, loaded_storage, stop)
+            for _ in range(load_workers)
+        ]
+        command.upgrade(AlembicConfig(alembic_config), 'head')
+        stop.set()
+
+    latencies = [
+        latency for future in futures for latency in future.result()
+    ]
+    max_latency = max(latencies)
+    logger.warning(f'max login latency during migration: {max_latency}')
+    assert max_latency < max_login_latency
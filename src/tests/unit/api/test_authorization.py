@@ -0,0 +1,91 @@
+from typing import Any
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from fastapi import FastAPI, status
+
+from app.api.handlers import router
+from app.api.transactions.handlers import get_transaction_writer
+from app.core.errors import AuthorizationError
+from app.core.models import IngestResult
+
+username = 'george'
+token_headers = {'authorization': 'Bearer token'}
+period = {'start_date': '2024-03-01', 'end_date': '2024-03-02'}
+ingest_key = 'ingest-key'
+service_headers = {'x-ingest-key': ingest_key}
+
+
+def get_batch(owner: str) -> dict[str, Any]:
+    """Возвращает пачку с одним пополнением баланса пользователя."""
+    return {'transactions': [{
+        'username': owner,
+        'idempotency_key': 'deposit',
+        'transaction_type': True,
+        'amount': 10,
+    }]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method, path', (
+    pytest.param('POST', f'/reports/{username}', id='report'),
+    pytest.param('GET', f'/reports/{username}/summary', id='summary'),
+    pytest.param('GET', f'/transactions/{username}', id='history'),
+))
+async def test_user_data_requires_owner_token(method, path):
+    """Тестирует отказ в данных пользователя по токену другого."""
+    app = FastAPI()
+    app.include_router(router)
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+    app.service.check_token.side_effect = AuthorizationError()
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url='http://test',
+    ) as client:
+        response = await client.request(
+            method, path, params=period, headers=token_headers,
+        )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    app.service.check_token.assert_awaited_once_with(
+        token_headers['authorization'], username,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('headers, owner, expected_status', (
+    pytest.param({}, username, status.HTTP_401_UNAUTHORIZED, id='no key'),
+    pytest.param(
+        token_headers, 'alice', status.HTTP_401_UNAUTHORIZED, id='cross user',
+    ),
+    pytest.param(
+        token_headers, username, status.HTTP_401_UNAUTHORIZED, id='self',
+    ),
+    pytest.param(
+        {'x-ingest-key': 'guess'},
+        username,
+        status.HTTP_401_UNAUTHORIZED,
+        id='wrong key',
+    ),
+    pytest.param(service_headers, username, status.HTTP_200_OK, id='service'),
+))
+async def test_ingest_requires_service_key(headers, owner, expected_status):
+    """Тестирует запись пачки транзакций только с ключом сервиса."""
+    app = FastAPI()
+    app.include_router(router)
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+    app.service.encoder.config.ingest_key = ingest_key
+    writer = AsyncMock()
+    writer.ingest.return_value = IngestResult(accepted=1)
+    app.dependency_overrides[get_transaction_writer] = lambda: writer
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url='http://test',
+    ) as client:
+        response = await client.post(
+            '/transactions/batch', json=get_batch(owner), headers=headers,
+        )
+
+    assert response.status_code == expected_status
+    assert writer.ingest.called == (expected_status == status.HTTP_200_OK)
@@ -0,0 +1,94 @@
+import tracemalloc
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+from fastapi import FastAPI, UploadFile, status
+from starlette.datastructures import FormData
+
+from app.api.handlers import detach_upload, router
+from app.core.config.config import get_settings
+from app.external.images import ImageStorage
+
+image_size = 524288
+chunk_size = 16384
+uploads_count = 10
+
+
+def get_upload() -> UploadFile:
+    """Создает загрузку в памяти, как после разбора формы."""
+    spool = SpooledTemporaryFile(max_size=image_size * 2)
+    spool.write(b'\xff' * image_size)
+    spool.seek(0)
+    return UploadFile(file=spool, size=image_size, filename='face.jpg')
+
+
+@pytest.fixture
+def storage():
+    """Создает хранилище изображений с одним потоком записи."""
+    image_storage = ImageStorage(
+        chunk_size=chunk_size, max_upload_size=image_size, max_writers=1,
+    )
+    yield image_storage
+    image_storage.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_detach_upload_survives_form_close():
+    """Тестирует что закрытие формы не закрывает переданный файл."""
+    image = get_upload()
+    form = FormData([('image', image)])
+
+    detached = detach_upload(image)
+    await form.close()
+
+    assert not detached.file.closed
+    assert detached.filename == image.filename
+    assert len(await detached.read()) == image_size
+
+
+async def save_detached(
+    storage: ImageStorage, file_path: Path, image: UploadFile,
+) -> None:
+    """Сохраняет загрузку, переданную из формы."""
+    detached = detach_upload(image)
+    await storage.save(str(file_path), detached)
+    await detached.close()
+
+
+@pytest.mark.asyncio
+async def test_detach_upload_allocations(tmp_path, storage: ImageStorage):
+    """Тестирует что байты загрузки не копируются в памяти."""
+    uploads = [get_upload() for _ in range(uploads_count)]
+    await save_detached(storage, tmp_path / 'warmup', get_upload())  # metrics
+
+    tracemalloc.start()
+    for index, image in enumerate(uploads):
+        await save_detached(storage, tmp_path / f'image-{index}', image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < chunk_size * 4
+
+
+@pytest.mark.asyncio
+async def test_verify_rejects_large_upload(monkeypatch):
+    """Тестирует ответ 413 без запуска фоновой задачи."""
+    monkeypatch.setattr(get_settings().kafka, 'max_upload_size', chunk_size)
+    app = FastAPI()
+    app.include_router(router)
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url='http://test',
+    ) as client:
+        response = await client.post(
+            '/verify',
+            data={'username': 'george'},
+            files={'image': ('face.jpg', b'\xff' * image_size)},
+        )
+
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    app.service.verify.assert_not_called()
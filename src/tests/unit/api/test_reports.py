@@ -0,0 +1,43 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+from fastapi import FastAPI, status
+
+from app.api.handlers import router
+from app.api.reports.handlers import get_report_writer
+
+username = 'george'
+token_headers = {'authorization': 'Bearer token'}
+period = {'start_date': '2024-03-01', 'end_date': '2024-03-02'}
+report_chunks = (b'id,created_at\n', b'1,2024-03-01\n')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method, expected_status', (
+    pytest.param('POST', status.HTTP_200_OK, id='post'),
+    pytest.param('GET', status.HTTP_405_METHOD_NOT_ALLOWED, id='get'),
+))
+async def test_report_created_only_by_post(method, expected_status):
+    """Тестирует создание отчета только запросом POST."""
+    app = FastAPI()
+    app.include_router(router)
+    app.service = AsyncMock()  # type: ignore # app has **extras for it
+    writer = MagicMock()
+    writer.open.return_value = iter(report_chunks)
+    app.dependency_overrides[get_report_writer] = lambda: writer
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url='http://test',
+    ) as client:
+        response = await client.request(
+            method,
+            f'/reports/{username}',
+            params=period,
+            headers=token_headers,
+        )
+
+    assert response.status_code == expected_status
+    assert writer.open.called == (expected_status == status.HTTP_200_OK)
+    if writer.open.called:
+        assert response.content == b''.join(report_chunks)
@@ -265,3 +265,22 @@ class TestAuthenticate:
             await srv_encoder_mock.authenticate(
                 user_creds, encoded_token_value,
             )
+
+
+class TestCheckToken:
+    """Тестирует метод check_token."""
+
+    @pytest.mark.asyncio
+    async def test_check_token_owner(self, srv_encoder_mock: AuthService):
+        """Тестирует проверку владельца токена."""
+        srv_encoder_mock.cache.get_cache.return_value = token_list[0]
+
+        checked = await srv_encoder_mock.check_token(
+            test_encoded_token_value, token_list[0].subject,
+        )
+
+        assert checked == {'message': 'ok'}
+        with pytest.raises(AuthorizationError):
+            await srv_encoder_mock.check_token(
+                test_encoded_token_value, token_list[1].subject,
+            )
@@ -76,10 +76,13 @@ class TestAuthConfig:
     test_algorithm_key = 'TOKEN_ALGORITHM'
     test_secret_key_value = '09d25e094faa6ca2556c818166b7a9563b93f7099f'  # noqa: S105, E501 test value
     test_algorithm_value = 'HS256'
+    test_ingest_key_key = 'INGEST_KEY'
+    test_ingest_key_value = 'ingest-key'
 
     valid_config_values = {
         test_secret_key_key: test_secret_key_value,
         test_algorithm_key: test_algorithm_value,
+        test_ingest_key_key: test_ingest_key_value,
     }
 
     config_values_no_secret_key = {
@@ -102,6 +105,7 @@ class TestAuthConfig:
         access_data = MagicMock()
         access_data.algorithm_key = self.test_algorithm_key
         access_data.secret_key_key = self.test_secret_key_key
+        access_data.ingest_key_key = self.test_ingest_key_key
         access_data.jwt_secrets_path = '/valid_path'
         return access_data
 
@@ -121,6 +125,7 @@ class TestAuthConfig:
 
         assert config.secret_key == self.test_secret_key_value
         assert config.algorithm == self.test_algorithm_value
+        assert config.ingest_key == self.test_ingest_key_value
 
     def test_init_raises_on_secret_key_is_none(
         self, auth_access_data, monkeypatch,
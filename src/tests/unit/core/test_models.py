@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.models import Transaction, TransactionBatch, validation_rules
+
+transaction_fields = {
+    'username': 'george',
+    'idempotency_key': 'deposit',
+    'transaction_type': True,
+    'amount': 10,
+}
+
+
+@pytest.mark.parametrize('created_at, expected', (
+    pytest.param('2024-03-01T03:00:00+03:00', '2024-03-01', id='aware'),
+    pytest.param('2024-03-01T03:00:00', '2024-03-01T03:00:00', id='naive'),
+))
+def test_transaction_created_at_in_utc(created_at, expected):
+    """Тестирует перевод времени транзакции в UTC без часового пояса."""
+    transaction = Transaction(
+        **transaction_fields, created_at=datetime.fromisoformat(created_at),
+    )
+
+    assert transaction.created_at == datetime.fromisoformat(expected)
+
+
+def test_transaction_amount_fits_integer():
+    """Тестирует отклонение суммы больше integer базы данных."""
+    with pytest.raises(ValidationError):
+        Transaction(**{
+            **transaction_fields,
+            'amount': validation_rules.transaction_amount_max + 1,
+        })
+
+
+def test_batch_user_total_fits_integer():
+    """Тестирует отклонение пачки, переполняющей integer баланса."""
+    deposits = [
+        {
+            **transaction_fields,
+            'idempotency_key': f'deposit-{index}',
+            'amount': validation_rules.transaction_amount_max,
+        }
+        for index in range(2)
+    ]
+    other_user_deposit = {**deposits[1], 'username': 'alice'}
+
+    TransactionBatch(transactions=[deposits[0], other_user_deposit])
+    with pytest.raises(ValidationError):
+        TransactionBatch(transactions=deposits)
@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.external.postgres.bulk_import import (
+    CopyStream,
+    ImportProgress,
+    import_users,
+    read_credentials,
+)
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.sharding import get_shard_index
+from app.external.postgres.storage import DBStorage
+
+bcrypt_hash = '$2b$12$4.gRL9TdDA9V70VlmEy0zeH5Rf1frfugP/Bd.9Zcd0r4j9hREPVvO'  # noqa: S105, E501 test hash
+rows = [
+    ('george', bcrypt_hash),
+    ('max', bcrypt_hash),
+    ('', 'no-username'),
+    ('peter', ''),
+    ('bob', 'hunter2'),
+    ('ann', '$2b$12$hash'),
+]
+valid_rows = rows[:2]
+copy_rows = [('george', bcrypt_hash), ('max', 'hash,with "quotes"')]
+shard_usernames = [f'user-{index}' for index in range(10)]
+broken_lines = (
+    '{"username": "broken',
+    '["george", "hash"]',
+    '{"username": 1, "hashed_password": "hash"}',
+    '{"username": "george", "hashed_password": null}',
+)
+
+
+def get_csv_source() -> io.StringIO:
+    """Создает CSV с данными пользователей."""
+    source = io.StringIO()
+    writer = csv.writer(source)
+    writer.writerow(['username', 'hashed_password'])
+    writer.writerows(rows)
+    source.seek(0)
+    return source
+
+
+def get_ndjson_source() -> io.StringIO:
+    """Создает NDJSON с данными пользователей."""
+    lines = [
+        json.dumps({'username': username, 'hashed_password': password})
+        for username, password in rows
+    ]
+    return io.StringIO('\n'.join(lines))
+
+
+class TestReadCredentials:
+    """Тестирует функцию read_credentials."""
+
+    @pytest.mark.parametrize(
+        'source, file_format', (
+            pytest.param(get_csv_source(), 'csv', id='csv'),
+            pytest.param(get_ndjson_source(), 'ndjson', id='ndjson'),
+        ),
+    )
+    def test_read(self, source, file_format):
+        """Тестирует чтение и проверку строк."""
+        progress = ImportProgress()
+
+        credentials = list(read_credentials(source, file_format, progress))
+
+        assert credentials == valid_rows
+        assert progress.rejected == len(rows) - len(valid_rows)
+
+    def test_rejects_not_bcrypt(self):
+        """Тестирует отклонение паролей не в виде хэша bcrypt."""
+        progress = ImportProgress()
+        source = io.StringIO(
+            'username,hashed_password\nbob,hunter2\nann,$2b$12$hash\n',
+        )
+
+        credentials = list(read_credentials(source, 'csv', progress))
+
+        assert not credentials
+        assert progress.rejected == 2
+
+    def test_skips_broken_ndjson(self):
+        """Тестирует пропуск строк NDJSON с ошибками."""
+        source = get_ndjson_source()
+        source.seek(0, io.SEEK_END)
+        source.write('\n{0}'.format('\n'.join(broken_lines)))
+        source.seek(0)
+        progress = ImportProgress()
+
+        credentials = list(read_credentials(source, 'ndjson', progress))
+
+        assert credentials == valid_rows
+        assert progress.rejected == len(rows) - len(valid_rows) + len(
+            broken_lines,
+        )
+
+
+class TestCopyStream:
+    """Тестирует класс CopyStream."""
+
+    def test_encodes_csv(self):
+        """Тестирует что данные читаются обратно парсером CSV."""
+        stream = CopyStream(iter(copy_rows))
+
+        encoded = stream.read()
+
+        decoded = list(csv.reader(io.StringIO(encoded.decode())))
+        assert copy_rows == [tuple(row) for row in decoded]
+        assert stream.count == len(copy_rows)
+
+    def test_reads_in_chunks(self):
+        """Тестирует чтение фрагментами ограниченного размера."""
+        chunk_size = 7
+        stream = CopyStream(iter(copy_rows))
+
+        chunks = list(iter(lambda: stream.read(chunk_size), b''))
+
+        expected = CopyStream(iter(copy_rows)).read()
+        assert max(len(chunk) for chunk in chunks) <= chunk_size
+        assert b''.join(chunks) == expected
+
+
+@pytest.mark.database
+def test_import_users_skips_duplicates(storage: DBStorage):
+    """Тестирует импорт пользователей с дубликатами."""
+    is_imported = DBUser.username.in_([username for username, _ in rows])
+    progress = ImportProgress()
+
+    import_users([storage.pool], iter(valid_rows * 2), progress, batch_size=3)
+
+    with Session(storage.pool) as session:
+        imported = session.scalar(select(func.count(DBUser.id)).where(
+            is_imported,
+        ))
+        session.execute(delete(DBUser).where(is_imported))
+        session.commit()
+    assert imported == len(valid_rows)
+    assert progress.read == len(valid_rows) * 2
+    assert progress.skipped == len(valid_rows)
+
+
+def test_import_users_routes_to_shards():
+    """Тестирует запись каждого пользователя в свой шард."""
+    engines = [MagicMock(), MagicMock()]
+
+    import_users(
+        engines,
+        ((username, 'hash') for username in shard_usernames),
+        ImportProgress(),
+        batch_size=len(shard_usernames),
+    )
+
+    for index, engine in enumerate(engines):
+        stream = engine.raw_connection().cursor().copy_expert.call_args.args[1]
+        copied = csv.reader(io.StringIO(stream.read().decode()))
+        assert {row[0] for row in copied} == {
+            username
+            for username in shard_usernames
+            if get_shard_index(username, len(engines)) == index
+        }
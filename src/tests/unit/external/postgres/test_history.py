@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.errors import NotFoundError
+from app.external.postgres.history import (
+    HistoryReader,
+    decode_cursor,
+    encode_cursor,
+)
+from app.external.postgres.models import Transaction as DBTransaction
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.storage import DBStorage
+from tests.unit.external.postgres.conftest import test_user
+
+page_size = 3
+transactions_count = 8
+started_at = datetime.fromisoformat('2024-01-01')
+transaction_id = 42
+
+
+@pytest.fixture
+def storage_with_history(storage_with_user: DBStorage):
+    """Добавляет пользователю транзакции, часть из них в одно время."""
+    with Session(storage_with_user.pool) as session:
+        user = session.scalars(
+            select(DBUser).where(DBUser.username == test_user.username),
+        ).one()
+        session.add_all(
+            DBTransaction(
+                id_user=user.id,
+                transaction_type=True,
+                amount=row + 1,
+                created_at=started_at + timedelta(hours=row // 2),
+                is_deleted=row == transactions_count - 1,
+            )
+            for row in range(transactions_count)
+        )
+        session.commit()
+        user_id = user.id
+    yield storage_with_user
+    delete_history(storage_with_user, user_id)
+
+
+def delete_history(storage: DBStorage, user_id: int) -> None:
+    """Удаляет транзакции пользователя."""
+    with Session(storage.pool) as session:
+        session.execute(
+            delete(DBTransaction).where(DBTransaction.id_user == user_id),
+        )
+        session.commit()
+
+
+def test_cursor_round_trip():
+    """Тестирует декодирование курсора."""
+    cursor = encode_cursor(started_at, transaction_id)
+
+    assert decode_cursor(cursor) == (started_at, transaction_id)
+
+
+def test_invalid_cursor():
+    """Тестирует отказ от поврежденного курсора."""
+    with pytest.raises(ValueError, match='invalid cursor'):
+        decode_cursor('bm90LWEtY3Vyc29y')
+
+
+@pytest.mark.database
+def test_read_all_pages(storage_with_history: DBStorage):
+    """Тестирует обход истории страницами от новых к старым."""
+    reader = HistoryReader([storage_with_history.pool])
+    amounts = []
+    cursor = None
+
+    for _ in range(transactions_count):
+        page = reader.read_page(test_user.username, page_size, cursor)
+        amounts.extend(record.amount for record in page.transactions)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert amounts == list(range(transactions_count - 1, 0, -1))
+
+
+@pytest.mark.database
+def test_read_unknown_user(storage: DBStorage):
+    """Тестирует историю несуществующего пользователя."""
+    reader = HistoryReader([storage.pool])
+
+    with pytest.raises(NotFoundError):
+        reader.read_page('unknown', page_size)
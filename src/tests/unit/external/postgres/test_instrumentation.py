@@ -0,0 +1,113 @@
+import logging
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, make_url, select, text
+from sqlalchemy.orm import Session
+
+from app.external.postgres import models as db
+from app.external.postgres.instrumentation import (
+    get_pool_name,
+    get_statement_name,
+    instrument_engine,
+)
+from app.external.postgres.storage import create_pool
+
+statement_name = 'get_user'
+
+
+@pytest.fixture
+def pool_metrics(monkeypatch) -> MagicMock:
+    """Заменяет клиент метрик пулов соединений на mock объект."""
+    metrics = MagicMock()
+    monkeypatch.setattr(
+        'app.external.postgres.instrumentation.get_pool_metrics',
+        lambda: metrics,
+    )
+    return metrics
+
+
+def get_context(**execution_options) -> MagicMock:
+    """Создает контекст выполнения запроса с опциями."""
+    context = MagicMock()
+    context.execution_options = execution_options
+    return context
+
+
+class TestGetStatementName:
+    """Тестирует функцию get_statement_name."""
+
+    @pytest.mark.parametrize(
+        'statement, expected', (
+            pytest.param(
+                'SELECT users.id FROM users WHERE users.username = ?',
+                'select_users',
+                id='select',
+            ),
+            pytest.param(
+                'INSERT INTO users (username) VALUES (?) RETURNING id',
+                'insert_users',
+                id='insert',
+            ),
+            pytest.param(
+                'UPDATE "users" SET balance=?', 'update_users', id='update',
+            ),
+            pytest.param('SELECT 1', 'other', id='no table'),
+            pytest.param('BEGIN', 'other', id='not dml'),
+        ),
+    )
+    def test_derived_name(self, statement, expected):
+        """Тестирует имя запроса, полученное из текста запроса."""
+        assert get_statement_name(statement, get_context()) == expected
+
+    def test_execution_option(self):
+        """Тестирует имя запроса из опции выполнения."""
+        context = get_context(statement_name=statement_name)
+
+        assert get_statement_name('SELECT 1', context) == statement_name
+
+
+def test_pool_name_hides_credentials():
+    """Тестирует что имя пула не содержит учетных данных."""
+    url = make_url('postgresql://myuser:secret@db:5432/mydatabase')
+
+    assert get_pool_name(url) == 'db/mydatabase'
+
+
+def test_create_pool_observes_statements(tmp_path, pool_metrics):
+    """Тестирует метрики ожидания соединения и запросов."""
+    engine = create_pool(f'sqlite:///{tmp_path}/users.db')
+    db.Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.scalars(
+            select(db.User).execution_options(statement_name=statement_name),
+        ).first()
+
+    pool_name = f'sqlite/{tmp_path}/users.db'
+    gauges = pool_metrics.track_pool.call_args.kwargs
+    assert gauges['checked_out']() == 0
+    assert gauges['overflow']() == 0
+    pool_metrics.observe_checkout_wait.assert_called_with(
+        pool_name, pytest.approx(0, abs=1),
+    )
+    pool_metrics.observe_statement.assert_called_with(
+        pool_name, statement_name, pytest.approx(0, abs=1),
+    )
+
+
+def test_slow_query_logged_with_plan(tmp_path, pool_metrics, caplog):
+    """Тестирует лог медленного запроса с планом выполнения."""
+    engine = create_engine(f'sqlite:///{tmp_path}/users.db')
+    db.Base.metadata.create_all(engine)
+    instrument_engine(engine, slow_query_threshold=0)
+
+    with engine.connect() as connection:
+        with caplog.at_level(logging.WARNING):
+            connection.execute(
+                text('SELECT id FROM users WHERE username = :username'),
+                {'username': 'george'},
+            )
+
+    assert 'slow query select_users' in caplog.text
+    assert 'SEARCH users' in caplog.text
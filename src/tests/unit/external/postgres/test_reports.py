@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.errors import NotFoundError
+from app.external.postgres.models import Report as DBReport
+from app.external.postgres.models import Transaction as DBTransaction
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.reports import ReportWriter
+from app.external.postgres.storage import DBStorage
+from app.external.report_formats import ReportFormat
+from tests.unit.external.postgres.conftest import test_user
+
+page_size = 2
+transactions_count = 7
+started_at = datetime.fromisoformat('2024-01-01')
+amount = 10
+report_transaction = DBReport.transactions.property.secondary
+
+
+@pytest.fixture
+def storage_with_transactions(storage_with_user: DBStorage):
+    """Добавляет транзакции пользователю и удаляет их вместе с отчетами."""
+    with Session(storage_with_user.pool) as session:
+        user = session.scalars(
+            select(DBUser).where(DBUser.username == test_user.username),
+        ).one()
+        session.add_all(
+            DBTransaction(
+                id_user=user.id,
+                transaction_type=row % 3 != 0,
+                amount=amount,
+                created_at=started_at + timedelta(days=row // 2),
+            )
+            for row in range(transactions_count)
+        )
+        session.commit()
+        user_id = user.id
+    yield storage_with_user
+    delete_reports(storage_with_user, user_id)
+
+
+def delete_reports(storage: DBStorage, user_id: int) -> None:
+    """Удаляет отчеты и транзакции пользователя."""
+    with Session(storage.pool) as session:
+        report_ids = select(DBReport.id).where(DBReport.id_user == user_id)
+        session.execute(
+            delete(report_transaction).where(
+                report_transaction.c.id_report.in_(report_ids),
+            ),
+        )
+        session.execute(delete(DBReport).where(DBReport.id_user == user_id))
+        session.execute(
+            delete(DBTransaction).where(DBTransaction.id_user == user_id),
+        )
+        session.commit()
+
+
+def count_links(storage: DBStorage, report_id: int) -> int:
+    """Возвращает количество транзакций отчета."""
+    with Session(storage.pool) as session:
+        return session.scalar(
+            select(func.count()).where(
+                report_transaction.c.id_report == report_id,
+            ),
+        )
+
+
+@pytest.mark.database
+def test_report_pages(storage_with_transactions: DBStorage):
+    """Тестирует отчет за период, прочитанный несколькими страницами."""
+    writer = ReportWriter([storage_with_transactions.pool], page_size)
+
+    chunks = writer.open(
+        test_user.username,
+        started_at + timedelta(days=1),
+        started_at + timedelta(days=2),
+        ReportFormat.ndjson,
+    )
+    records = [
+        json.loads(line) for line in b''.join(chunks).decode().splitlines()
+    ]
+
+    totals = records[-1]['totals']
+    ids = [record['id'] for record in records[:-1]]
+    assert ids == sorted(ids)
+    assert totals['transactions'] == 4
+    assert totals['balance_change'] == 2 * amount
+    assert count_links(storage_with_transactions, totals['report_id']) == 4
+
+
+@pytest.mark.database
+def test_interrupted_report_rolls_back(storage_with_transactions: DBStorage):
+    """Тестирует удаление отчета, поток которого не дочитан."""
+    writer = ReportWriter([storage_with_transactions.pool], page_size)
+    chunks = writer.open(
+        test_user.username,
+        started_at,
+        started_at + timedelta(days=transactions_count),
+        ReportFormat.csv,
+    )
+
+    next(chunks)
+    next(chunks)
+    checked_out = storage_with_transactions.pool.pool.checkedout()
+    chunks.close()
+
+    with Session(storage_with_transactions.pool) as session:
+        reports = session.scalar(
+            select(func.count()).select_from(DBReport).join(DBUser).where(
+                DBUser.username == test_user.username,
+            ),
+        )
+    assert reports == 0
+    assert checked_out == 0
+
+
+@pytest.mark.database
+def test_report_unknown_user(storage: DBStorage):
+    """Тестирует отчет несуществующего пользователя."""
+    writer = ReportWriter([storage.pool], page_size)
+
+    with pytest.raises(NotFoundError):
+        writer.open('unknown', started_at, started_at, ReportFormat.csv)
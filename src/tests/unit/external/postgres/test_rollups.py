@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.errors import NotFoundError
+from app.core.models import BalanceSummary, Transaction, naive_utc
+from app.external.postgres.models import Transaction as DBTransaction
+from app.external.postgres.models import TransactionRollup as DBRollup
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.rollups import (
+    BalanceReader,
+    check_rollups,
+    repair_rollups,
+)
+from app.external.postgres.storage import DBStorage
+from app.external.postgres.transactions import TransactionWriter
+
+username = 'rollup-user'
+days_count = 4
+started_at = datetime.fromisoformat('2024-03-01')
+hours = (1, 9, 17, 23)
+amount = 10
+one_day = timedelta(days=1)
+morning = timedelta(hours=5)
+evening = one_day - morning
+periods = (
+    (started_at + morning, started_at + one_day * 2 + evening),
+    (started_at, started_at + one_day * days_count),
+    (started_at + morning, started_at + evening),
+    (started_at + one_day, started_at + one_day + morning),
+    (None, started_at + one_day * days_count),
+    (
+        datetime.fromisoformat('2024-03-01T08:00:00+03:00'),
+        datetime.fromisoformat('2024-03-03T22:00:00+03:00'),
+    ),
+)
+
+
+@pytest.fixture
+def storage_with_rollups(storage: DBStorage):
+    """Записывает транзакции пользователя за несколько дней."""
+    with Session(storage.pool) as session:
+        session.add(
+            DBUser(username=username, hashed_password='hash'),  # noqa: S106
+        )
+        session.commit()
+    TransactionWriter([storage.pool]).write([
+        Transaction(
+            username=username,
+            idempotency_key=f'{created_at.isoformat()}',
+            transaction_type=created_at.hour != hours[-1],
+            amount=amount,
+            created_at=created_at,
+        )
+        for created_at in get_times()
+    ])
+    yield storage
+    delete_user(storage)
+
+
+def delete_user(storage: DBStorage) -> None:
+    """Удаляет пользователя с транзакциями и агрегатами."""
+    with Session(storage.pool) as session:
+        user_id = session.scalar(
+            select(DBUser.id).where(DBUser.username == username),
+        )
+        for model in (DBRollup, DBTransaction):
+            session.execute(delete(model).where(model.id_user == user_id))
+        session.execute(delete(DBUser).where(DBUser.id == user_id))
+        session.commit()
+
+
+def get_times() -> list[datetime]:
+    """Возвращает время транзакций, по четыре в день."""
+    return [
+        started_at + timedelta(days=day, hours=hour)
+        for day in range(days_count)
+        for hour in hours
+    ]
+
+
+def expected_summary(
+    start_date: datetime | None, end_date: datetime,
+) -> BalanceSummary:
+    """Считает итоги периода по транзакциям фикстуры."""
+    types = [
+        created_at.hour != hours[-1]
+        for created_at in get_times()
+        if naive_utc(start_date or started_at) <= created_at <= (
+            naive_utc(end_date)
+        )
+    ]
+    deposits = sum(types) * amount
+    withdrawals = (len(types) - sum(types)) * amount
+    return BalanceSummary(
+        transactions=len(types),
+        deposits=deposits,
+        withdrawals=withdrawals,
+        balance_change=deposits - withdrawals,
+    )
+
+
+@pytest.mark.database
+@pytest.mark.parametrize('start_date, end_date', periods)
+def test_summary_matches_transactions(
+    storage_with_rollups: DBStorage,
+    start_date: datetime | None,
+    end_date: datetime,
+):
+    """Тестирует итоги периодов с неполными днями и часовым поясом."""
+    reader = BalanceReader([storage_with_rollups.pool])
+
+    summary = reader.read_summary(username, start_date, end_date)
+
+    assert summary == expected_summary(start_date, end_date)
+
+
+@pytest.mark.database
+def test_check_and_repair(storage_with_rollups: DBStorage):
+    """Тестирует поиск и исправление расхождения агрегатов."""
+    engine = storage_with_rollups.pool
+    with Session(engine) as session:
+        user_id = session.scalar(
+            select(DBUser.id).where(DBUser.username == username),
+        )
+        session.execute(
+            update(DBTransaction).where(
+                DBTransaction.id_user == user_id,
+                DBTransaction.created_at == started_at + timedelta(hours=1),
+            ).values(is_deleted=True),
+        )
+        session.commit()
+
+    mismatches = check_rollups(engine)
+    repair_rollups(engine, [user_id])
+
+    assert (user_id, started_at.date()) in mismatches
+    assert all(
+        mismatch_user != user_id for mismatch_user, _ in check_rollups(engine)
+    )
+
+
+@pytest.mark.database
+def test_summary_unknown_user(storage: DBStorage):
+    """Тестирует итоги несуществующего пользователя."""
+    reader = BalanceReader([storage.pool])
+
+    with pytest.raises(NotFoundError):
+        reader.read_summary('unknown', None, started_at)
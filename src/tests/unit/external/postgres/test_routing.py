@@ -0,0 +1,81 @@
+from unittest.mock import MagicMock
+
+from app.external.postgres import routing
+
+username = 'george'
+
+
+def get_router(replicas_count: int, sticky_window: float = 2):
+    """Создает маршрутизатор с mock объектами баз данных."""
+    return routing.ReplicaRouter(
+        primary=MagicMock(),
+        replicas=[MagicMock() for _ in range(replicas_count)],
+        health_check_interval=5,
+        sticky_window=sticky_window,
+    )
+
+
+class TestGetReader:
+    """Тестирует метод get_reader."""
+
+    def test_without_replicas(self):
+        """Тестирует чтение из основной базы без реплик."""
+        router = get_router(replicas_count=0)
+
+        assert router.get_reader(username) is router.primary
+
+    def test_round_robin(self):
+        """Тестирует распределение чтения по репликам."""
+        router = get_router(replicas_count=2)
+
+        readers = [router.get_reader(username) for _ in range(4)]
+
+        assert readers == [*router.replicas, *router.replicas]
+
+    def test_skips_unhealthy_replica(self):
+        """Тестирует что недоступная реплика пропускается."""
+        router = get_router(replicas_count=2)
+        router.replicas[0].connect.side_effect = ConnectionError
+
+        readers = {router.get_reader(username) for _ in range(4)}
+
+        assert readers == {router.replicas[1]}
+
+    def test_all_replicas_unhealthy(self):
+        """Тестирует чтение из основной базы без доступных реплик."""
+        router = get_router(replicas_count=2)
+        for replica in router.replicas:
+            router.mark_unhealthy(replica)
+
+        assert router.get_reader(username) is router.primary
+
+    def test_health_check_is_cached(self):
+        """Тестирует что реплика не проверяется на каждый запрос."""
+        router = get_router(replicas_count=1)
+
+        for _ in range(3):
+            router.get_reader(username)
+
+        router.replicas[0].connect.assert_called_once()
+
+
+class TestReadYourWrites:
+    """Тестирует чтение после записи."""
+
+    def test_sticky_after_write(self):
+        """Тестирует чтение из основной базы после записи."""
+        router = get_router(replicas_count=1)
+
+        router.mark_written(username)
+
+        assert router.get_reader(username) is router.primary
+        assert router.get_reader('max') is router.replicas[0]
+
+    def test_sticky_window_expires(self, monkeypatch):
+        """Тестирует чтение из реплики после окончания окна."""
+        router = get_router(replicas_count=1, sticky_window=2)
+        router.mark_written(username)
+        expired_at = routing.monotonic() + 3
+        monkeypatch.setattr(routing, 'monotonic', lambda: expired_at)
+
+        assert router.get_reader(username) is router.replicas[0]
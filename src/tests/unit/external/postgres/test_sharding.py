@@ -0,0 +1,188 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.core.models import User
+from app.external.postgres import models as db
+from app.external.postgres.reshard import reshard
+from app.external.postgres.sharding import ShardedDBStorage, get_shard_index
+
+users_count = 50
+keys_count = 4000
+usernames = [f'user-{index}' for index in range(keys_count)]
+users = [
+    User(username=f'user-{index}', password_hash=f'hash-{index}')
+    for index in range(users_count)
+]
+created_at = datetime.fromisoformat('2024-03-01')
+
+
+def create_shards(tmp_path, shards_count: int) -> list[str]:
+    """Создает базы данных SQLite, заменяющие шарды PostgreSQL."""
+    shards_dns = []
+    for index in range(shards_count):
+        dns = f'sqlite:///{tmp_path}/shard-{index}.db'
+        engine = create_engine(dns)
+        db.Base.metadata.create_all(engine)
+        engine.dispose()
+        shards_dns.append(dns)
+    return shards_dns
+
+
+def count_users(dns: str) -> int:
+    """Считает пользователей в шарде."""
+    engine = create_engine(dns)
+    with Session(engine) as session:
+        found = session.scalar(select(func.count(db.User.id)))
+    engine.dispose()
+    return found or 0
+
+
+def add_dependent_rows(dns: str) -> None:
+    """Добавляет пользователям шарда транзакцию, итоги дня и отчет."""
+    engine = create_engine(dns)
+    with Session(engine) as session:
+        for user in session.scalars(select(db.User)).all():
+            transaction = db.Transaction(
+                transaction_type=True,
+                amount=len(user.username),
+                created_at=created_at,
+                user=user,
+            )
+            session.add_all([
+                db.TransactionRollup(
+                    id_user=user.id,
+                    day=created_at.date(),
+                    transactions=1,
+                    deposits=transaction.amount,
+                    withdrawals=0,
+                ),
+                db.Report(
+                    start_date=created_at,
+                    end_date=created_at,
+                    user=user,
+                    transactions=[transaction],
+                ),
+            ])
+        session.commit()
+    engine.dispose()
+
+
+def get_dependent_rows(dns: str) -> list[str]:
+    """Возвращает владельцев транзакций шарда со своими итогами и отчетом."""
+    engine = create_engine(dns)
+    with Session(engine) as session:
+        rollup_owners = set(session.scalars(
+            select(db.User.username).join(db.TransactionRollup),
+        ))
+        found = [
+            transaction.user.username
+            for transaction in session.scalars(select(db.Transaction))
+            if transaction.reports[0].user is transaction.user and
+            transaction.user.username in rollup_owners
+        ]
+    engine.dispose()
+    return found
+
+
+@pytest_asyncio.fixture
+async def two_of_three_shards(tmp_path) -> list[str]:
+    """Создает три шарда и заполняет пользователями первые два."""
+    shards_dns = create_shards(tmp_path, 3)
+    source_storage = ShardedDBStorage(shards_dns[:2])
+    for user in users:
+        await source_storage.create_user(user)
+    return shards_dns
+
+
+class TestGetShardIndex:
+    """Тестирует функцию get_shard_index."""
+
+    def test_stable(self):
+        """Тестирует что номер шарда не меняется между вызовами."""
+        assert get_shard_index('george', 4) == get_shard_index('george', 4)
+
+    def test_range_and_balance(self):
+        """Тестирует распределение пользователей по шардам."""
+        shards_count = 4
+        min_share = 0.2
+        counter = Counter(
+            get_shard_index(username, shards_count) for username in usernames
+        )
+
+        assert set(counter) == set(range(shards_count))
+        assert min(counter.values()) > keys_count * min_share
+
+    def test_minimal_movement(self):
+        """Тестирует что при добавлении шарда переезжает мало ключей."""
+        moved = [
+            username
+            for username in usernames
+            if get_shard_index(username, 4) != get_shard_index(username, 5)
+        ]
+
+        assert all(get_shard_index(username, 5) == 4 for username in moved)
+        assert len(moved) < len(usernames) / 3
+
+
+class TestShardedDBStorage:
+    """Тестирует класс ShardedDBStorage."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_get_user(self, tmp_path):
+        """Тестирует запись и чтение пользователей из шардов."""
+        shards_dns = create_shards(tmp_path, 3)
+        storage = ShardedDBStorage(shards_dns)
+
+        for user in users:
+            await storage.create_user(user)
+
+        for expected in users:
+            received = await storage.get_user(expected)
+            assert received is not None
+            assert received.password_hash == expected.password_hash
+        assert sum(count_users(dns) for dns in shards_dns) == len(users)
+        assert all(count_users(dns) for dns in shards_dns)
+
+    @pytest.mark.asyncio
+    async def test_reshard(self, two_of_three_shards: list[str]):
+        """Тестирует перенос пользователей при добавлении шарда."""
+        shards_dns = two_of_three_shards
+
+        moved = reshard(shards_dns[:2], shards_dns, batch_size=7)
+        target_storage = ShardedDBStorage(shards_dns)
+
+        assert moved == count_users(shards_dns[2])
+        assert sum(count_users(dns) for dns in shards_dns) == len(users)
+        for expected in users:
+            shard = target_storage.get_shard(expected.username)
+            assert await shard.get_user(expected) is not None
+
+    @pytest.mark.asyncio
+    async def test_reshard_is_idempotent(self, two_of_three_shards: list[str]):
+        """Тестирует повторный запуск решардирования."""
+        shards_dns = two_of_three_shards
+        reshard(shards_dns[:2], shards_dns, batch_size=10)
+
+        moved = reshard(shards_dns, shards_dns, batch_size=10)
+
+        assert moved == 0
+        assert sum(count_users(dns) for dns in shards_dns) == len(users)
+
+    @pytest.mark.asyncio
+    async def test_reshard_dependent_rows(
+        self, two_of_three_shards: list[str],
+    ):
+        """Тестирует перенос транзакций, итогов и отчетов с пользователем."""
+        shards_dns = two_of_three_shards
+        for source_dns in shards_dns[:2]:
+            add_dependent_rows(source_dns)
+
+        reshard(shards_dns[:2], shards_dns, batch_size=7)
+
+        for dns in shards_dns:
+            assert len(get_dependent_rows(dns)) == count_users(dns)
@@ -1,9 +1,13 @@
 import logging
+from unittest.mock import MagicMock
 
 import pytest
 
 from app.core.models import User
+from app.external.postgres.history import HistoryReader
+from app.external.postgres.sharding import get_shard_pools
 from app.external.postgres.storage import DBStorage
+from app.external.postgres.transactions import TransactionWriter
 from tests.unit.external.postgres.conftest import test_user
 
 logger = logging.getLogger(__name__)
@@ -74,3 +78,33 @@ class TestGetUser:
         else:
             assert db_user.username == expected.username
             assert db_user.password_hash == expected.password_hash
+
+
+class TestGetUserFromReplica:
+    """Тестирует чтение пользователя из реплики."""
+
+    @pytest.mark.asyncio
+    async def test_missing_in_replica(self, monkeypatch):
+        """Тестирует повтор чтения в основной базе при отставании реплики."""
+        storage = DBStorage()
+        replica = MagicMock()
+        read_user = MagicMock(side_effect=[None, test_user])
+        monkeypatch.setattr(storage.router, 'get_reader', lambda _: replica)
+        monkeypatch.setattr(storage, '_read_user', read_user)
+
+        db_user = await storage.get_user(user=test_user)
+
+        assert db_user is test_user
+        assert read_user.call_args_list[-1].args == (test_user, storage.pool)
+
+
+def test_readers_share_primary_pool():
+    """Тестирует общий пул основной базы данных без шардов."""
+    storage = DBStorage()
+
+    engines = [
+        TransactionWriter().engines, HistoryReader().engines, get_shard_pools(),
+    ]
+
+    assert all(shard_pools == [storage.pool] for shard_pools in engines)
+    assert DBStorage().pool is storage.pool
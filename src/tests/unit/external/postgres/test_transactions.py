@@ -0,0 +1,132 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import Session
+
+from app.core.models import IngestResult, Transaction, naive_utc
+from app.external.postgres.models import Transaction as DBTransaction
+from app.external.postgres.models import TransactionRollup as DBRollup
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.storage import DBStorage
+from app.external.postgres.transactions import TransactionWriter
+
+usernames = ('ledger-a', 'ledger-b', 'ledger-c')
+writers_count = 8
+batches_count = 20
+amount = 10
+deposit_key = 'deposit'
+
+
+@pytest.fixture
+def ledger(storage: DBStorage):
+    """Создает пользователей и удаляет их вместе с транзакциями."""
+    with Session(storage.pool) as session:
+        session.add_all(
+            DBUser(username=username, hashed_password='hash')  # noqa: S106 test
+            for username in usernames
+        )
+        session.commit()
+    yield storage
+    delete_ledger(storage)
+
+
+def delete_ledger(storage: DBStorage) -> None:
+    """Удаляет тестовых пользователей, их транзакции и агрегаты."""
+    with Session(storage.pool) as session:
+        user_ids = select(DBUser.id).where(DBUser.username.in_(usernames))
+        for model in (DBRollup, DBTransaction):
+            session.execute(delete(model).where(model.id_user.in_(user_ids)))
+        session.execute(delete(DBUser).where(DBUser.username.in_(usernames)))
+        session.commit()
+
+
+def get_balances(storage: DBStorage) -> dict[str, int]:
+    """Возвращает балансы тестовых пользователей."""
+    with Session(storage.pool) as session:
+        rows = session.execute(
+            select(DBUser.username, DBUser.balance).where(
+                DBUser.username.in_(usernames),
+            ),
+        )
+        return dict(rows.tuples().all())
+
+
+def get_transaction(
+    username: str, key: str, is_deposit: bool = True,
+) -> Transaction:
+    """Создает транзакцию."""
+    return Transaction(
+        username=username,
+        idempotency_key=key,
+        transaction_type=is_deposit,
+        amount=amount,
+    )
+
+
+@pytest.mark.database
+def test_write_updates_balances(ledger: DBStorage):
+    """Тестирует запись пачки и пропуск повторных ключей."""
+    writer = TransactionWriter([ledger.pool])
+    batch = [
+        get_transaction(usernames[0], deposit_key),
+        get_transaction(usernames[0], deposit_key),
+        get_transaction(usernames[0], 'withdrawal', is_deposit=False),
+        get_transaction(usernames[1], deposit_key),
+        get_transaction('unknown', deposit_key),
+    ]
+
+    ingested = writer.write(batch)
+    resent = writer.write(batch)
+
+    assert ingested == IngestResult(accepted=3, duplicates=1, rejected=1)
+    assert resent == IngestResult(accepted=0, duplicates=4, rejected=1)
+    assert get_balances(ledger) == {
+        usernames[0]: 0, usernames[1]: amount, usernames[2]: 0,
+    }
+
+
+@pytest.mark.database
+def test_concurrent_writers(ledger: DBStorage):
+    """Тестирует параллельные пачки с общими пользователями."""
+    writer = TransactionWriter([ledger.pool])
+    batches = [
+        [
+            get_transaction(username, f'{batch_index}-{username}')
+            for username in usernames[::1 - batch_index % 2 * 2]
+        ]
+        for batch_index in range(batches_count)
+    ]
+
+    with ThreadPoolExecutor(writers_count) as executor:
+        ingested = list(executor.map(writer.write, batches + batches))
+
+    assert sum(shard.accepted for shard in ingested) == (
+        batches_count * len(usernames)
+    )
+    assert get_balances(ledger) == dict.fromkeys(
+        usernames, batches_count * amount,
+    )
+
+
+@pytest.mark.database
+def test_default_time_is_utc(ledger: DBStorage):
+    """Тестирует время записи в UTC при другом TimeZone сессии."""
+    engine = create_engine(
+        ledger.pool.url, connect_args={'options': '-c timezone=Asia/Tokyo'},
+    )
+    started_at = naive_utc(datetime.now(timezone.utc))
+
+    TransactionWriter([engine]).write(
+        [get_transaction(usernames[0], deposit_key)],
+    )
+    engine.dispose()
+
+    with Session(ledger.pool) as session:
+        created_at = session.scalar(select(DBTransaction.created_at).where(
+            DBTransaction.idempotency_key == deposit_key,
+        ))
+    assert started_at - timedelta(minutes=1) < created_at < (
+        started_at + timedelta(minutes=1)
+    )
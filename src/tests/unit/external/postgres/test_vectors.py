@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.external.embeddings import (
+    embedding_dimension,
+    pack_embedding,
+    vector_dtype,
+)
+from app.external.postgres.models import User as DBUser
+from app.external.postgres.storage import DBStorage
+from app.external.postgres.vectors import VectorWriter, VerificationResult
+from app.external.similarity import SimilarityIndex
+from app.external.similarity_refresh import refresh_index
+from tests.unit.external.postgres.conftest import test_user
+
+batch_size = 10
+
+
+@pytest.mark.database
+def test_write_vectors(storage_with_user: DBStorage):
+    """Тестирует запись последнего эмбеддинга пользователя из пачки."""
+    writer = VectorWriter([storage_with_user.pool])
+
+    updated = writer.write([
+        VerificationResult(test_user.username, b'first', is_verified=False),
+        VerificationResult(test_user.username, b'last', is_verified=True),
+        VerificationResult('unknown', b'vector', is_verified=True),
+    ])
+
+    with Session(storage_with_user.pool) as session:
+        user = session.scalars(
+            select(DBUser).where(DBUser.username == test_user.username),
+        ).one()
+    assert updated == 1
+    assert user.vector == b'last'
+    assert user.is_verified
+
+
+@pytest.mark.database
+def test_refresh_index(storage_with_user: DBStorage):
+    """Тестирует полную и инкрементальную загрузку эмбеддингов в индекс."""
+    embedding = np.ones(embedding_dimension, dtype=vector_dtype)
+    VectorWriter([storage_with_user.pool]).write([
+        VerificationResult(
+            test_user.username, pack_embedding(embedding), is_verified=True,
+        ),
+    ])
+    index = SimilarityIndex(
+        np.zeros((0, embedding_dimension), dtype=vector_dtype), [],
+    )
+
+    loaded = refresh_index(index, [storage_with_user.pool], batch_size, 0)
+    changed = refresh_index(index, [storage_with_user.pool], batch_size, 0)
+
+    assert loaded >= 1
+    assert changed == 0
+    assert index.watermark is not None
+    username, _ = index.search(embedding, limit=1)[0][0]
+    assert username == test_user.username
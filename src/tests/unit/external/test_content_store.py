@@ -0,0 +1,109 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+
+from app.external.content_store import (
+    ContentAddressedStorage,
+    ImageSweeper,
+    acknowledge_image,
+    get_object_path,
+)
+from app.external.images import ImageStorage
+
+image_content = b'\xff\xd8\xff\xe0 jpeg image content'
+digest = hashlib.sha256(image_content).hexdigest()
+encoding = 'identity'
+
+
+def get_image(image_bytes: bytes = image_content) -> UploadFile:
+    """Создает загружаемый пользователем файл."""
+    return UploadFile(file=io.BytesIO(image_bytes), size=len(image_bytes))
+
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    """Создает хранилище во временной директории."""
+    image_storage = ImageStorage(
+        chunk_size=4, max_upload_size=1024, max_writers=1,
+    )
+    content_store = ContentAddressedStorage(tmp_path, image_storage)
+    yield content_store
+    content_store.shutdown()
+
+
+def test_object_path_fanout(tmp_path):
+    """Тестирует распределение файлов по поддиректориям."""
+    object_path = get_object_path(tmp_path, digest, encoding)
+
+    shard = tmp_path / digest[:2] / digest[2:4]
+    assert object_path == shard / f'{digest}.{encoding}'
+
+
+class TestContentAddressedStorage:
+    """Тестирует класс ContentAddressedStorage."""
+
+    @pytest.mark.asyncio
+    async def test_save(self, store: ContentAddressedStorage, tmp_path):
+        """Тестирует сохранение изображения по хешу содержимого."""
+        stored = await store.save(get_image())
+
+        object_path = get_object_path(tmp_path, digest, encoding)
+        assert stored.digest == digest
+        assert Path(stored.file_path).read_bytes() == image_content
+        assert Path(stored.file_path).samefile(object_path)
+        assert not list(store.root.joinpath('tmp').iterdir())
+
+    @pytest.mark.asyncio
+    async def test_deduplicate(self, store: ContentAddressedStorage, tmp_path):
+        """Тестирует хранение одинаковых изображений в одном файле."""
+        first = await store.save(get_image())
+        second = await store.save(get_image())
+
+        object_path = get_object_path(tmp_path, digest, encoding)
+        assert first.file_path != second.file_path
+        assert object_path.stat().st_nlink == 3
+        assert len(list(object_path.parent.iterdir())) == 3
+
+
+class TestImageSweeper:
+    """Тестирует класс ImageSweeper."""
+
+    @pytest.mark.asyncio
+    async def test_sweep_acknowledged(
+        self, store: ContentAddressedStorage, tmp_path,
+    ):
+        """Тестирует удаление изображения после подтверждения всех ссылок."""
+        sweeper = ImageSweeper(tmp_path, temp_retention=60)
+        first = await store.save(get_image())
+        second = await store.save(get_image())
+        object_path = get_object_path(tmp_path, digest, encoding)
+
+        acknowledge_image(first.file_path)
+        assert not await sweeper.sweep()
+        assert Path(second.file_path).read_bytes() == image_content
+
+        acknowledge_image(second.file_path)
+        assert await sweeper.sweep() == 1
+        assert not list(object_path.parent.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_sweep_stale_temp(self, tmp_path):
+        """Тестирует удаление временных файлов, оставшихся после сбоя."""
+        sweeper = ImageSweeper(tmp_path, temp_retention=60)
+        temp_path = tmp_path / 'tmp'
+        temp_path.mkdir()
+        stale = temp_path / 'stale'
+        fresh = temp_path / 'fresh'
+        stale.write_bytes(image_content)
+        fresh.write_bytes(image_content)
+        os.utime(stale, (0, 0))
+
+        await sweeper.sweep()
+
+        assert not stale.exists()
+        assert fresh.exists()
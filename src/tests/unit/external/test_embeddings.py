@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.external.embeddings import (
+    compute_placeholder_embedding,
+    embedding_dimension,
+    pack_embedding,
+    read_embedding,
+    unpack_embedding,
+)
+
+image_size = (64, 48)
+max_brightness = 200
+tolerance = 1e-5
+min_similarity = 0.99
+
+
+def get_image(brightness: float = 1) -> bytes:
+    """Создает JPEG с градиентом яркости."""
+    stop = max_brightness * brightness
+    gradient = np.linspace(0, stop, image_size[0], dtype=np.uint8)
+    pixels = np.tile(gradient, (image_size[1], 1))
+    image_file = io.BytesIO()
+    Image.fromarray(pixels).convert('RGB').save(image_file, 'JPEG')
+    return image_file.getvalue()
+
+
+def test_compute_placeholder_embedding():
+    """Тестирует вычисление нормированной заглушки эмбеддинга."""
+    embedding = compute_placeholder_embedding(get_image())
+
+    assert embedding.dtype == np.float32
+    assert embedding.shape == (embedding_dimension,)
+    assert np.linalg.norm(embedding) == pytest.approx(1, rel=tolerance)
+
+
+def test_embedding_ignores_contrast():
+    """Тестирует что заглушка эмбеддинга не зависит от контраста снимка."""
+    similarity = np.dot(
+        compute_placeholder_embedding(get_image()),
+        compute_placeholder_embedding(get_image(brightness=0.5)),
+    )
+
+    assert similarity > min_similarity
+
+
+def test_read_embedding():
+    """Тестирует нормирование эмбеддинга из сообщения."""
+    embedding = read_embedding(np.full(embedding_dimension, 2))
+
+    assert np.linalg.norm(embedding) == pytest.approx(1, rel=tolerance)
+
+
+@pytest.mark.parametrize(
+    'embedding', (
+        pytest.param([1, 2, 3], id='dimension'),
+        pytest.param(np.full(embedding_dimension, np.nan), id='nan'),
+    ),
+)
+def test_read_invalid_embedding(embedding):
+    """Тестирует отказ от неверного эмбеддинга."""
+    with pytest.raises(ValueError, match='embedding'):
+        read_embedding(embedding)
+
+
+def test_vector_round_trip():
+    """Тестирует хранение эмбеддинга в колонке users.vector."""
+    embedding = compute_placeholder_embedding(get_image())
+
+    vector = pack_embedding(embedding)
+
+    assert len(vector) == embedding_dimension * 4
+    assert np.array_equal(unpack_embedding(vector), embedding)
@@ -0,0 +1,93 @@
+import io
+
+import brotli
+import pytest
+from fastapi import UploadFile
+
+from app.core.errors import PayloadTooLargeError
+from app.external.images import ImageStorage, is_compressed_format
+
+chunk_size = 4
+image_content = b'\xff\xd8\xff\xe0 jpeg image content'
+raw_content = bytes(1024)
+
+
+def get_image(image_bytes: bytes = image_content) -> UploadFile:
+    """Создает загружаемый пользователем файл."""
+    return UploadFile(file=io.BytesIO(image_bytes), size=len(image_bytes))
+
+
+@pytest.mark.parametrize(
+    'head', (
+        pytest.param(image_content, id='jpeg'),
+        pytest.param(b'\x89PNG\r\n\x1a\n png image', id='png'),
+    ),
+)
+def test_is_compressed_format(head):
+    """Тестирует определение сжатого формата по сигнатуре."""
+    assert is_compressed_format(head)
+    assert not is_compressed_format(raw_content)
+
+
+class TestImageStorage:
+    """Тестирует класс ImageStorage."""
+
+    @pytest.mark.asyncio
+    async def test_save(self, tmp_path):
+        """Тестирует сохранение изображения фрагментами."""
+        storage = ImageStorage(
+            chunk_size=chunk_size, max_upload_size=1024, max_writers=1,
+        )
+        file_path = tmp_path / 'image'
+
+        stored = await storage.save(str(file_path), get_image())
+
+        storage.shutdown()
+        assert stored.size == len(image_content)
+        assert stored.content_encoding == 'identity'
+        assert file_path.read_bytes() == image_content
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        'image_bytes, expected_encoding', (
+            pytest.param(raw_content, 'br', id='raw'),
+            pytest.param(image_content, 'identity', id='jpeg'),
+        ),
+    )
+    async def test_save_compressed(
+        self, tmp_path, image_bytes, expected_encoding,
+    ):
+        """Тестирует сжатие изображения brotli при сохранении."""
+        storage = ImageStorage(
+            chunk_size=chunk_size,
+            max_upload_size=len(raw_content),
+            max_writers=1,
+            compression_quality=1,
+        )
+        file_path = tmp_path / 'image'
+
+        stored = await storage.save(str(file_path), get_image(image_bytes))
+
+        storage.shutdown()
+        stored_content = file_path.read_bytes()
+        assert stored.content_encoding == expected_encoding
+        assert stored.stored_size == len(stored_content)
+        if expected_encoding == 'br':
+            stored_content = brotli.decompress(stored_content)
+        assert stored_content == image_bytes
+
+    @pytest.mark.asyncio
+    async def test_too_large(self, tmp_path):
+        """Тестирует ограничение размера изображения."""
+        storage = ImageStorage(
+            chunk_size=chunk_size,
+            max_upload_size=len(image_content) - 1,
+            max_writers=1,
+        )
+        file_path = tmp_path / 'image'
+
+        with pytest.raises(PayloadTooLargeError):
+            await storage.save(str(file_path), get_image())
+
+        storage.shutdown()
+        assert not file_path.exists()
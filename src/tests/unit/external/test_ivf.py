@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from app.external import ivf
+from app.external.embeddings import normalize_embedding
+from app.external.similarity import SimilarityIndex
+
+dimension = 8
+users_count = 300
+lists_count = 6
+iterations = 5
+limit = 5
+chunk_rows = 64
+
+
+def get_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """Создает случайные эмбеддинги единичной длины."""
+    rng = np.random.default_rng(seed)
+    return normalize_embedding(rng.standard_normal((count, dimension)))
+
+
+def get_usernames(count: int) -> list[str]:
+    """Создает имена пользователей."""
+    return [f'user-{row}' for row in range(count)]
+
+
+def get_names(found: list) -> list[list[str]]:
+    """Возвращает имена пользователей из ответов поиска."""
+    return [[username for username, _ in matches] for matches in found]
+
+
+@pytest.fixture
+def index(monkeypatch) -> ivf.IVFIndex:
+    """Создает IVF индекс, который назначает списки фрагментами."""
+    monkeypatch.setattr(ivf, 'search_chunk_rows', chunk_rows)
+    vectors = get_vectors(users_count)
+    centroids = ivf.train_centroids(
+        vectors, lists_count, iterations, sample_size=users_count, seed=0,
+    )
+    return ivf.IVFIndex.build(centroids, vectors, get_usernames(users_count))
+
+
+class TestIVFIndex:
+    """Тестирует IVF индекс эмбеддингов пользователей."""
+
+    def test_build_groups_lists(self, index):
+        """Тестирует размещение эмбеддингов списка подряд."""
+        labels = ivf.assign_lists(index.vectors, index.centroids)
+
+        assert np.all(np.diff(labels) >= 0)
+        assert np.array_equal(
+            index.offsets, np.searchsorted(labels, np.arange(lists_count + 1)),
+        )
+        assert sorted(index.usernames) == sorted(get_usernames(users_count))
+
+    def test_all_lists_match_exact(self, index):
+        """Тестирует совпадение поиска по всем спискам с полным перебором."""
+        queries = get_vectors(4, seed=1)
+        exact = SimilarityIndex(
+            get_vectors(users_count), get_usernames(users_count),
+        )
+
+        found = index.search(queries, limit=limit, nprobe=lists_count)
+
+        expected = exact.search(queries, limit=limit)
+        assert get_names(found) == get_names(expected)
+
+    def test_nprobe_limits_lists(self, index):
+        """Тестирует поиск только в ближайшем списке."""
+        query = index.centroids[0]
+        first_list = index.usernames[index.offsets[0]:index.offsets[1]]
+
+        found = index.search(query, limit=users_count, nprobe=1)[0]
+
+        assert sorted(username for username, _ in found) == sorted(first_list)
+
+    def test_snapshot_round_trip(self, index, tmp_path):
+        """Тестирует загрузку снимка индекса."""
+        path = tmp_path / 'users.ivf'
+        queries = get_vectors(2, seed=2)
+        index.save(path)
+
+        loaded = ivf.IVFIndex.load(path)
+
+        assert isinstance(loaded.vectors, np.memmap)
+        assert loaded.search(queries, limit, 2) == index.search(
+            queries, limit, 2,
+        )
+
+    def test_train_requires_vectors(self):
+        """Тестирует отказ от обучения на слишком малой выборке."""
+        with pytest.raises(ValueError, match='not enough vectors'):
+            ivf.train_centroids(get_vectors(2), lists_count, iterations, 2)
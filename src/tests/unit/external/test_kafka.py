@@ -0,0 +1,97 @@
+import asyncio
+import io
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+
+from app.core.config.config import get_settings
+from app.external.kafka import KafkaProducer
+from app.external.outbox import read_segment
+from app.external.payloads import PayloadKey, read_inline_image
+
+username = 'george'
+small_image = b'\xff\xd8\xff\xe0small'
+inline_threshold = len(small_image) * 2
+backoff = 0.001
+
+
+@pytest_asyncio.fixture
+async def producer(tmp_path, monkeypatch):
+    """Создает producer с хранилищем во временной директории."""
+    kafka_settings = get_settings().kafka
+    monkeypatch.setattr(kafka_settings, 'storage_path', str(tmp_path))
+    monkeypatch.setattr(
+        kafka_settings, 'inline_image_threshold', inline_threshold,
+    )
+    kafka_producer = KafkaProducer()
+    yield kafka_producer
+    await kafka_producer.outbox.close()
+    kafka_producer.payload_builder.shutdown()
+
+
+async def get_outbox_messages(kafka_producer: KafkaProducer) -> list[dict]:
+    """Возвращает сообщения из журнала producer."""
+    segments = await kafka_producer.outbox.seal()
+    return [
+        message
+        for segment in segments
+        for _, message in read_segment(segment)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upload_small_image_inline(producer: KafkaProducer):
+    """Тестирует передачу маленького изображения внутри сообщения."""
+    image = UploadFile(io.BytesIO(small_image), size=len(small_image))
+
+    await producer.upload_image(username, image)
+
+    messages = await get_outbox_messages(producer)
+    assert len(messages) == 1
+    message = messages[0]
+    assert read_inline_image(message) == small_image
+    assert PayloadKey.file_path not in message
+
+
+@pytest.mark.asyncio
+async def test_upload_large_image_by_path(producer: KafkaProducer):
+    """Тестирует передачу большого изображения ссылкой на файл."""
+    large_image = bytes(small_image * 3)
+    image = UploadFile(io.BytesIO(large_image), size=len(large_image))
+
+    await producer.upload_image(username, image)
+
+    messages = await get_outbox_messages(producer)
+    assert len(messages) == 1
+    file_path = messages[0][PayloadKey.file_path]
+    assert messages[0][PayloadKey.content_encoding] == 'identity'
+    assert Path(file_path).read_bytes() == large_image
+
+
+@pytest.mark.asyncio
+async def test_start_does_not_wait_for_kafka(
+    producer: KafkaProducer, monkeypatch,
+):
+    """Тестирует подключение к kafka в фоне с повторными попытками."""
+    monkeypatch.setattr(get_settings().kafka, 'connect_backoff', backoff)
+    attempts = []
+
+    async def start_producer():  # noqa: WPS430 fake for the kafka client
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise ConnectionError('kafka is down')
+
+    monkeypatch.setattr(producer.producer, 'start', start_producer)
+    monkeypatch.setattr(producer.drainer, 'drain', AsyncMock(return_value=0))
+
+    await producer.start()
+    assert not await producer.check_kafka()
+    while not producer.drainer.drain.await_count:
+        await asyncio.sleep(backoff)
+
+    assert len(attempts) == 3
+    for task in producer._tasks:  # noqa: WPS437 stop background tasks
+        task.cancel()
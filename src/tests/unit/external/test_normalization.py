@@ -0,0 +1,118 @@
+import io
+from pathlib import Path
+
+import pytest
+from fastapi import UploadFile
+from PIL import ExifTags, Image
+
+from app.core.errors import PayloadTooLargeError
+from app.external.normalization import ImageNormalizer, normalize_image
+
+max_dimension = 64
+quality = 85
+max_pixels = 1000000
+jpeg_format = 'JPEG'
+photo_size = (640, 480)
+rotated_orientation = 6
+
+
+def get_image_bytes(size: tuple[int, int], image_format: str) -> bytes:
+    """Создает изображение заданного размера и формата."""
+    mode = 'RGBA' if image_format == 'PNG' else 'RGB'
+    output = io.BytesIO()
+    Image.new(mode, size, 'teal').save(output, image_format)
+    return output.getvalue()
+
+
+def write_image(tmp_path: Path, image_bytes: bytes) -> str:
+    """Записывает изображение в файл и возвращает путь к нему."""
+    image_path = tmp_path / 'image'
+    image_path.write_bytes(image_bytes)
+    return str(image_path)
+
+
+def open_image(image_bytes: bytes) -> Image.Image:
+    """Открывает изображение из байт."""
+    return Image.open(io.BytesIO(image_bytes))
+
+
+@pytest.mark.parametrize(
+    'size, image_format, expected_size', (
+        pytest.param(photo_size, jpeg_format, (64, 48), id='jpeg'),
+        pytest.param((300, 600), 'PNG', (32, 64), id='png'),
+        pytest.param((32, 16), jpeg_format, (32, 16), id='small'),
+    ),
+)
+def test_normalize_image(tmp_path, size, image_format, expected_size):
+    """Тестирует уменьшение и перекодирование изображения в JPEG."""
+    normalized = normalize_image(
+        write_image(tmp_path, get_image_bytes(size, image_format)),
+        max_dimension,
+        quality,
+        max_pixels,
+    )
+
+    with open_image(normalized) as image:
+        assert image.format == jpeg_format
+        assert image.mode == 'RGB'
+        assert image.size == expected_size
+
+
+def test_normalize_image_applies_orientation(tmp_path):
+    """Тестирует поворот изображения по EXIF."""
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = rotated_orientation
+    output = io.BytesIO()
+    Image.new('RGB', photo_size).save(output, jpeg_format, exif=exif)
+
+    normalized = normalize_image(
+        write_image(tmp_path, output.getvalue()),
+        max_dimension,
+        quality,
+        max_pixels,
+    )
+
+    with open_image(normalized) as image:
+        assert image.size == (48, 64)
+
+
+def test_normalize_image_pixel_limit(tmp_path):
+    """Тестирует ограничение количества пикселей до декодирования."""
+    image_path = write_image(tmp_path, get_image_bytes(photo_size, jpeg_format))
+    with pytest.raises(Image.DecompressionBombError):
+        normalize_image(
+            image_path,
+            max_dimension,
+            quality,
+            max_pixels=photo_size[0] * photo_size[1] - 1,
+        )
+
+
+class TestImageNormalizer:
+    """Тестирует класс ImageNormalizer."""
+
+    @pytest.mark.asyncio
+    async def test_normalize(self):
+        """Тестирует нормализацию в пуле процессов."""
+        image_bytes = get_image_bytes(photo_size, 'PNG')
+        normalizer = ImageNormalizer(max_dimension, quality, max_pixels, 1)
+        upload = UploadFile(io.BytesIO(image_bytes), size=len(image_bytes))
+
+        normalized = await normalizer.normalize(upload)
+
+        normalizer.shutdown()
+        with open_image(await normalized.read()) as image:
+            assert image.size == (64, 48)
+        assert normalized.size < len(image_bytes)
+
+    @pytest.mark.asyncio
+    async def test_pixel_limit(self):
+        """Тестирует ошибку при превышении количества пикселей."""
+        image_bytes = get_image_bytes(photo_size, jpeg_format)
+        normalizer = ImageNormalizer(max_dimension, quality, 1000, 1)
+        upload = UploadFile(io.BytesIO(image_bytes), size=len(image_bytes))
+
+        with pytest.raises(PayloadTooLargeError):
+            await normalizer.normalize(upload)
+
+        normalizer.shutdown()
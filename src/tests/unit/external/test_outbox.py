@@ -0,0 +1,144 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+import pytest_asyncio
+
+from app.external import outbox as outbox_module
+from app.external.outbox import (
+    Outbox,
+    OutboxDrainer,
+    commit_segment,
+    read_segment,
+)
+
+sync_timeout = 0.05
+messages = [
+    {'username': 'george', 'file_path': '/images/george-1'},
+    {'username': 'max', 'file_path': '/images/max-1'},
+    {'username': 'george', 'file_path': '/images/george-2'},
+]
+
+
+class FakePublisher:
+    """Публикация, запоминающая пачки сообщений."""
+
+    def __init__(self, is_available: bool = True) -> None:
+        """Метод инициализации."""
+        self.is_available = is_available
+        self.published: list[dict] = []
+        self.keys: list[bytes | None] = []
+
+    async def publish(self, message, headers=None, key=None):
+        """Подтверждает или отклоняет доставку сообщения."""
+        delivery = asyncio.get_running_loop().create_future()
+        if self.is_available:
+            self.published.append(message)
+            self.keys.append(key)
+            delivery.set_result(None)
+        else:
+            delivery.set_exception(ConnectionError())
+        return delivery
+
+
+@pytest_asyncio.fixture
+async def outbox(tmp_path):
+    """Создает журнал с сообщениями."""
+    journal = Outbox(tmp_path, segment_size=1024, fsync='always')
+    for message in messages:
+        await journal.append(message)
+    yield journal
+    await journal.close()
+
+
+class TestOutbox:
+    """Тестирует класс Outbox."""
+
+    @pytest.mark.asyncio
+    async def test_append_and_read(self, outbox: Outbox):
+        """Тестирует чтение сообщений в порядке записи."""
+        segments = await outbox.seal()
+
+        assert len(segments) == 1
+        assert messages == [message for _, message in read_segment(segments[0])]
+
+    @pytest.mark.asyncio
+    async def test_torn_record_skipped(self, outbox: Outbox):
+        """Тестирует пропуск недописанной записи после сбоя."""
+        segment = (await outbox.seal())[0]
+        with open(segment, 'ab') as segment_file:
+            segment_file.write(b'\x00\x00\x01\x00torn')
+
+        assert len(read_segment(segment)) == len(messages)
+
+    @pytest.mark.asyncio
+    async def test_checkpoint(self, outbox: Outbox):
+        """Тестирует чтение после чекпоинта и после поврежденного чекпоинта."""
+        segment = (await outbox.seal())[0]
+        first_offset, _ = read_segment(segment)[0]
+
+        commit_segment(segment, first_offset)
+        unsent = read_segment(segment)
+        segment.with_suffix('.checkpoint').write_text('')
+
+        assert messages[1:] == [message for _, message in unsent]
+        assert len(read_segment(segment)) == len(messages)
+        assert sorted(outbox.path.iterdir()) == [
+            segment.with_suffix('.checkpoint'), segment,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_interval_sync_without_drainer(self, tmp_path, monkeypatch):
+        """Тестирует fsync по интервалу без отправки в kafka."""
+        fsync = MagicMock()
+        monkeypatch.setattr(outbox_module.os, 'fsync', fsync)
+        journal = Outbox(tmp_path, segment_size=1024, fsync='interval')
+        await journal.append(messages[0])
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(journal.run_sync(0), timeout=sync_timeout)
+
+        fsync.assert_called()
+        await journal.close()
+
+    @pytest.mark.asyncio
+    async def test_roll_segments(self, tmp_path):
+        """Тестирует начало нового сегмента при превышении размера."""
+        journal = Outbox(tmp_path, segment_size=1, fsync='never')
+        for message in messages:
+            await journal.append(message)
+
+        segments = await journal.seal()
+        await journal.close()
+
+        assert len(segments) == len(messages)
+
+
+class TestOutboxDrainer:
+    """Тестирует класс OutboxDrainer."""
+
+    @pytest.mark.asyncio
+    async def test_drain(self, outbox: Outbox):
+        """Тестирует отправку и удаление отправленных сегментов."""
+        publisher = FakePublisher()
+        drainer = OutboxDrainer(outbox, publisher, batch_size=10)
+
+        delivered = await drainer.drain()
+
+        assert delivered == len(messages)
+        assert publisher.published == messages
+        assert publisher.keys == [b'george', b'max', b'george']
+        assert not list(outbox.path.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_drain_retries_after_failure(self, outbox: Outbox):
+        """Тестирует что при недоступной kafka сообщения не теряются."""
+        publisher = FakePublisher(is_available=False)
+        drainer = OutboxDrainer(outbox, publisher, batch_size=10)
+
+        with pytest.raises(ConnectionError):
+            await drainer.drain()
+        publisher.is_available = True
+        await drainer.drain()
+
+        assert publisher.published == messages
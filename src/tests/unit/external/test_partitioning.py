@@ -0,0 +1,33 @@
+import pytest
+
+from app.external.partitioning import crc32_partitioner, get_partitioner
+
+partitions = list(range(8))
+
+
+@pytest.mark.parametrize('name', ('murmur2', 'crc32'))
+def test_same_key_same_partition(name):
+    """Тестирует что сообщения пользователя попадают в одну партицию."""
+    partitioner = get_partitioner(name)
+
+    chosen = {partitioner(b'george', partitions, partitions) for _ in range(10)}
+
+    assert len(chosen) == 1
+
+
+@pytest.mark.parametrize('name', ('murmur2', 'crc32'))
+def test_keys_spread_across_partitions(name):
+    """Тестирует распределение пользователей по партициям."""
+    partitioner = get_partitioner(name)
+
+    chosen = {
+        partitioner(f'user-{user}'.encode(), partitions, partitions)
+        for user in range(100)
+    }
+
+    assert chosen == set(partitions)
+
+
+def test_crc32_without_key_uses_available():
+    """Тестирует выбор доступной партиции для сообщения без ключа."""
+    assert crc32_partitioner(None, partitions, [3]) == 3
@@ -0,0 +1,84 @@
+import io
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.config.config import get_settings
+from app.external.payloads import (
+    PayloadBuilder,
+    PayloadKey,
+    build_inline_message,
+    build_path_message,
+    get_payload_headers,
+    read_inline_image,
+)
+
+username = 'george'
+image = bytes(1024)
+normalized_size = (32, 24)
+
+
+def test_inline_round_trip():
+    """Тестирует изображение внутри сообщения."""
+    message = build_inline_message(username, image, quality=1)
+
+    assert read_inline_image(message) == image
+    assert len(message[PayloadKey.image]) < len(image)
+
+
+def test_inline_jpeg_not_compressed():
+    """Тестирует передачу JPEG внутри сообщения без сжатия."""
+    jpeg_image = b'\xff\xd8\xff\xe0 jpeg image'
+    message = build_inline_message(username, jpeg_image, quality=1)
+
+    assert message[PayloadKey.content_encoding] == 'identity'
+    assert read_inline_image(message) == jpeg_image
+
+
+@pytest.mark.parametrize(
+    'message, mode', (
+        pytest.param(
+            build_inline_message(username, image, quality=1),
+            b'inline',
+            id='inline',
+        ),
+        pytest.param(
+            build_path_message(username, '/images/george'), b'path', id='path',
+        ),
+    ),
+)
+def test_payload_headers(message, mode):
+    """Тестирует заголовок способа передачи изображения."""
+    assert get_payload_headers(message) == [('payload-mode', mode)]
+
+
+@pytest.fixture
+def builder(monkeypatch, tmp_path):
+    """Создает PayloadBuilder с нормализацией изображений."""
+    kafka_settings = get_settings().kafka
+    monkeypatch.setattr(kafka_settings, 'storage_path', str(tmp_path))
+    monkeypatch.setattr(kafka_settings, 'normalize_images', value=True)
+    monkeypatch.setattr(
+        kafka_settings, 'normalize_max_dimension', normalized_size[0],
+    )
+    monkeypatch.setattr(kafka_settings, 'normalize_workers', 1)
+    payload_builder = PayloadBuilder()
+    yield payload_builder
+    payload_builder.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_builder_normalizes_image(builder: PayloadBuilder):
+    """Тестирует нормализацию изображения перед отправкой."""
+    output = io.BytesIO()
+    Image.new('RGB', (640, 480), 'teal').save(output, 'PNG')
+    upload = UploadFile(output, size=output.tell())
+    output.seek(0)
+
+    message = await builder.build(username, upload)
+
+    assert message[PayloadKey.content_encoding] == 'identity'
+    with Image.open(io.BytesIO(read_inline_image(message))) as normalized:
+        assert normalized.format == 'JPEG'
+        assert normalized.size == normalized_size
@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.external.publisher import Publisher
+
+topic = 'faces'
+message = {'username': 'george', 'file_path': '/images/george'}
+
+
+class FakeProducer:
+    """Producer, подтверждающий доставку по команде теста."""
+
+    def __init__(self) -> None:
+        """Метод инициализации."""
+        self.deliveries: list[asyncio.Future] = []
+        self.keys: list[bytes | None] = []
+
+    async def send(self, topic_name, message_value, key=None, headers=None):
+        """Ставит сообщение в очередь и возвращает future доставки."""
+        self.keys.append(key)
+        delivery = asyncio.get_running_loop().create_future()
+        self.deliveries.append(delivery)
+        return delivery
+
+    async def flush(self):
+        """Ждет подтверждения всех сообщений."""
+        await asyncio.gather(*self.deliveries, return_exceptions=True)
+
+
+@pytest.fixture
+def kafka_metrics(monkeypatch) -> MagicMock:
+    """Заменяет клиент метрик kafka на mock объект."""
+    metrics = MagicMock()
+    monkeypatch.setattr(
+        'app.external.publisher.get_kafka_metrics', lambda: metrics,
+    )
+    return metrics
+
+
+class TestPublisher:
+    """Тестирует класс Publisher."""
+
+    @pytest.mark.asyncio
+    async def test_delivery_observed(self, kafka_metrics):
+        """Тестирует метрики подтвержденной доставки."""
+        producer = FakeProducer()
+        publisher = Publisher(producer, topic, max_in_flight=2)
+
+        delivery = await publisher.publish(message)
+        assert publisher.in_flight == 1
+        delivery.set_result(None)
+        await asyncio.sleep(0)
+
+        assert publisher.in_flight == 0
+        kafka_metrics.observe_delivery.assert_called_once()
+        kafka_metrics.inc_delivery_errors.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_delivery_error(self, kafka_metrics):
+        """Тестирует метрики ошибки доставки."""
+        producer = FakeProducer()
+        publisher = Publisher(producer, topic, max_in_flight=2)
+
+        delivery = await publisher.publish(message)
+        delivery.set_exception(ConnectionError())
+        await publisher.flush()
+
+        assert publisher.in_flight == 0
+        kafka_metrics.inc_delivery_errors.assert_called_once_with(topic)
+
+    @pytest.mark.asyncio
+    async def test_backpressure(self, kafka_metrics):
+        """Тестирует ожидание места в заполненной очереди."""
+        producer = FakeProducer()
+        publisher = Publisher(producer, topic, max_in_flight=1)
+        await publisher.publish(message)
+
+        blocked = asyncio.create_task(publisher.publish(message))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        producer.deliveries[0].set_result(None)
+        await blocked
+
+        assert len(producer.deliveries) == 2
+
+    @pytest.mark.asyncio
+    async def test_key(self, kafka_metrics):
+        """Тестирует передачу ключа партиционирования."""
+        producer = FakeProducer()
+        publisher = Publisher(producer, topic, max_in_flight=2)
+
+        await publisher.publish(message, key=b'george')
+        await publisher.publish(message)
+
+        assert producer.keys == [b'george', None]
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.external.report_formats import (
+    ReportFormat,
+    ReportTotals,
+    encode_header,
+    encode_rows,
+    encode_totals,
+)
+
+created_at = datetime.fromisoformat('2024-01-01T12:00:00')
+deposit = 100
+withdrawal = 30
+rows = (
+    (1, created_at, True, deposit),
+    (2, created_at, False, withdrawal),
+    (3, created_at, True, deposit),
+)
+balance_change = 2 * deposit - withdrawal
+
+
+def encode_report(report_format: ReportFormat) -> tuple[str, ReportTotals]:
+    """Кодирует отчет из двух страниц."""
+    totals = ReportTotals(report_id=7)
+    chunks = [
+        encode_header(report_format),
+        encode_rows(rows[:2], totals, report_format),
+        encode_rows(rows[2:], totals, report_format),
+        encode_totals(totals, report_format),
+    ]
+    return b''.join(chunks).decode(), totals
+
+
+def test_totals_across_pages():
+    """Тестирует накопление итогов по страницам."""
+    _, totals = encode_report(ReportFormat.csv)
+
+    assert totals == ReportTotals(
+        report_id=7,
+        transactions=len(rows),
+        deposits=2 * deposit,
+        withdrawals=withdrawal,
+        balance_change=balance_change,
+    )
+
+
+def test_csv_report():
+    """Тестирует CSV отчет с изменением баланса в каждой строке."""
+    report, _ = encode_report(ReportFormat.csv)
+
+    records = list(csv.DictReader(io.StringIO(report)))
+
+    assert records[-1]['balance_change'] == str(balance_change)
+    assert records[1]['transaction_type'] == 'withdrawal'
+    assert records[0]['created_at'] == created_at.isoformat()
+
+
+def test_ndjson_report():
+    """Тестирует NDJSON отчет со строкой итогов в конце."""
+    report, _ = encode_report(ReportFormat.ndjson)
+
+    records = [json.loads(line) for line in report.splitlines()]
+
+    ids = [record.get('id') for record in records[:-1]]
+    assert ids == [row[0] for row in rows]
+    assert records[-1]['totals']['balance_change'] == balance_change
+
+
+@pytest.mark.parametrize(('report_format', 'media_type'), [
+    (ReportFormat.csv, 'text/csv'),
+    (ReportFormat.ndjson, 'application/x-ndjson'),
+])
+def test_media_type(report_format: ReportFormat, media_type: str):
+    """Тестирует тип содержимого ответа."""
+    assert report_format.media_type == media_type
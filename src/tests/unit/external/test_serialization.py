@@ -0,0 +1,43 @@
+import pytest
+
+from app.core.errors import ConfigError
+from app.external.serialization import (
+    deserialize,
+    get_compression_type,
+    get_serializer,
+    optional_serializers,
+)
+
+message = {'username': 'george', 'file_path': '/images/george'}
+
+
+class TestGetSerializer:
+    """Тестирует функцию get_serializer."""
+
+    @pytest.mark.parametrize('name', ('json', 'orjson', 'msgpack'))
+    def test_round_trip(self, name):
+        """Тестирует сериализацию и десериализацию по заголовкам."""
+        if name in optional_serializers:
+            pytest.importorskip(name)
+        serializer = get_serializer(name)
+
+        message_value = serializer.dumps(message)
+
+        assert deserialize(message_value, serializer.headers) == message
+        assert ('schema-version', b'1') in serializer.headers
+
+    def test_unknown(self):
+        """Тестирует ошибку неизвестного формата."""
+        with pytest.raises(ConfigError):
+            get_serializer('pickle')
+
+
+@pytest.mark.parametrize(
+    'codec, expected', (
+        pytest.param('none', None, id='none'),
+        pytest.param('gzip', 'gzip', id='gzip'),
+    ),
+)
+def test_get_compression_type(codec, expected):
+    """Тестирует тип сжатия для AIOKafkaProducer."""
+    assert get_compression_type(codec) == expected
@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.external import similarity
+from app.external.embeddings import normalize_embedding, vector_dtype
+
+dimension = 8
+users_count = 50
+chunk_rows = 16
+limit = 5
+replaced_username = 'user-3'
+added_username = 'added'
+updated_at = datetime.now(timezone.utc)
+
+
+def get_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """Создает случайные эмбеддинги единичной длины."""
+    rng = np.random.default_rng(seed)
+    return normalize_embedding(rng.standard_normal((count, dimension)))
+
+
+def get_usernames(count: int) -> list[str]:
+    """Создает имена пользователей."""
+    return [f'user-{row}' for row in range(count)]
+
+
+def get_change(username: str, vector: bytes | None) -> SimpleNamespace:
+    """Создает строку изменения эмбеддинга из базы данных."""
+    return SimpleNamespace(
+        username=username, vector=vector, vector_updated_at=updated_at,
+    )
+
+
+def get_names(matches: list) -> list[str]:
+    """Возвращает имена пользователей из ответа поиска."""
+    return [username for username, _ in matches]
+
+
+def exact_search(queries: np.ndarray) -> list[list[str]]:
+    """Ищет самых близких пользователей полным перебором."""
+    exact_rows = np.argsort(-(queries @ get_vectors(users_count).T))
+    usernames = np.array(get_usernames(users_count))
+    return usernames[exact_rows[:, :limit]].tolist()
+
+
+@pytest.fixture
+def index(monkeypatch) -> similarity.SimilarityIndex:
+    """Создает индекс, который ищет по нескольким фрагментам матрицы."""
+    monkeypatch.setattr(similarity, 'search_chunk_rows', chunk_rows)
+    return similarity.SimilarityIndex(
+        get_vectors(users_count), get_usernames(users_count),
+    )
+
+
+class TestSimilarityIndex:
+    """Тестирует индекс эмбеддингов пользователей."""
+
+    def test_search_matches_exact(self, index):
+        """Тестирует совпадение поиска с полным перебором."""
+        queries = get_vectors(3, seed=1)
+
+        found = index.search(queries, limit=limit)
+
+        assert list(map(get_names, found)) == exact_search(queries)
+        scores = np.array([score for _, score in found[0]])
+        assert np.all(scores[:-1] >= scores[1:])
+
+    def test_upsert_and_remove(self, index):
+        """Тестирует замену, удаление и добавление эмбеддингов."""
+        query = get_vectors(1, seed=2)
+        index.upsert([replaced_username], query)
+        replaced = index.search(query, limit=1)[0]
+
+        index.remove([replaced_username])
+        removed = index.search(query, limit=limit)[0]
+
+        index.upsert([added_username], query * 2)
+        assert replaced == [(replaced_username, pytest.approx(1))]
+        assert replaced_username not in get_names(removed)
+        assert index.positions[added_username] == 3
+        added = index.search(query, limit=1)[0]
+        assert added == [(added_username, pytest.approx(1))]
+
+    def test_upsert_grows_tail(self, index):
+        """Тестирует добавление пользователей сверх матрицы снимка."""
+        vectors = get_vectors(chunk_rows * 3, seed=3)
+        usernames = [f'added-{row}' for row in range(len(vectors))]
+
+        index.upsert(usernames, vectors)
+
+        found = index.search(vectors[-1], limit=1)[0]
+        assert found == [(usernames[-1], pytest.approx(1))]
+        assert len(index.positions) == users_count + len(vectors)
+
+    def test_snapshot_round_trip(self, index, tmp_path):
+        """Тестирует загрузку снимка и неизменность файла при записи."""
+        path = tmp_path / 'users.idx'
+        index.remove(['user-0'])
+        index.watermark = updated_at
+        index.save(path)
+        snapshot = path.read_bytes()
+        query = get_vectors(1, seed=5)
+
+        loaded = similarity.SimilarityIndex.load(path)
+        loaded.upsert(['user-1'], get_vectors(1, seed=4))
+
+        assert loaded.watermark == updated_at
+        assert 'user-0' not in loaded.positions
+        assert len(loaded.positions) == users_count - 1
+        expected = index.search(query, limit=limit)[0][1:]
+        assert loaded.search(query, limit=limit)[0][1:] == expected
+        assert path.read_bytes() == snapshot
+
+    def test_load_empty_snapshot(self, tmp_path):
+        """Тестирует снимок пустого индекса."""
+        path = tmp_path / 'users.idx'
+        vectors = np.zeros((0, dimension), dtype=vector_dtype)
+        similarity.SimilarityIndex(vectors, []).save(path)
+
+        loaded = similarity.SimilarityIndex.load(path)
+
+        assert loaded.watermark is None
+        assert loaded.search(get_vectors(1), limit=1) == [[]]
+
+    def test_apply_changes(self, index):
+        """Тестирует применение изменений из базы данных."""
+        vector = get_vectors(1, seed=6)[0]
+
+        index.apply_changes([
+            get_change('user-1', None),
+            get_change('user-2', b'wrong size'),
+            get_change(added_username, vector.tobytes()),
+        ])
+
+        assert 'user-1' not in index.positions
+        assert 'user-2' not in index.positions
+        found = index.search(vector, limit=1)[0]
+        assert get_names(found) == [added_username]
+        assert index.watermark == updated_at
@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from aiokafka import ConsumerRecord
+
+from app.external.embeddings import embedding_dimension, unpack_embedding
+from app.external.payloads import PayloadKey, build_path_message
+from app.external.postgres.vectors import VerificationResult
+from app.external.verification_consumer import VerificationConsumer
+
+embedding = np.ones(embedding_dimension).tolist()
+flush_interval = 0.05
+commit, write, stop = 'commit', 'write', 'stop'
+verified = {PayloadKey.is_verified: True}
+
+
+def get_record(offset: int, message: dict | bytes) -> ConsumerRecord:
+    """Создает сообщение kafka."""
+    message_value = message
+    if isinstance(message, dict):
+        message_value = json.dumps(message).encode()
+    return ConsumerRecord(
+        'faces', 0, offset, 0, 0, None, message_value, None, 0, 0, [],
+    )
+
+
+class FakeConsumer:
+    """kafka consumer, возвращающий заданные пачки сообщений."""
+
+    def __init__(self, batches: list[list[ConsumerRecord]], events: list):
+        """Метод инициализации."""
+        self.batches = batches
+        self.events = events
+        self.max_records: list[int] = []
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        """Возвращает следующую пачку сообщений."""
+        self.max_records.append(max_records)
+        if not self.batches:
+            await asyncio.sleep(timeout_ms / 1000)
+            return {}
+        return {'partition': self.batches.pop(0)}
+
+    async def commit(self):
+        """Фиксирует смещения."""
+        self.events.append(commit)
+
+    async def stop(self):
+        """Отключается от kafka."""
+        self.events.append(stop)
+
+
+class FakeWriter:
+    """Запись эмбеддингов в память."""
+
+    def __init__(self, events: list):
+        """Метод инициализации."""
+        self.events = events
+        self.batches: list[list[VerificationResult]] = []
+
+    def write(self, verifications):
+        """Запоминает пачку результатов."""
+        self.batches.append(list(verifications))
+        self.events.append(write)
+        return len(verifications)
+
+
+async def consume(
+    batches: list[list[ConsumerRecord]], batch_size: int,
+) -> tuple[FakeWriter, list]:
+    """Обрабатывает сообщения и останавливает consumer."""
+    events: list = []
+    writer = FakeWriter(events)
+    consumer = VerificationConsumer(
+        FakeConsumer(batches, events),  # type: ignore[arg-type]
+        writer,  # type: ignore[arg-type]
+        batch_size=batch_size,
+        flush_interval=flush_interval,
+    )
+    task = asyncio.create_task(consumer.run())
+    await asyncio.sleep(flush_interval * 4)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await consumer.stop()
+    return writer, events
+
+
+@pytest.mark.asyncio
+async def test_commit_after_write():
+    """Тестирует фиксацию смещений после записи каждой пачки."""
+    messages = [
+        get_record(offset, {
+            'username': str(offset), 'embedding': embedding, **verified,
+        })
+        for offset in range(5)
+    ]
+
+    batches = [messages[:3], messages[3:]]
+
+    writer, events = await consume(batches, batch_size=3)
+
+    assert [len(batch) for batch in writer.batches] == [3, 2]
+    assert events == [write, commit, write, commit, stop]
+    vector = unpack_embedding(writer.batches[0][0].vector)
+    assert vector[0] == pytest.approx(embedding_dimension ** -0.5)
+
+
+@pytest.mark.asyncio
+async def test_skip_invalid_messages(tmp_path):
+    """Тестирует пропуск сообщений, которые нельзя обработать."""
+    image_path = tmp_path / 'image'
+    image_path.write_bytes(b'not an image')
+    messages = [
+        get_record(0, b'not a json'),
+        get_record(1, {
+            **build_path_message('george', str(image_path)), **verified,
+        }),
+        get_record(2, {'username': 'max', PayloadKey.embedding: embedding}),
+        get_record(3, {
+            'username': 'kate', PayloadKey.embedding: embedding, **verified,
+        }),
+    ]
+
+    writer, events = await consume([messages], batch_size=10)
+
+    usernames = [verification.username for verification in writer.batches[0]]
+    assert usernames == ['kate']
+    assert events == [write, commit, stop]
+    assert not tmp_path.joinpath('image.ack').exists()
+
+
+@pytest.mark.asyncio
+async def test_acknowledge_verified_images(tmp_path):
+    """Тестирует подтверждение изображения после записи результата."""
+    image_path = tmp_path / 'image'
+    image_path.write_bytes(b'not an image')
+    message = {
+        **build_path_message('george', str(image_path)),
+        PayloadKey.embedding: embedding,
+        PayloadKey.is_verified: False,
+    }
+
+    records = [get_record(0, message)]
+
+    writer, events = await consume([records], batch_size=1)
+
+    assert not writer.batches[0][0].is_verified
+    assert events == [write, commit, stop]
+    assert tmp_path.joinpath('image.ack').exists()
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+
+from prometheus_client import CollectorRegistry
+
+from app.metrics.metrics import SERVICE_PREFIX, PrometheusClient
+
+requests_count = 3
+labels = {
+    'method': 'GET',
+    'service': 'auth-service',
+    'endpoint': '/healthz/up',
+    'status': 200,
+}
+
+
+def test_labelled_children_are_cached():
+    """Тестирует повторное использование дочерней метрики."""
+    registry = CollectorRegistry()
+    client = PrometheusClient(None, registry=registry)
+
+    with patch.object(
+        client.request_count, 'labels', wraps=client.request_count.labels,
+    ) as bind_labels:
+        for _ in range(requests_count):
+            client.inc_request_count(**labels)
+        bind_labels.assert_called_once_with(**labels)
+
+    sample_labels = {**labels, 'status': str(labels['status'])}
+    assert registry.get_sample_value(
+        f'{SERVICE_PREFIX}_request_count_total', sample_labels,
+    ) == requests_count
@@ -0,0 +1,22 @@
+from prometheus_client import CollectorRegistry
+
+from app.metrics.metrics import SERVICE_PREFIX
+from app.metrics.postgres import PrometheusPoolMetrics
+
+pool_name = 'db/mydatabase'
+checked_out = (2, 3)
+
+
+def test_pools_with_one_name_are_summed():
+    """Тестирует сумму показателей пулов к одной базе данных."""
+    registry = CollectorRegistry()
+    pool_metrics = PrometheusPoolMetrics(registry)
+
+    for pool_checked_out in checked_out:
+        pool_metrics.track_pool(
+            pool_name, checked_out=lambda count=pool_checked_out: count,
+        )
+
+    assert registry.get_sample_value(
+        f'{SERVICE_PREFIX}_db_pool_checked_out', {'pool': pool_name},
+    ) == sum(checked_out)
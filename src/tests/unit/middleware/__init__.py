@@ -0,0 +1 @@
+"""Тесты для пакета middleware."""
@@ -0,0 +1,114 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, status
+
+from app.core.interfaces import MetricsClient
+from app.metrics.metrics import AuthStatus
+from app.middleware.middleware import (
+    MetricsMiddleware,
+    service_name,
+    unmatched_endpoint,
+)
+
+ready_path = '/healthz/ready'
+user_path = '/users/{username}'
+mount_path = '/metrics'
+
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+app.mount(mount_path, FastAPI())
+
+
+@app.get(ready_path)
+async def ready() -> dict[str, str]:
+    """Отвечает как проба готовности."""
+    return {'message': 'ok'}
+
+
+@app.get(user_path)
+async def read_user(username: str) -> dict[str, str]:
+    """Отвечает ошибкой для любого пользователя."""
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+
+async def serve_with_state(
+    metrics_client: MetricsClient, scope, receive, send,
+) -> None:
+    """Передает клиент метрик в состоянии запроса, как lifespan."""
+    scope['state'] = {'metrics_client': metrics_client}
+    await app(scope, receive, send)
+
+
+def create_client(metrics_client: MetricsClient) -> httpx.AsyncClient:
+    """Создает клиент приложения с клиентом метрик."""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(
+            partial(serve_with_state, metrics_client),
+        ),
+        base_url='http://test',
+    )
+
+
+@pytest.mark.asyncio
+async def test_ready_metrics():
+    """Тестирует метрики успешного запроса к пробе готовности."""
+    metrics_client = MagicMock(MetricsClient)
+    labels = {'method': 'GET', 'service': service_name, 'endpoint': ready_path}
+
+    async with create_client(metrics_client) as client:
+        response = await client.get(ready_path)
+
+    assert response.json() == {'message': 'ok'}
+    metrics_client.inc_ready_count.assert_called_once_with(
+        status=status.HTTP_200_OK, **labels,
+    )
+    metrics_client.inc_request_count.assert_called_once_with(
+        status=status.HTTP_200_OK, **labels,
+    )
+    metrics_client.observe_auth.assert_called_once_with(
+        auth_status=AuthStatus.success, status=status.HTTP_200_OK, **labels,
+    )
+    assert metrics_client.observe_duration.call_args.kwargs['endpoint'] == (
+        ready_path
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_request_metrics():
+    """Тестирует метрики запроса, завершенного ошибкой."""
+    metrics_client = MagicMock(MetricsClient)
+
+    async with create_client(metrics_client) as client:
+        response = await client.get('/users/george')
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    metrics_client.inc_ready_count.assert_not_called()
+    metrics_client.observe_auth.assert_called_once_with(
+        auth_status=AuthStatus.failure,
+        status=status.HTTP_404_NOT_FOUND,
+        method='GET',
+        service=service_name,
+        endpoint=user_path,
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('path, endpoint', [
+    ('/users/max', user_path),
+    ('/unknown/path', unmatched_endpoint),
+    ('/.env', unmatched_endpoint),
+    (f'{mount_path}/anything', mount_path),
+])
+async def test_endpoint_labels(path: str, endpoint: str):
+    """Тестирует лэйбл endpoint из шаблона маршрута."""
+    metrics_client = MagicMock(MetricsClient)
+
+    async with create_client(metrics_client) as client:
+        await client.get(path)
+
+    labels = metrics_client.inc_request_count.call_args.kwargs
+    assert labels['endpoint'] == endpoint